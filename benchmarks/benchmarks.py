@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of reading, decoding and exporting UKDS datasets.
+
+The benchmarks are classes in the style of asv (airspeed velocity): setup
+prepares the inputs and each 'time_' method is one timed operation. They
+run on synthetic files made by fixtures.make_dataset, so no data is
+downloaded. The size of the dataset is set by the environment variables
+UKDS_BENCH_ROWS, UKDS_BENCH_VARIABLES, UKDS_BENCH_VALUE_LABEL_DENSITY,
+UKDS_BENCH_STRING_RATIO and UKDS_BENCH_SEED, and the files are kept in
+UKDS_BENCH_DIR. See run.py, which also records the peak memory of each
+benchmark.
+
+"""
+
+import os
+import tempfile
+
+import ukds
+from ukds.sinks import CallbackSink
+
+import fixtures
+
+
+def config():
+    "Returns the dataset arguments of fixtures.make_dataset from the environment"
+    env=os.environ.get
+    return {'rows':int(env('UKDS_BENCH_ROWS',10000)),
+            'variables':int(env('UKDS_BENCH_VARIABLES',100)),
+            'value_label_density':float(env('UKDS_BENCH_VALUE_LABEL_DENSITY',0.5)),
+            'string_ratio':float(env('UKDS_BENCH_STRING_RATIO',0.1)),
+            'seed':int(env('UKDS_BENCH_SEED',0))}
+
+
+def dataset():
+    "Returns the filepaths of the .tab and .rtf files of the configured dataset"
+    directory=os.environ.get('UKDS_BENCH_DIR',
+                             os.path.join(tempfile.gettempdir(),'ukds_benchmarks'))
+    return fixtures.make_dataset(directory,**config())
+
+
+def diary():
+    "Returns the filepaths of the .tab and .rtf files of the synthetic diary"
+    directory=os.environ.get('UKDS_BENCH_DIR',
+                             os.path.join(tempfile.gettempdir(),'ukds_benchmarks'))
+    return fixtures.make_diary(directory,rows=config()['rows'],seed=config()['seed'])
+
+
+def datatable(fp_tab,fp_rtf,dtypes=True):
+    "Returns a DataTable of the dataset"
+    dt=ukds.DataTable()
+    dt.read_datadictionary(fp_rtf,memory_map=True)
+    dt.read_tab(fp_tab,dtypes=dtypes)
+    return dt
+
+
+def discard():
+    "Returns a sink which drops the rdf, so that only the exporter is timed"
+    return CallbackSink(lambda c: None)
+
+
+class ReadSuite():
+    "Reading the .tab and .rtf files"
+
+    def setup(self):
+        self.fp_tab,self.fp_rtf=dataset()
+        self.dd=ukds.DataDictionary(self.fp_rtf,memory_map=True)
+
+    def time_read_rtf(self):
+        dd=ukds.DataDictionary()
+        dd.read_rtf(self.fp_rtf,encoding='cp1252')
+        dd.variable_dicts()
+
+    def time_read_rtf_memory_map(self):
+        ukds.DataDictionary(self.fp_rtf,memory_map=True).variable_dicts()
+
+    def time_read_tab(self):
+        dt=ukds.DataTable()
+        dt.read_tab(self.fp_tab)
+
+    def time_read_tab_dtypes(self):
+        dt=ukds.DataTable()
+        dt.datadictionary=self.dd
+        dt.read_tab(self.fp_tab,dtypes=True)
+
+
+class DataFrameSuite():
+    "Decoding the value labels"
+
+    def setup(self):
+        self.dt=datatable(*dataset())
+
+    def time_get_dataframe(self):
+        self.dt.get_dataframe()
+
+
+class ExportSuite():
+    "The Turtle file and the RDF exporters"
+
+    def setup(self):
+        self.fp_tab,fp_rtf=dataset()
+        self.dt=datatable(self.fp_tab,fp_rtf)
+        self.columns=list(self.dt.tab.columns)
+        self.directory=tempfile.mkdtemp()
+
+    def teardown(self):
+        for x in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory,x))
+        os.rmdir(self.directory)
+
+    def time_to_ttl(self):
+        self.dt.to_ttl(os.path.join(self.directory,'table.ttl'),'eg','http://example.com/')
+
+    def time_to_ttl_ntriples(self):
+        self.dt.to_ttl(os.path.join(self.directory,'table.nt'),'eg','http://example.com/',
+                       format='nt')
+
+    def time_to_bso_survey(self):
+        self.dt.to_bso_survey('eg','http://example.com/')
+
+    def time_to_bso_variable(self):
+        sink=discard()
+        for column in self.columns:
+            sink.add(self.dt.to_bso_variable('eg','http://example.com/',column))
+
+    def time_to_rdf_data_cube(self):
+        self.dt.to_rdf_data_cube('eg','http://example.com/',['serial'],sink=discard())
+
+    def time_to_rdf_bdo_observation_datums(self):
+        self.dt.to_rdf_bdo_observation_datums('eg','http://example.com/',self.columns,
+                                              sink=discard())
+
+    def time_to_rdf_bdo_observation_set(self):
+        self.dt.to_rdf_bdo_observation_set('eg','http://example.com/',add_members=True)
+
+    def time_datadictionary_to_bso(self):
+        self.dt.datadictionary.to_bso('eg','http://example.com/',sink=discard())
+
+    def time_datadictionary_to_rdf_data_cube(self):
+        self.dt.datadictionary.to_rdf_data_cube('eg','http://example.com/',['serial'])
+
+
+class DiarySuite():
+    "Reshaping the diary slot columns to long form"
+
+    def setup(self):
+        self.fp_tab,fp_rtf=diary()
+        self.dt=datatable(self.fp_tab,fp_rtf)
+
+    def time_to_long(self):
+        self.dt.to_long(id_columns=['serial','pnum'])
+
+    def time_to_long_decode(self):
+        self.dt.to_long(decode=True)
+
+    def time_iter_long(self):
+        for df in self.dt.iter_long(batchsize=max(config()['rows']//4,1)):
+            pass
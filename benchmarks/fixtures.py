@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Synthetic UK Data Service .tab and .rtf files for the benchmarks.
+
+The files have the layout of the UKDS downloads: a tab separated table
+with a header row of variable names, and an .rtf data dictionary with a
+'Pos. = ' block for each variable. The first variable is a 'serial'
+row identifier. Each other variable is a string variable, with
+probability string_ratio, or a numeric variable. A numeric variable has
+value labels, with probability value_label_density, and is then NOMINAL
+with mostly coded values; otherwise it is a SCALE variable.
+
+    fp_tab,fp_rtf=make_dataset('bench',rows=10000,variables=200)
+
+The same arguments and seed always give the same files.
+
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+RTF_HEADER=(r'{\rtf1\ansi\deff0\deftab1200{\fonttbl{\f0\fswiss MS Sans Serif;}'
+            r'{\f1\froman\fcharset2 Symbol;}{\f2\fswiss Arial;}}{\colortbl;'
+            r'\red0\green0\blue0;\red255\green0\blue0;\red100\green100\blue100;'
+            r'\red0\green0\blue255;\red10\green10\blue160;}\deflang2057\pard\plain'
+            r'\f2\fs20\cf1\par {\fs28\b\ul UK Data Archive Data Dictionary\par\par }'
+            r'{\b\f2\fs20\cf1\ File-level information:\par\par }'
+            r'{\f2\fs20\cf1 File Name = 		\f2\fs20\cf5%s\par }'
+            r'{\f2\fs20\cf1 Number of variables = 	\f2\fs20\cf5 %s\par }'
+            r'{\f2\fs20\cf1 Number of cases = 	\f2\fs20\cf5 %s\par\par\par }'
+            r'{\f2\fs20\cf1\b Variable-level information:\par }')
+
+RTF_VARIABLE=(r'{\cf1\b\par Pos. = }{\f2\fs20\cf4 %s	}{\b\cf1 Variable = }'
+              r'{\f2\fs20\cf4 %s	}{\b\cf1 Variable label = }{\cf4 %s\par }'
+              r'{\cf3 This variable is  }{\cf5\i %s}{\cf3, the SPSS measurement '
+              r'level is }{\cf5\i %s\par 	}')
+
+RTF_MISSING_VALUES=r'{\cf3 SPSS user missing values = }{\cf5\i %s\par }'
+
+RTF_VALUE_LABELS=r'{\cf3\ul\fs16 Value label information for %s\par }'
+
+RTF_VALUE_LABEL=r'{\cf1 Value = }{\f2\fs20\cf4 %s	}{\cf1 Label = }{\f2\fs20\cf4 %s\par }'
+
+WORDS=('North East','North West','Yorkshire','East Midlands','West Midlands',
+       'East of England','London','South East','South West','Wales',
+       'Scotland','Northern Ireland')
+
+
+def make_variables(variables,value_label_density=0.5,string_ratio=0.1,max_labels=12,seed=0):
+    """Returns the variable dictionaries of a synthetic data dictionary
+
+    :param variables int: the number of variables, including 'serial'
+    :param value_label_density float: the share of the numeric variables
+        which have value labels
+    :param string_ratio float: the share of the variables which are strings
+    :param max_labels int: the largest number of value labels of a variable
+    :param seed int: the random seed
+
+    :return result: dictionaries as given by DataDictionary.variable_dicts
+    :rtype list:
+
+    """
+    rng=np.random.default_rng(seed)
+    result=[{'pos':'1',
+             'variable':'serial',
+             'variable_label':'Household number',
+             'variable_type':'numeric',
+             'SPSS_measurement_level':'SCALE',
+             'SPSS_user_missing_values':{},
+             'value_labels':{}}]
+    for i in range(1,variables):
+        d={'pos':str(i+1),
+           'variable':'v%04d' % i,
+           'variable_label':'Synthetic variable %s' % i,
+           'SPSS_user_missing_values':{},
+           'value_labels':{}}
+        if rng.random()<string_ratio:
+            d['variable_type']='string'
+            d['SPSS_measurement_level']='NOMINAL'
+        elif rng.random()<value_label_density:
+            d['variable_type']='numeric'
+            d['SPSS_measurement_level']='NOMINAL'
+            n=int(rng.integers(2,max_labels+1))
+            d['value_labels']=dict([(-9.0,'Refused')]+
+                                   [(float(k),'Category %s' % k) for k in range(1,n)])
+            d['SPSS_user_missing_values']='-9.0 -8.0 -1.0'
+        else:
+            d['variable_type']='numeric'
+            d['SPSS_measurement_level']='SCALE'
+        result.append(d)
+    return result
+
+
+def write_rtf(fp,variable_dicts,name='synthetic',rows=0):
+    """Writes a UKDS .rtf data dictionary file for a list of variable dictionaries
+
+    :param fp str: the filepath
+    :param variable_dicts list: see make_variables
+    :param name str: the file name given in the file-level information
+    :param rows int: the number of cases given in the file-level information
+
+    """
+    l=[RTF_HEADER % (name,len(variable_dicts),rows)]
+    for d in variable_dicts:
+        l.append(RTF_VARIABLE % (d['pos'],d['variable'],d['variable_label'],
+                                 d['variable_type'],d['SPSS_measurement_level']))
+        if d['SPSS_user_missing_values']:
+            l.append(RTF_MISSING_VALUES % ' , '.join(d['SPSS_user_missing_values'].split(' ')))
+        l.append(RTF_VALUE_LABELS % d['variable'])
+        for k,v in d['value_labels'].items():
+            l.append(RTF_VALUE_LABEL % (k,v))
+    l.append('}')
+    with open(fp,'w',encoding='cp1252',newline='') as f:
+        f.write(''.join(l))
+
+
+def make_table(variable_dicts,rows,seed=0):
+    """Returns a synthetic table for a list of variable dictionaries
+
+    Coded variables take their label codes, with one value in twenty
+    uncoded. SCALE variables are integers or floats and string variables
+    take short place names.
+
+    :param variable_dicts list: see make_variables
+    :param rows int: the number of rows
+    :param seed int: the random seed
+
+    :rtype pandas.DataFrame:
+
+    """
+    rng=np.random.default_rng(seed)
+    data={}
+    for d in variable_dicts:
+        variable=d['variable']
+        if variable=='serial':
+            data[variable]=np.arange(11010000,11010000+rows)
+        elif d['variable_type']=='string':
+            data[variable]=np.array(WORDS,dtype=object)[rng.integers(0,len(WORDS),rows)]
+        elif d['value_labels']:
+            codes=np.array(list(d['value_labels']),dtype=np.int64)
+            values=codes[rng.integers(0,len(codes),rows)]
+            values[rng.random(rows)<0.05]=99
+            data[variable]=values
+        elif rng.random()<0.5:
+            data[variable]=rng.integers(0,10000,rows)
+        else:
+            data[variable]=np.round(rng.random(rows)*100,2)
+    return pd.DataFrame(data)
+
+
+def write_tab(fp,df):
+    "Writes a table as a UKDS .tab file"
+    df.to_csv(fp,sep='\t',index=False)
+
+
+def make_dataset(directory,
+                 rows=10000,
+                 variables=100,
+                 value_label_density=0.5,
+                 string_ratio=0.1,
+                 seed=0,
+                 name=None):
+    """Writes a synthetic .tab and .rtf pair, unless it already exists
+
+    :param directory str: the directory of the files
+    :param rows int: the number of rows
+    :param variables int: the number of variables
+    :param value_label_density float: see make_variables
+    :param string_ratio float: see make_variables
+    :param seed int: the random seed
+    :param name str: the file name stem. If None, this is made from the
+        arguments, so each configuration is generated once.
+
+    :return result: the filepaths of the .tab and the .rtf file
+    :rtype tuple:
+
+    """
+    if name is None:
+        name='synthetic_%s_%s_%s_%s_%s' % (rows,variables,value_label_density,string_ratio,seed)
+    fp_tab=os.path.join(directory,name+'.tab')
+    fp_rtf=os.path.join(directory,name+'_ukda_data_dictionary.rtf')
+    if not (os.path.exists(fp_tab) and os.path.exists(fp_rtf)):
+        os.makedirs(directory,exist_ok=True)
+        variable_dicts=make_variables(variables,value_label_density,string_ratio,seed=seed)
+        write_tab(fp_tab,make_table(variable_dicts,rows,seed=seed))
+        write_rtf(fp_rtf,variable_dicts,name=name,rows=rows)
+    return fp_tab,fp_rtf
+
+
+def make_diary_variables(slots=144,activities=30,seed=0):
+    """Returns the variable dictionaries of a synthetic time-use diary
+
+    The diary has 'serial' and 'pnum' identifiers and the slot families
+    'act1_001' to 'act1_<slots>' of activity codes and 'wher_001' to
+    'wher_<slots>' of location codes, as in the UKTUS diary table.
+
+    :param slots int: the number of slots of each family
+    :param activities int: the number of activity codes
+    :param seed int: the random seed
+
+    :return result: dictionaries as given by DataDictionary.variable_dicts
+    :rtype list:
+
+    """
+    result=[]
+    def add(variable,label,level='SCALE',value_labels=None):
+        result.append({'pos':str(len(result)+1),
+                       'variable':variable,
+                       'variable_label':label,
+                       'variable_type':'numeric',
+                       'SPSS_measurement_level':level,
+                       'SPSS_user_missing_values':{},
+                       'value_labels':value_labels or {}})
+    add('serial','Household number')
+    add('pnum','Person number')
+    act=dict([(-9.0,'Missing')]+[(float(100+10*k),'Activity %s' % k) for k in range(activities)])
+    wher=dict([(-9.0,'Missing')]+[(float(k),'Location %s' % k) for k in range(10,20)])
+    for stem,label,value_labels in [('act1','Activity',act),('wher','Location',wher)]:
+        for i in range(1,slots+1):
+            add('%s_%03d' % (stem,i),'%s in slot %s' % (label,i),'NOMINAL',value_labels)
+    return result
+
+
+def make_diary(directory,rows=10000,slots=144,seed=0):
+    """Writes a synthetic diary .tab and .rtf pair, unless it already exists
+
+    Each slot takes the code of the slot before it, or a new code with
+    probability 0.2, so runs of the same activity are common.
+
+    :param directory str: the directory of the files
+    :param rows int: the number of diary rows
+    :param slots int: the number of slots of each family
+    :param seed int: the random seed
+
+    :return result: the filepaths of the .tab and the .rtf file
+    :rtype tuple:
+
+    """
+    name='diary_%s_%s_%s' % (rows,slots,seed)
+    fp_tab=os.path.join(directory,name+'.tab')
+    fp_rtf=os.path.join(directory,name+'_ukda_data_dictionary.rtf')
+    if not (os.path.exists(fp_tab) and os.path.exists(fp_rtf)):
+        os.makedirs(directory,exist_ok=True)
+        rng=np.random.default_rng(seed)
+        variable_dicts=make_diary_variables(slots,seed=seed)
+        data={'serial':np.repeat(np.arange(11010000,11010000+(rows+1)//2),2)[:rows],
+              'pnum':np.tile([1,2],(rows+1)//2)[:rows]}
+        for d in variable_dicts[2::slots]:
+            stem=d['variable'].rsplit('_',1)[0]
+            codes=np.array(list(d['value_labels']),dtype=np.int64)
+            values=codes[rng.integers(0,len(codes),rows)]
+            for i in range(1,slots+1):
+                change=rng.random(rows)<0.2
+                values=np.where(change,codes[rng.integers(0,len(codes),rows)],values)
+                data['%s_%03d' % (stem,i)]=values
+        write_tab(fp_tab,pd.DataFrame(data))
+        write_rtf(fp_rtf,variable_dicts,name=name,rows=rows)
+    return fp_tab,fp_rtf
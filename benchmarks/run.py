@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""Runs the benchmarks, timing each one and recording its peak memory.
+
+    python benchmarks/run.py --rows 100000 --variables 300 --json results.json
+    python benchmarks/run.py --compare results.json --threshold 1.25
+
+Each benchmark is run 'repeat' times and the fastest time is kept. It is
+then run once more under tracemalloc for the peak memory allocated by
+python and numpy. With --compare the results are checked against a
+previous --json file and the exit status is 1 if any time or peak memory
+grew by more than the threshold ratio, so the script can gate CI. The
+comparison is refused, with exit status 1, if the earlier run used a
+different dataset configuration.
+
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENVIRONMENT={'rows':'UKDS_BENCH_ROWS',
+             'variables':'UKDS_BENCH_VARIABLES',
+             'value_label_density':'UKDS_BENCH_VALUE_LABEL_DENSITY',
+             'string_ratio':'UKDS_BENCH_STRING_RATIO',
+             'seed':'UKDS_BENCH_SEED',
+             'directory':'UKDS_BENCH_DIR'}
+
+
+def iter_benchmarks(module,keyword=None):
+    "Yields the (name, class, method name) of each benchmark of a module"
+    for class_name in sorted(x for x in dir(module) if x.endswith('Suite')):
+        cls=getattr(module,class_name)
+        for method_name in sorted(x for x in dir(cls) if x.startswith('time_')):
+            name='%s.%s' % (class_name,method_name)
+            if keyword is None or keyword in name:
+                yield name,cls,method_name
+
+
+def measure(cls,method_name,repeat=3):
+    """Runs a benchmark
+
+    :return result: a dictionary with the 'times' in seconds, the 'best'
+        and 'median' times and the 'peak' memory in bytes
+    :rtype dict:
+
+    """
+    suite=cls()
+    if hasattr(suite,'setup'): suite.setup()
+    try:
+        f=getattr(suite,method_name)
+        times=[]
+        for i in range(repeat):
+            gc.collect()
+            start=time.perf_counter()
+            f()
+            times.append(time.perf_counter()-start)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            f()
+            peak=tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    finally:
+        if hasattr(suite,'teardown'): suite.teardown()
+    return {'times':times,
+            'best':min(times),
+            'median':statistics.median(times),
+            'peak':peak}
+
+
+def compare(results,baseline,threshold):
+    """Returns the benchmarks which are slower or use more memory than the baseline
+
+    :param results dict: the benchmark results, by name
+    :param baseline dict: the results of an earlier run, by name
+    :param threshold float: the largest ratio of new to old which passes
+
+    :return result: a list of (name, measure, ratio) tuples
+    :rtype list:
+
+    """
+    result=[]
+    for name,r in results.items():
+        if name not in baseline: continue
+        for key in ('best','peak'):
+            old=baseline[name][key]
+            if old and r[key]/old>threshold:
+                result.append((name,key,r[key]/old))
+    return result
+
+
+def config_differences(config,baseline_config):
+    """Returns the dataset settings which differ between two runs
+
+    :param config dict: the dataset configuration of this run
+    :param baseline_config dict: that of the earlier run
+
+    :return result: a list of (name, this value, earlier value) tuples
+    :rtype list:
+
+    """
+    names=sorted(set(config)|set(baseline_config or {}))
+    return [(name,config.get(name),(baseline_config or {}).get(name)) for name in names
+            if config.get(name)!=(baseline_config or {}).get(name)]
+
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description='Runs the ukds benchmarks on synthetic data')
+    parser.add_argument('--rows',type=int)
+    parser.add_argument('--variables',type=int)
+    parser.add_argument('--value-label-density',type=float)
+    parser.add_argument('--string-ratio',type=float)
+    parser.add_argument('--seed',type=int)
+    parser.add_argument('--directory',help='where the synthetic files are kept')
+    parser.add_argument('--repeat',type=int,default=3)
+    parser.add_argument('-k',dest='keyword',help='only run the benchmarks whose name contains this')
+    parser.add_argument('--json',help='write the results to this file')
+    parser.add_argument('--compare',help='a results file of an earlier run')
+    parser.add_argument('--threshold',type=float,default=1.25)
+    args=parser.parse_args(argv)
+
+    for key,variable in ENVIRONMENT.items():
+        value=getattr(args,key)
+        if value is not None: os.environ[variable]=str(value)
+
+    import benchmarks
+
+    print('dataset: %s' % ', '.join('%s=%s' % x for x in benchmarks.config().items()))
+    benchmarks.dataset()
+
+    results={}
+    failed=[]
+    for name,cls,method_name in iter_benchmarks(benchmarks,args.keyword):
+        try:
+            r=results[name]=measure(cls,method_name,args.repeat)
+        except Exception as err:
+            failed.append(name)
+            print('%-60s failed: %r' % (name,err))
+            continue
+        print('%-60s %10.4f s %10.4f s %10.1f MB' % (name,r['best'],r['median'],r['peak']/1e6))
+
+    if args.json:
+        with open(args.json,'w') as f:
+            json.dump({'config':benchmarks.config(),'results':results},f,indent=1)
+
+    status=1 if failed else 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline=json.load(f)
+        differences=config_differences(benchmarks.config(),baseline.get('config'))
+        if differences:
+            # the ratios of runs on different datasets mean nothing
+            for name,value,old in differences:
+                print('not compared: %s is %s, but %s in %s' % (name,value,old,args.compare))
+            return 1
+        for name,key,ratio in compare(results,baseline['results'],args.threshold):
+            print('regression: %s %s x%.2f' % (name,key,ratio))
+            status=1
+    return status
+
+
+if __name__=='__main__':
+
+    sys.exit(main())
@@ -22,4 +22,14 @@ setup(
         "Operating System :: OS Independent",
     ],
     python_requires='>=3.6',
+    install_requires=['numpy',
+                      'pandas',
+                      ],
+    # the RDF exporters also need fairly.CreateRDF, from the building-energy
+    # fairly package, which is installed separately: the 'fairly' package
+    # on PyPI is a different project
+    extras_require={'rdf':['rdflib'],
+                    'upload':['requests'],
+                    'columnar':['pyarrow'],
+                    },
     )
@@ -1,4 +1,35 @@
 # -*- coding: utf-8 -*-
+"""A Python package for working with datasets from the UK Data Service (UKDS).
 
-from .data_dictionary import DataDictionary
-from .data_table import DataTable
+The classes and submodules are imported on first use, so 'import ukds' is
+fast and the RDF dependencies are only loaded by the RDF exporters.
+
+"""
+
+import importlib
+
+__all__=['DataDictionary','DataTable','LinkedTables','Study']
+
+_CLASSES={'DataDictionary':'.data_dictionary',
+          'DataTable':'.data_table',
+          'LinkedTables':'.linked',
+          'Study':'.study'}
+
+_SUBMODULES=('archive','cache','columnar','data_dictionary','data_table',
+             'decoding','diary','graph','lazy','linked','parallel','rtf','serializer','sinks',
+             'study','tab','terms','upload')
+
+
+def __getattr__(name):
+    if name in _CLASSES:
+        value=getattr(importlib.import_module(_CLASSES[name],__name__),name)
+    elif name in _SUBMODULES:
+        value=importlib.import_module('.'+name,__name__)
+    else:
+        raise AttributeError("module '%s' has no attribute '%s'" % (__name__,name))
+    globals()[name]=value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals())|set(_CLASSES)|set(_SUBMODULES))
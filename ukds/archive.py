@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Reading UKDS files from inside zip archives, without extracting them.
+
+A filepath can run through a zip archive, as if the archive were a
+directory:
+
+    dt=ukds.DataTable(fp_tab=r'.../8128tab.zip/UKDA-8128-tab/tab/uktus15_household.tab',
+                      fp_dd=r'.../8128tab.zip/UKDA-8128-tab/mrdoc/allissue/uktus15_household_ukda_data_dictionary.rtf')
+
+A .tab member is streamed into the pandas parser as it is decompressed. A
+.rtf member is read into memory and parsed from bytes, as it cannot be
+memory-mapped. Ordinary filepaths are passed on unchanged.
+
+"""
+
+import contextlib
+import io
+import os
+import re
+import zipfile
+
+_ZIP_PATTERN=re.compile(r'\.zip(?=[\\/])',re.IGNORECASE)
+
+
+def split_path(fp):
+    """Splits a filepath which runs through a zip archive
+
+    :param fp str: a filepath, e.g. 'study.zip/tab/household.tab'
+
+    :return result: (archive filepath, member name), or None if fp is not
+        inside a zip archive
+    :rtype tuple:
+
+    """
+    if not isinstance(fp,str) or os.path.exists(fp):
+        return None
+    for m in _ZIP_PATTERN.finditer(fp):
+        archive=fp[:m.end()]
+        if os.path.isfile(archive):
+            return archive,fp[m.end()+1:].replace('\\','/')
+    return None
+
+
+def _open_member(archive,member):
+    "Opens a member of a zip archive for reading, as a binary file object"
+    with zipfile.ZipFile(archive) as z:
+        try:
+            # the archive file stays open until the member is closed
+            return z.open(member)
+        except KeyError:
+            raise FileNotFoundError('No file "%s" in the zip archive "%s"' % (member,archive))
+
+
+def open_file(fp,mode='rb',encoding=None):
+    """Opens a file for reading, which may be inside a zip archive
+
+    :param fp str: the filepath
+    :param mode str: 'rb' or 'r'
+    :param encoding str: the encoding in text mode
+
+    :rtype file object:
+
+    """
+    parts=split_path(fp)
+    if parts is None:
+        return open(fp,mode,encoding=encoding)
+    f=_open_member(*parts)
+    if 'b' in mode:
+        return f
+    return io.TextIOWrapper(f,encoding=encoding)
+
+
+def read_bytes(fp):
+    "Returns the contents of a file, which may be inside a zip archive"
+    with open_file(fp,'rb') as f:
+        return f.read()
+
+
+@contextlib.contextmanager
+def source(fp):
+    """Gives a filepath or file object for a parser such as pandas.read_csv
+
+    An ordinary filepath is given unchanged. A zip archive member is given
+    as an open file object, which is closed afterwards.
+
+    """
+    parts=split_path(fp)
+    if parts is None:
+        yield fp
+    else:
+        with _open_member(*parts) as f:
+            yield f
+
+
+def list_files(fp):
+    """Returns the filepaths of the files in a zip archive, or in a directory within it
+
+    :param fp str: the archive, e.g. 'study.zip', or a directory inside it,
+        e.g. 'study.zip/UKDA-8128-tab'
+
+    :return result: filepaths which run through the archive, e.g.
+        'study.zip/UKDA-8128-tab/tab/household.tab'
+    :rtype list:
+
+    """
+    if os.path.isfile(fp):
+        archive,prefix=fp,''
+    else:
+        parts=split_path(fp)
+        if parts is None:
+            raise FileNotFoundError('"%s" is not a zip archive or a directory within one' % fp)
+        archive,prefix=parts
+        prefix=prefix.rstrip('/')+'/'
+    with zipfile.ZipFile(archive) as z:
+        names=z.namelist()
+    return ['%s/%s' % (archive,name) for name in names
+            if name.startswith(prefix) and not name.endswith('/')]
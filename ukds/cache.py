@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""A persistent on-disk cache of parsed data dictionaries.
+
+Each entry holds the variable dictionaries of one .rtf file as a
+zlib-compressed pickle. Entries are keyed by a hash of the file contents,
+the encoding and the parser version, so a changed file or parser never
+returns stale results. The cache directory is kept below a size limit by
+removing the least recently used entries.
+
+Hashing the contents reads the whole file, so the key is also recorded
+in a small stat file named by the file's path, size and modification
+time (for a file inside a zip archive, its size and CRC). While these
+are unchanged, a warm start reads the stat file and the entry and not
+the .rtf file. A file rewritten with the same size within the
+resolution of the modification time is not detected, as with make.
+
+"""
+
+import os
+import hashlib
+import pickle
+import tempfile
+import zipfile
+import zlib
+
+from .archive import open_file, split_path
+
+# increase this when the output of ukds.rtf.iter_variable_dicts changes
+PARSER_VERSION='2'
+
+EXTENSION='.ukdd'
+
+STAT_EXTENSION='.ukstat'
+
+DEFAULT_MAX_BYTES=256*1024*1024
+
+
+def default_cache_dir():
+    """Returns the default cache directory
+
+    This is the UKDS_CACHE_DIR environment variable if set, otherwise
+    '~/.cache/ukds'.
+
+    """
+    return os.environ.get('UKDS_CACHE_DIR') or \
+        os.path.join(os.path.expanduser('~'),'.cache','ukds')
+
+
+def get_cache(cache):
+    """Returns a DataDictionaryCache instance from a 'cache' argument
+
+    :param cache: one of
+        - None or False: no cache is used and None is returned
+        - True: a DataDictionaryCache in the default directory
+        - str: a DataDictionaryCache in this directory
+        - DataDictionaryCache: returned as it is
+
+    :rtype DataDictionaryCache:
+
+    """
+    if cache is None or cache is False:
+        return None
+    elif cache is True:
+        return DataDictionaryCache()
+    elif isinstance(cache,str):
+        return DataDictionaryCache(cache)
+    else:
+        return cache
+
+
+class DataDictionaryCache():
+    """A size-bounded, least recently used cache of parsed data dictionaries
+    """
+
+    def __init__(self,directory=None,max_bytes=DEFAULT_MAX_BYTES):
+        """
+
+        :param directory str: the cache directory. If None, default_cache_dir() is used.
+        :param max_bytes int: the maximum total size of the cache files
+
+        """
+        self.directory=directory or default_cache_dir()
+        self.max_bytes=max_bytes
+
+
+    def key(self,fp,encoding=None):
+        """Returns the cache key for a .rtf file
+
+        The key recorded for the file's current stat signature is used if
+        there is one, otherwise the file is hashed and the key recorded.
+
+        :param fp str: a filepath to a UK Data Service .rtf data dictionary file
+        :param encoding str: the encoding used to read the file
+
+        :return key: a hex digest of the parser version, encoding and file contents
+        :rtype str:
+
+        """
+        header=('%s\n%s\n' % (PARSER_VERSION,encoding)).encode('ascii')
+        try:
+            fp_stat=self.stat_path(header,fp)
+        except (OSError,KeyError):
+            fp_stat=None
+        if fp_stat is not None:
+            try:
+                with open(fp_stat,'r',encoding='ascii') as f:
+                    key=f.read()
+                if len(key)==64:
+                    # mark as recently used, so it is evicted with its entry
+                    os.utime(fp_stat)
+                    return key
+            except (OSError,ValueError):
+                pass
+
+        h=hashlib.sha256()
+        h.update(header)
+        with open_file(fp,'rb') as f:
+            for chunk in iter(lambda: f.read(1024*1024),b''):
+                h.update(chunk)
+        key=h.hexdigest()
+
+        if fp_stat is not None:
+            try:
+                self._write(fp_stat,key.encode('ascii'))
+            except OSError:
+                pass
+        return key
+
+
+    def stat_path(self,header,fp):
+        """Returns the filepath of the stat file of a .rtf file
+
+        This is named by a hash of the header, the absolute path and the
+        size and modification time of the file, or the size and CRC of a
+        zip archive member.
+
+        :raises OSError: if the file does not exist
+
+        """
+        parts=split_path(fp)
+        if parts is None:
+            st=os.stat(fp)
+            signature='%s\n%s\n%s\n%s' % (os.path.abspath(fp),st.st_size,st.st_mtime_ns,st.st_ino)
+        else:
+            archive,member=parts
+            with zipfile.ZipFile(archive) as z:
+                info=z.getinfo(member)
+            signature='%s\n%s\n%s\n%s' % (os.path.abspath(archive),member,info.file_size,info.CRC)
+        h=hashlib.sha256(header)
+        h.update(signature.encode('UTF-8'))
+        return os.path.join(self.directory,h.hexdigest()+STAT_EXTENSION)
+
+
+    def path(self,key):
+        "Returns the filepath of a cache entry"
+        return os.path.join(self.directory,key+EXTENSION)
+
+
+    def get(self,key):
+        """Returns the variable dictionaries for a cache key
+
+        :param key str: the cache key
+
+        :return variable_dicts: the variable dictionaries, or None if there
+            is no valid entry for the key
+        :rtype list:
+
+        """
+        fp=self.path(key)
+        try:
+            with open(fp,'rb') as f:
+                data=f.read()
+            variable_dicts=pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            return None
+        except (OSError,zlib.error,pickle.UnpicklingError,EOFError,
+                AttributeError,ImportError,ValueError):
+            # a damaged entry, or a stale one which refers to classes which
+            # have moved, is treated as a miss and replaced on the next put
+            return None
+
+        # mark as recently used
+        try:
+            os.utime(fp)
+        except OSError:
+            pass
+
+        return variable_dicts
+
+
+    def put(self,key,variable_dicts):
+        """Stores the variable dictionaries for a cache key
+
+        The entry is written to a temporary file first and then renamed, so
+        concurrent readers never see a partial entry.
+
+        :param key str: the cache key
+        :param variable_dicts list: the variable dictionaries
+
+        """
+        data=zlib.compress(pickle.dumps(list(variable_dicts),
+                                        protocol=pickle.HIGHEST_PROTOCOL))
+        self._write(self.path(key),data)
+        self.evict()
+
+
+    def _write(self,fp,data):
+        "Writes a file in the cache directory through a temporary file and a rename"
+        os.makedirs(self.directory,exist_ok=True)
+        fd,fp_tmp=tempfile.mkstemp(dir=self.directory,suffix='.tmp')
+        try:
+            with os.fdopen(fd,'wb') as f:
+                f.write(data)
+            os.replace(fp_tmp,fp)
+        except BaseException:
+            if os.path.exists(fp_tmp): os.remove(fp_tmp)
+            raise
+
+
+    def entries(self):
+        """Returns the cache entries and stat files, least recently used first
+
+        :return entries: a list of (filepath, size, mtime) tuples
+        :rtype list:
+
+        """
+        result=[]
+        try:
+            it=os.scandir(self.directory)
+        except FileNotFoundError:
+            return result
+        with it:
+            for entry in it:
+                if entry.name.endswith((EXTENSION,STAT_EXTENSION)):
+                    try:
+                        st=entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    result.append((entry.path,st.st_size,st.st_mtime))
+        result.sort(key=lambda x: x[2])
+        return result
+
+
+    def evict(self):
+        "Removes the least recently used entries and stat files until the cache is within max_bytes"
+        entries=self.entries()
+        total=sum(x[1] for x in entries)
+        for fp,size,mtime in entries:
+            if total<=self.max_bytes: break
+            try:
+                os.remove(fp)
+            except FileNotFoundError:
+                pass
+            total-=size
+
+
+    def clear(self):
+        "Removes all entries and stat files from the cache"
+        try:
+            names=os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.endswith((EXTENSION,STAT_EXTENSION)):
+                try:
+                    os.remove(os.path.join(self.directory,name))
+                except FileNotFoundError:
+                    pass
+
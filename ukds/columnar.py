@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Conversion of decoded UKDS tables to and from columnar files.
+
+Tables are written as Parquet or Arrow IPC (Feather v2) files using pyarrow.
+The variable information of each column is stored in the field metadata and
+the whole data dictionary in the schema metadata, so a DataTable and its
+DataDictionary can be rebuilt from the file alone. Arrow IPC files are
+written uncompressed so they can be memory-mapped without copying.
+
+"""
+
+import json
+import os
+
+import pandas as pd
+
+PARQUET='parquet'
+ARROW='arrow'
+
+EXTENSIONS={'.parquet':PARQUET,
+            '.pq':PARQUET,
+            '.arrow':ARROW,
+            '.feather':ARROW,
+            '.ipc':ARROW}
+
+DATADICTIONARY_KEY=b'ukds.datadictionary'
+
+FIELD_KEYS=['pos',
+            'variable_label',
+            'variable_type',
+            'SPSS_measurement_level',
+            'SPSS_user_missing_values',
+            'value_labels']
+
+
+def _import_pyarrow():
+    "Imports pyarrow, which is an optional dependency"
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.feather
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError('pyarrow is needed to read and write Parquet and Arrow files: '
+                          'pip install pyarrow')
+    return pyarrow
+
+
+def get_format(fp,format=None):
+    """Returns the file format, from the format argument or the file extension
+
+    :param fp str: the filepath
+    :param format str: 'parquet', 'arrow' or None
+
+    :rtype str:
+
+    """
+    if format:
+        format=format.lower()
+        if format=='feather': format=ARROW
+    else:
+        format=EXTENSIONS.get(os.path.splitext(fp)[1].lower())
+    if format not in (PARQUET,ARROW):
+        raise ValueError('Unknown columnar format for "%s", use format="parquet" or "arrow"' % fp)
+    return format
+
+
+def variable_dict_to_json(d):
+    "Returns a JSON-serializable copy of a variable dictionary"
+    d=dict(d)
+    d['value_labels']=[[k,v] for k,v in d['value_labels'].items()] \
+        if d['value_labels'] else {}
+    return d
+
+
+def variable_dict_from_json(d):
+    "Returns a variable dictionary from variable_dict_to_json"
+    d=dict(d)
+    d['value_labels']={float(k):v for k,v in d['value_labels']} \
+        if d['value_labels'] else {}
+    return d
+
+
+def _arrow_compatible(df):
+    """Returns df with categorical columns that pyarrow can convert
+
+    Decoded columns can mix string labels with uncoded numeric values, so
+    the categories of these columns are converted to strings.
+
+    """
+    data={}
+    for i,col in enumerate(df.columns):
+        s=df.iloc[:,i]
+        if isinstance(s.dtype,pd.CategoricalDtype) and \
+                s.cat.categories.inferred_type not in ('string','empty'):
+            categories=s.cat.categories.astype(str)
+            if categories.is_unique:
+                s=s.cat.rename_categories(categories)
+            else:
+                s=s.astype(str).astype('category')
+        data[i]=s
+    result=pd.DataFrame(data,index=df.index)
+    result.columns=df.columns
+    return result
+
+
+def _extend_categories(df,categories):
+    """Sets the categories of each categorical column to those seen so far
+
+    The categories of a column only ever grow, in the order they are first
+    seen, so the dictionaries of successive batches are deltas of each other.
+
+    :param categories dict: column name to pandas.Index of categories, updated in place
+
+    """
+    for col in df.columns:
+        s=df[col]
+        if not isinstance(s.dtype,pd.CategoricalDtype): continue
+        previous=categories.get(col)
+        if previous is not None:
+            merged=previous.append(s.cat.categories.difference(previous,sort=False))
+            df[col]=s.cat.set_categories(merged)
+        else:
+            merged=s.cat.categories
+        categories[col]=merged
+    return df
+
+
+def to_arrow_table(df,catalogue,preserve_index=None,categories=None):
+    """Returns a pyarrow.Table of a decoded table, with the variable information as metadata
+
+    :param df pandas.DataFrame: a decoded table with variable names as column names
+    :param catalogue ukds.data_dictionary.VariableCatalogue: the variables
+    :param preserve_index bool: passed to pyarrow.Table.from_pandas
+    :param categories dict: for a series of batches, a dictionary which holds
+        the categories of each column so far. It is updated in place.
+
+    :rtype pyarrow.Table:
+
+    """
+    pa=_import_pyarrow()
+    df=_arrow_compatible(df)
+    if categories is not None:
+        df=_extend_categories(df,categories)
+    table=pa.Table.from_pandas(df,preserve_index=preserve_index)
+
+    fields=[]
+    for field in table.schema:
+        if pa.types.is_dictionary(field.type):
+            # the same type for every batch, whatever the number of categories
+            field=field.with_type(pa.dictionary(pa.int32(),field.type.value_type))
+        if field.name in catalogue:
+            d=variable_dict_to_json(catalogue.by_name(field.name))
+            metadata={k:json.dumps(d[k]) for k in FIELD_KEYS}
+            field=field.with_metadata(metadata)
+        fields.append(field)
+    metadata=dict(table.schema.metadata or {})
+    metadata[DATADICTIONARY_KEY]=json.dumps([variable_dict_to_json(d) for d in catalogue])
+    return table.cast(pa.schema(fields,metadata=metadata))
+
+
+def write(fp,tables,format,compression=None):
+    """Writes one or more pyarrow.Table instances with the same schema to a file
+
+    :param fp str: the filepath
+    :param tables iterable: the tables, written in turn as row groups or 
+        record batches. For Arrow files the categories of each batch must 
+        extend those of the previous batches, see to_arrow_table.
+    :param format str: 'parquet' or 'arrow'
+    :param compression str: the compression. Defaults to 'snappy' for Parquet
+        and 'uncompressed' for Arrow, which allows zero-copy memory mapping.
+
+    """
+    pa=_import_pyarrow()
+    writer=None
+    schema=None
+    try:
+        for table in tables:
+            if writer is None:
+                schema=table.schema
+                if format==PARQUET:
+                    writer=pa.parquet.ParquetWriter(fp,schema,
+                                                    compression=compression or 'snappy')
+                else:
+                    options=pa.ipc.IpcWriteOptions(
+                        compression=None if compression in (None,'uncompressed') else compression,
+                        emit_dictionary_deltas=True)
+                    writer=pa.ipc.new_file(fp,schema,options=options)
+            writer.write_table(table.cast(schema))
+    finally:
+        if writer is not None: writer.close()
+    if writer is None:
+        raise ValueError('No tables to write to "%s"' % fp)
+
+
+def read(fp,format=None,columns=None,memory_map=True):
+    """Reads a columnar file written by write
+
+    :param fp str: the filepath
+    :param format str: 'parquet', 'arrow' or None to use the file extension
+    :param columns list: the column names to read. If None, all columns are read.
+    :param memory_map bool: if True, the file is memory-mapped. Uncompressed
+        Arrow files are then read without copying.
+
+    :return result: (table, variable_dicts) where table is a pyarrow.Table and
+        variable_dicts is the list of variable dictionaries, or None if the
+        file has no data dictionary metadata
+    :rtype tuple:
+
+    """
+    pa=_import_pyarrow()
+    format=get_format(fp,format)
+    if format==PARQUET:
+        table=pa.parquet.read_table(fp,columns=columns,memory_map=memory_map)
+    else:
+        table=pa.feather.read_table(fp,columns=columns,memory_map=memory_map)
+
+    metadata=table.schema.metadata or {}
+    if DATADICTIONARY_KEY in metadata:
+        variable_dicts=[variable_dict_from_json(d)
+                        for d in json.loads(metadata[DATADICTIONARY_KEY])]
+    else:
+        variable_dicts=None
+    return table,variable_dicts
+
@@ -3,22 +3,263 @@
 #import rdflib
 #from rdflib.namespace import RDF
 import os
-import fairly
+import mmap
+from .rtf import iter_variable_dicts
+from .cache import get_cache
+from .archive import split_path, read_bytes
+from .terms import TermFactory
+from .lazy import LazyModule
+
+# imported by the first RDF exporter called, see ukds.lazy
+fairly=LazyModule('fairly')
+
+
+class VariableCatalogue(): 
+    """An immutable, indexed collection of the variables in a data dictionary
+    
+    The variable dictionaries are held in file order, with an index by 
+    variable name and an index by 'pos' so that lookups are O(1).
+    
+    """
+    
+    __slots__=('_variables','_name_index','_pos_index')
+    
+    def __init__(self,variable_dicts):
+        """
+        
+        Arguments:
+            variable_dicts (iterable): the variable dictionaries, in file order
+        
+        """
+        variables=tuple(variable_dicts)
+        name_index={}
+        pos_index={}
+        for i,d in enumerate(variables):
+            # the first occurrence of a name wins, as in a linear scan
+            name_index.setdefault(d['variable'],i)
+            pos_index.setdefault(str(d['pos']),i)
+        object.__setattr__(self,'_variables',variables)
+        object.__setattr__(self,'_name_index',name_index)
+        object.__setattr__(self,'_pos_index',pos_index)
+        
+        
+    def __setattr__(self,name,value):
+        raise AttributeError('VariableCatalogue is immutable')
+    
+    def __reduce__(self):
+        # rebuilt from the variables, as __setattr__ blocks the default unpickling
+        return (VariableCatalogue,(self._variables,))
+        
+    def __len__(self):
+        return len(self._variables)
+    
+    def __iter__(self):
+        return iter(self._variables)
+    
+    def __contains__(self,variable):
+        return variable in self._name_index
+    
+    def __getitem__(self,variable):
+        return self.by_name(variable)
+        
+    
+    @property
+    def names(self):
+        "A tuple of the variable names in file order"
+        return tuple(d['variable'] for d in self._variables)
+    
+    
+    def index(self,variable):
+        """Returns the position of a variable in the catalogue
+        
+        Arguments:
+            - variable (str): the name of the variable
+            
+        Returns:
+            - (int): the zero-based position in file order
+        
+        """
+        try:
+            return self._name_index[variable]
+        except KeyError:
+            raise KeyError('Variable "%s" is not in the data dictionary' % variable)
+    
+    
+    def by_name(self,variable):
+        """Returns the dictionary for a variable name
+        
+        Arguments:
+            - variable (str): the name of the variable
+        
+        """
+        return self._variables[self.index(variable)]
+    
+    
+    def by_pos(self,pos):
+        """Returns the dictionary for a 'pos' value
+        
+        Arguments:
+            - pos (str or int): the 'pos' value of the variable, e.g. '1' or 1
+        
+        """
+        try:
+            return self._variables[self._pos_index[str(pos)]]
+        except KeyError:
+            raise KeyError('Pos. "%s" is not in the data dictionary' % pos)
+    
 
 class DataDictionary(): 
     """A class for reading a UK Data Service .rtf data dictionary file
+    
+    The .rtf file is parsed once, on first use, into a VariableCatalogue 
+    and all the accessor methods answer from this.
+    
     """
     
-    def __init__(self,fp=None):
+    def __init__(self,fp=None,memory_map=False,cache=None):
         """
         
         Arguments:
             fp (str): a filepath to a UK Data Service .rtf data dictionary file
+            memory_map (bool): if True, the file is memory-mapped and parsed 
+                without being read into memory, see read_rtf
+            cache (bool, str or ukds.cache.DataDictionaryCache): a cache of 
+                parsed data dictionaries, see read_rtf
         
         """
+        self._rtf=None
+        self._catalogue=None
+        if fp: self.read_rtf(fp,memory_map=memory_map,cache=cache)
+
+
+    @classmethod
+    def from_variable_dicts(cls,variable_dicts):
+        """Returns a DataDictionary for a list of variable dictionaries, without a .rtf file
+        
+        Arguments:
+            variable_dicts (iterable): the variable dictionaries, in file order
+        
+        Returns:
+            - (DataDictionary)
         
-        if fp: self.read_rtf(fp)
+        """
+        dd=cls()
+        dd._catalogue=VariableCatalogue(variable_dicts)
+        return dd
+    
+    
+    @property
+    def rtf(self):
+        "The raw contents of the .rtf file"
+        return self._rtf
+    
+    @rtf.setter
+    def rtf(self,value):
+        self._rtf=value
+        self._catalogue=None
+        
+        
+    @property
+    def catalogue(self):
+        "The VariableCatalogue, parsed from the .rtf contents on first access"
+        if self._catalogue is None:
+            self._catalogue=VariableCatalogue(iter_variable_dicts(self.rtf))
+        return self._catalogue
+    
+    
+    @property
+    def decoder(self):
+        "A ValueLabelDecoder for the catalogue, built once and reused"
+        catalogue=self.catalogue
+        if getattr(self,'_decoder',None) is None or self._decoder.catalogue is not catalogue:
+            from .decoding import ValueLabelDecoder
+            self._decoder=ValueLabelDecoder(catalogue)
+        return self._decoder
+
 
+    def term_factory(self,base_prefix):
+        """Returns the TermFactory for a base prefix, created once and reused
+
+        Arguments:
+            base_prefix (str): the base prefix of the uris, e.g. 'eg'
+
+        Returns:
+            - (ukds.terms.TermFactory)
+
+        """
+        if getattr(self,'_term_factories',None) is None:
+            self._term_factories={}
+        if base_prefix not in self._term_factories:
+            self._term_factories[base_prefix]=TermFactory(base_prefix)
+        return self._term_factories[base_prefix]
+
+
+    def read_rtf(self,fp,memory_map=False,encoding=None,cache=None):
+        """Reads a UK Data Service .rtf data dictionary file and creates the 'variable_list' attribute
+        
+        By default the contents of the file are stored in the 'rtf' attribute
+        and parsed on first use.
+        
+        If memory_map is True the file is memory-mapped and parsed straight 
+        from the mapped bytes. Only the variable information is kept, so the 
+        'rtf' attribute is None afterwards.
+        
+        If a cache is given, the parsed variable information is looked up by 
+        a hash of the file contents and stored there after a parse. On a 
+        cache hit the file is not parsed and the 'rtf' attribute is None.
+            
+        The file can be inside a zip archive, e.g. 
+        '.../8128tab.zip/UKDA-8128-tab/mrdoc/allissue/..._ukda_data_dictionary.rtf',
+        see ukds.archive. It is then read from the archive without being 
+        extracted.
+            
+        Arguments:
+            fp (str): a filepath to a UK Data Service .rtf data dictionary file
+            memory_map (bool): if True, the file is memory-mapped and parsed 
+                immediately
+            encoding (str): the file encoding. Defaults to "ANSI" when reading
+                the file as text and to "cp1252" (the ANSI code page of the 
+                UKDS files) when memory-mapping.
+            cache (bool, str or ukds.cache.DataDictionaryCache): the cache 
+                of parsed data dictionaries to use, see ukds.cache.get_cache
+    
+        """
+        encoding=encoding or ('cp1252' if memory_map else "ANSI")
+        
+        cache=get_cache(cache)
+        if cache:
+            key=cache.key(fp,encoding)
+            variable_dicts=cache.get(key)
+            if variable_dicts is not None:
+                self.rtf=None
+                self._catalogue=VariableCatalogue(variable_dicts)
+                return
+        
+        if split_path(fp):
+            # a zip archive member is read into memory, as it can not be mapped
+            data=read_bytes(fp)
+            if memory_map:
+                variable_dicts=list(iter_variable_dicts(data,encoding))
+                self.rtf=None
+                self._catalogue=VariableCatalogue(variable_dicts)
+            else:
+                self.rtf=data.decode(encoding)
+        elif memory_map:
+            with open(fp,'rb') as myfile:
+                if os.fstat(myfile.fileno()).st_size==0:
+                    variable_dicts=[]
+                else:
+                    with mmap.mmap(myfile.fileno(),0,access=mmap.ACCESS_READ) as m:
+                        variable_dicts=list(iter_variable_dicts(m,encoding))
+            self.rtf=None
+            self._catalogue=VariableCatalogue(variable_dicts)
+        else:
+            with open (fp, "r", encoding=encoding) as myfile:
+                self.rtf=myfile.read()
+        
+        if cache:
+            cache.put(key,self.catalogue)
+        
 
     def variable_dicts(self):
         """Returns a list which contains the information in a UK Data Service .rtf data dictionary file.
@@ -34,100 +275,7 @@ class DataDictionary():
                   'value_labels': ... }
         
         """
-        
-        def get_variable_text(rtf_file):
-            "Returns a list of variable_texts for each variable"
-            st='Pos. = '
-            return rtf_file.split(st)[1:]
-            
-        def get_variable_name(variable_text):
-            st='Variable = '
-            b=variable_text.split(st)[1]
-            return b[b.find(' ')+1:b.find('\t')]
-        
-        def find_pos(rtf):
-            a=rtf
-            b=a
-            return b[b.find(' ')+1:b.find('\t')]
-        
-        def find_variable_label(rtf):
-            try:
-                a=rtf
-                b=a.split('Variable label = ')[1]
-                return b[b.find(' ')+1:b.find('\\par')]
-            except IndexError:
-                return None
-        
-        def find_variable_type(rtf):
-            if not 'This variable is  ' in rtf: return ''
-            a=rtf
-            b=a.split('This variable is  ')[1]
-            i1=b.find(' ')+1
-            i2=i1+b[i1:].find('}')
-            return b[i1:i2]
-        
-        def find_SPSS_measurement_level(rtf):
-            if not 'the SPSS measurement level is ' in rtf: return ''
-            a=rtf
-            b=a.split('the SPSS measurement level is ')[1]
-            i1=b.find(' ')+1
-            i2=i1+b[i1:].find('\\par')
-            return b[i1:i2]
-        
-        def find_SPSS_user_missing_values(rtf):
-            if not 'SPSS user missing values = ' in rtf: return dict()
-            a=rtf
-            d=a.split('SPSS user missing values = ')
-            if len(d)<2: return None
-            e=d[1]
-            i1=e.find(' ')+1
-            i2=i1+e[i1:].find('\\par')
-            f=e[i1:i2]
-            g=f.split(' ')
-            i=' '.join([g[0],g[2],g[4]])
-            return i
-        
-        def find_value_labels(rtf):
-            if not 'Value = ' in rtf: return dict()
-            a=rtf
-            d=a.split('Value = ')[1:]
-            z={}
-            for e in d:
-                value=e[e.find(' ')+1:e.find('\t')]
-                value=float(value)
-                f=e.split('Label = ')[1]
-                label=f[f.find(' ')+1:f.find('\\par')]
-                z[value]=label
-            #print(z)
-            return z
-        
-        variable_texts=get_variable_text(self.rtf)
-        #pprint(variable_texts[0:2])
-        
-        result=[]
-        for variable_text in variable_texts:
-            d={'pos':find_pos(variable_text),
-               'variable':get_variable_name(variable_text),
-                'variable_label':find_variable_label(variable_text),
-                'variable_type':find_variable_type(variable_text),
-                'SPSS_measurement_level':find_SPSS_measurement_level(variable_text),
-                'SPSS_user_missing_values':find_SPSS_user_missing_values(variable_text),
-                'value_labels':find_value_labels(variable_text)                 
-                }
-            result.append(d)
-            
-        return result        
-        
-
-    def read_rtf(self,fp):
-        """Reads a UK Data Service .rtf data dictionary file and creates the 'variable_list' attribute
-            
-        Arguments:
-            fp (str): a filepath to a UK Data Service .rtf data dictionary file
-    
-        """
-        with open (fp, "r", encoding="ANSI") as myfile:
-            self.rtf=myfile.read()
+        return list(self.catalogue)
         
 
     def variable_dict(self,variable):
@@ -147,7 +295,7 @@ class DataDictionary():
                   'value_labels': ... }
         
         """
-        return [x for x in self.variable_dicts() if x['variable']==variable][0]
+        return self.catalogue.by_name(variable)
 
 
     def variable_names(self):
@@ -158,31 +306,78 @@ class DataDictionary():
         
         """
         
-        return [x['variable'] for x in self.variable_dicts()]
+        return list(self.catalogue.names)
+    
+    
+    def dtypes(self,variables=None):
+        """Returns the pandas dtypes for the variables, for use in reading a .tab file
+        
+        - NOMINAL variables with value labels are 'category'
+        - string variables are str
+        - other numeric variables whose value labels are all whole numbers 
+          are 'int64', as their values are integer codes
+        - other variables are 'float64', which can be downcast after reading
+        
+        Arguments:
+            - variables (list): the variable names. If None, all variables are included.
+        
+        Returns:
+            - (dict): a dictionary of variable name to dtype
+        
+        """
+        result={}
+        for d in self.catalogue:
+            if variables is not None and d['variable'] not in variables: continue
+            if d['SPSS_measurement_level']=='NOMINAL' and d['value_labels']:
+                result[d['variable']]='category'
+            elif d['variable_type']=='string':
+                result[d['variable']]=str
+            elif d['value_labels'] and all(float(k).is_integer() for k in d['value_labels']):
+                result[d['variable']]='int64'
+            else:
+                result[d['variable']]='float64'
+        return result
+    
+    
+    # names used in the README and in earlier versions of the package
+    get_variable_dict=variable_dict
+    get_variable_names=variable_names
+    get_variable_list=variable_dicts
+    
+    @property
+    def variable_list(self):
+        "A list of the variable dictionaries"
+        return self.variable_dicts()
 
 #############
      
     def to_bso_variable(self,
                        base_prefix,
                        base_uri,
-                       variable):
+                       variable,
+                       createRDF=None):
         """Returns a CreateRDF instance with variable info as bso rdf.
+        
+        If createRDF is given, the triples are added to this instance.
         """
-        c=fairly.CreateRDF()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_prefix(base_prefix,base_uri)
         
         d=self.variable_dict(variable)
         #print(d)
+        t=self.term_factory(base_prefix)
         
         # variable
-        variable_uri='%s:variable_%s' % (base_prefix,variable)
+        variable_uri=t.variable(variable)
         c.add_subject_triples(variable_uri,[('a','bso:Variable'),
                                             ('rdfs:label','"%s"' % variable),
                                             ('rdfs:comment','"%s"' % d['variable_label'])
                                             ])
         
         #scale
-        scale_uri='%s:scale_%s' % (base_prefix,variable)
+        scale_uri=t.uri('scale',variable)
         
         if d['SPSS_measurement_level']=="NOMINAL":
             scale_class='bso:NominalScale'
@@ -194,24 +389,24 @@ class DataDictionary():
         # categories    
         if d['SPSS_measurement_level']=="NOMINAL":
             for k,v in d['value_labels'].items():
-                category_uri='%s:category_%s_%s' % (base_prefix,variable,k)
+                category_uri=t.uri('category',variable,k)
                 c.add_triple(scale_uri,'bso:category',category_uri)
-                concept_uri='%s:concept_%s_%s' % (base_prefix,variable,k)
+                concept_uri=t.concept(variable,k)
                 c.add_triple(category_uri,'bso:concept',concept_uri)
         
                 
         # codes
         for k,v in d['value_labels'].items():
-            code_uri='%s:code_%s_%s' % (base_prefix,variable,k)
+            code_uri=t.code(variable,k)
             c.add_triple(variable_uri,'bso:code',code_uri)
-            concept_uri='%s:concept_%s_%s' % (base_prefix,variable,k)
+            concept_uri=t.concept(variable,k)
             c.add_subject_triples(code_uri,[('a','bso:Code'),
                                             ('bso:notation',k),
                                             ('bso:concept',concept_uri)])
             
         # concepts
         for k,v in d['value_labels'].items():
-            concept_uri='%s:concept_%s_%s' % (base_prefix,variable,k)
+            concept_uri=t.concept(variable,k)
             c.add_subject_triples(concept_uri,[('rdfs:label','"%s"' % v)])
     
         return c
@@ -219,28 +414,38 @@ class DataDictionary():
     
     def to_bso(self,
                base_prefix,
-               base_uri):
+               base_uri,
+               sink=None,
+               createRDF=None):
+        """Returns a CreateRDF instance with all the variables as bso rdf.
         
-        c=fairly.CreateRDF()
-        c.add_prefix(base_prefix,base_uri)
+        If a ukds.sinks.Sink is given, the rdf of each variable is passed 
+        to the sink and the returned instance holds only the prefixes.
+        """
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_prefix(base_prefix,base_uri)
         
+        t=self.term_factory(base_prefix)
         
-        survey_uri='%s:survey' % base_prefix
+        survey_uri=t.uri('survey')
         c.add_triple(survey_uri,'a','bso:Survey')
         
-        sample_uri='%s:sample' % base_prefix
+        sample_uri=t.uri('sample')
         c.add_triple(sample_uri,'a','bso:Sample')
         c.add_triple(survey_uri,'bso:sample',sample_uri)
         
         for variable in self.variable_names():
             
-            variable_uri='%s:variable_%s' % (base_prefix,variable)
+            variable_uri=t.variable(variable)
             c.add_triple(survey_uri,'bso:variable',variable_uri)
             
-            c1=self.to_bso_variable(base_prefix,
-                                    base_uri,
-                                    variable)
-            c.rdf+=c1.rdf
+            self.to_bso_variable(base_prefix,
+                                 base_uri,
+                                 variable,
+                                 createRDF=c)
+            if sink is not None: sink.add(c)
         
         return c
     
@@ -257,25 +462,32 @@ class DataDictionary():
                          dimension_variables,
                          #dimension_property_uri,
                          #dimension_property_concept_uri,
+                         createRDF=None
                          ):
         """Converts the data dictionary to RDF Data Cube format
         
         :param base_prefix str: the base prefix for the data cube
         :param base_uri str: the base uri for the data cube
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
         
         :return data_cube:
         :rtype fairly.CreateRDF
         
         """
 
-        c=fairly.CreateRDF()
-        c.add_data_cube_prefixes()
-        c.add_skos_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_data_cube_prefixes()
+            c.add_skos_prefixes()
+            c.add_prefix(base_prefix,base_uri)
+        
+        t=self.term_factory(base_prefix)
         
-        dataset_uri='%s:dataset' % base_prefix
-        data_structure_definition_uri='%s:dsd' % base_prefix
-        slice_key_uri='%s:sk' % base_prefix
+        dataset_uri=t.uri('dataset')
+        data_structure_definition_uri=t.uri('dsd')
+        slice_key_uri=t.uri('sk')
         
         # add qb:DataSet
         c.add_data_cube_dataset(
@@ -308,7 +520,7 @@ class DataDictionary():
         
         # add qb:DimensionProperty
         for dimension_variable in dimension_variables:
-            dimension_property_uri='%s:dp-%s' % (base_prefix,dimension_variable)
+            dimension_property_uri=t.uri('dp',dimension_variable)
             c.add_data_cube_dimension_property(
                                    dimension_property_uri,
                                    label=None,
@@ -319,7 +531,7 @@ class DataDictionary():
                                    predicate_object_list=None)
             
             # add qb:ComponentSpecification - dimension
-            dimension_component_specification_uri='%s:dcs-%s' % (base_prefix,dimension_variable)
+            dimension_component_specification_uri=t.uri('dcs',dimension_variable)
             c.add_data_cube_dimension_component_specification(
                                                   dimension_component_specification_uri,
                                                   dimension_property_uri, 
@@ -336,7 +548,7 @@ class DataDictionary():
         for attribute in attributes:
             
             attribute_property_uri='<http://www.purl.org/berg/ukds/attribute_property/%s>' % (attribute)
-            attribute_component_specification_uri='%s:acs-%s' % (base_prefix,attribute)
+            attribute_component_specification_uri=t.uri('acs',attribute)
             
             # add qb:AttributeProperty
             c.add_data_cube_attribute_property(
@@ -378,8 +590,8 @@ class DataDictionary():
             SPSS_user_missing_values = var_dict['SPSS_user_missing_values']
             value_labels = var_dict['value_labels']
         
-            measure_property_uri='%s:mp-%s' % (base_prefix,variable) 
-            measure_component_specification_uri='%s:mcs-%s' % (base_prefix,variable) 
+            measure_property_uri=t.uri('mp',variable)
+            measure_component_specification_uri=t.uri('mcs',variable)
            
         
             # add qb:MeasureProperty
@@ -403,7 +615,7 @@ class DataDictionary():
         
             if value_labels:
         
-                concept_scheme_uri='%s:concept_scheme-%s' % (base_prefix,variable)
+                concept_scheme_uri=t.uri('concept_scheme',variable)
                 
                 # add codeList link to skos:ConceptScheme
                 c.add_triple(measure_property_uri, 'qb:codeList',concept_scheme_uri)
@@ -423,7 +635,7 @@ class DataDictionary():
                 
                 for value,label in value_labels.items():
                     
-                    concept_uri='%s:concept-%s-%s' % (base_prefix,variable,value)
+                    concept_uri=t.uri('cube_concept',variable,value)
                     
                     # add skos:hasTopConcept
                     c.add_triple(concept_scheme_uri, 'skos:hasTopConcept',concept_uri)
@@ -439,7 +651,7 @@ class DataDictionary():
                          )
         
             # add qb:Slice
-            slice_uri='%s:slice-%s' % (base_prefix,variable)
+            slice_uri=t.uri('slice',variable)
             dimension_list=[('qb:measureType',measure_property_uri)]
             predicate_object_list=[]
             predicate_object_list.append(('<http://www.purl.org/berg/ukds/attribute_property/pos>',pos))
@@ -470,7 +682,8 @@ class DataDictionary():
     def to_rdf_bdo_variable_set(self,
                                 base_prefix,
                                 base_uri,
-                                member_variables=None
+                                member_variables=None,
+                                createRDF=None
                                 ):
         """Creates the rdf for a bdo:VariableSet
         
@@ -479,21 +692,25 @@ class DataDictionary():
         :param member_variables list: list of variable names
             - member triples are added for each variable in the list
             - if None, then no member triples are added
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
           
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
 
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_skos_prefixes()
-        c.add_prefix(base_prefix,base_uri)
-        
-        variable_set_uri='%s:variable_set' % base_prefix
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_skos_prefixes()
+            c.add_prefix(base_prefix,base_uri)
+        
+        t=self.term_factory(base_prefix)
+        variable_set_uri=t.uri('variable_set')
         if member_variables:
-            member_uri_list=['%s:variable_%s' % (base_prefix,var_name) 
-                       for var_name in member_variables]
+            member_uri_list=[t.variable(var_name) for var_name in member_variables]
         else:
             member_uri_list=None
                             
@@ -512,7 +729,8 @@ class DataDictionary():
                    base_prefix,
                    base_uri,
                    variable_name,
-                   characteristic_uri='default'
+                   characteristic_uri='default',
+                   createRDF=None
                    ):
         """Creates the rdf for a bdo:Variable
         
@@ -521,22 +739,27 @@ class DataDictionary():
         :param variable_name str: the variable name
         :param characteristic_uri str: the characteristic uri
             - if None, then this is not added
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
           
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
         
         var_dict=self.get_variable_dict(variable_name)
         variable = var_dict['variable']
         variable_label = var_dict['variable_label']
                 
-        uri='%s:variable_%s' % (base_prefix,variable_name)
+        t=self.term_factory(base_prefix)
+        uri=t.variable(variable_name)
         if characteristic_uri=='default':
-            characteristic_uri='%s:characteristic_%s' % (base_prefix,variable_name)
+            characteristic_uri=t.uri('characteristic',variable_name)
         c.add_bdo_variable(
                          uri,
                          label='"%s"' % variable,
@@ -553,7 +776,8 @@ class DataDictionary():
                    base_uri,
                    variable_name,
                    add_category_set=False,
-                   add_categories=False
+                   add_categories=False,
+                   createRDF=None
                    ):
         """Creates the rdf for a bdo:Variable
         
@@ -562,23 +786,28 @@ class DataDictionary():
         :param variable_name str: the variable name
         :param add_category_set bool: if True, the bdo:CategorySet is added
         :param add_categories bool: if True, the categories are added        
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
           
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
         
         var_dict=self.get_variable_dict(variable_name)
         SPSS_measurement_level = var_dict['SPSS_measurement_level']
         value_labels = var_dict['value_labels']
         
         
-        uri='%s:characteristic_%s' % (base_prefix,variable_name)
+        t=self.term_factory(base_prefix)
+        uri=t.uri('characteristic',variable_name)
         if value_labels:
-            category_set_uri='%s:category_set_%s' % (base_prefix,variable_name)
+            category_set_uri=t.uri('category_set',variable_name)
         else:
             category_set_uri=None
         
@@ -606,12 +835,12 @@ class DataDictionary():
 
         if add_category_set:
             if category_set_uri:
-                result=self.to_rdf_bdo_category_set(base_prefix,
-                                                    base_uri,
-                                                    variable_name,
-                                                    add_categories=add_categories
-                                                    )
-                c.rdf+=result.rdf
+                self.to_rdf_bdo_category_set(base_prefix,
+                                             base_uri,
+                                             variable_name,
+                                             add_categories=add_categories,
+                                             createRDF=c
+                                             )
 
         return c
 
@@ -620,29 +849,34 @@ class DataDictionary():
                    base_prefix,
                    base_uri,
                    variable_name,
-                   add_categories=False
+                   add_categories=False,
+                   createRDF=None
                    ):
         """Creates the rdf for a bdo:CategorySet
         
         :param base_prefix str: the base prefix 
         :param base_uri str: the base uri 
         :param variable_name str: the variable name
-
+        :param add_categories bool: if True, the categories are added
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
           
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
         
         var_dict=self.get_variable_dict(variable_name)
         value_labels = var_dict['value_labels']
         
-        uri='%s:category_set_%s' % (base_prefix,variable_name)
-        member_uri_list=['%s:category_set_%s' % (base_prefix,x)
-                         for x in value_labels.keys()]
+        t=self.term_factory(base_prefix)
+        uri=t.uri('category_set',variable_name)
+        member_uri_list=[t.uri('category_set',x) for x in value_labels.keys()]
         
         c.add_bdo_category_set(
                              uri,
@@ -654,12 +888,12 @@ class DataDictionary():
 
         if add_categories:
             for value in value_labels.keys():
-                result=self.to_rdf_bdo_category(base_prefix,
-                                                base_uri,
-                                                variable_name,
-                                                value
-                                                )
-                c.rdf+=result.rdf
+                self.to_rdf_bdo_category(base_prefix,
+                                         base_uri,
+                                         variable_name,
+                                         value,
+                                         createRDF=c
+                                         )
 
         return c
     
@@ -668,7 +902,8 @@ class DataDictionary():
                    base_prefix,
                    base_uri,
                    variable_name,
-                   value
+                   value,
+                   createRDF=None
                    ):
         """Creates the rdf for a bdo:Category
         
@@ -676,20 +911,24 @@ class DataDictionary():
         :param base_uri str: the base uri 
         :param variable_name str: the variable name
         :param value float: the value of the value_label
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
                   
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
         
         var_dict=self.get_variable_dict(variable_name)
         value_labels = var_dict['value_labels']
         label=value_labels[value]
         
-        uri='%s:category_set_%s' % (base_prefix,value)
+        uri=self.term_factory(base_prefix).uri('category_set',value)
                                  
         c.add_bdo_category(
                          uri,
@@ -707,6 +946,43 @@ class DataDictionary():
     ################
 
 
+    def to_graph(self,
+                 method,
+                 base_prefix,
+                 base_uri,
+                 graph=None,
+                 store='default',
+                 **kwargs):
+        """Runs an RDF exporter straight into an rdflib Graph
+        
+        The bso exporters add their triples as rdflib terms, without
+        writing and parsing Turtle, e.g. dd.to_graph('to_bso','eg',
+        'http://example.com/'). The data cube and bdo exporters are built
+        by fairly and parsed into the graph in batches. See
+        ukds.graph.build_graph.
+        
+        Arguments:
+            method (str): the name of an exporter method
+            base_prefix (str): the base prefix
+            base_uri (str): the base uri
+            graph (rdflib.Graph): a graph to add to, if None a new graph
+            store (str): the rdflib store of a new graph, e.g. 'SimpleMemory'
+            **kwargs: the other arguments of the exporter method
+        
+        Returns:
+            (rdflib.Graph): the graph
+        
+        """
+        from .graph import build_graph
+        return build_graph(self,
+                           method,
+                           base_prefix,
+                           base_uri,
+                           graph=graph,
+                           store=store,
+                           **kwargs)
+    
+    
     def to_rdf(self,graph,prefix,uri):
         """Places the DataDictionary data in an rdflib Graph.
         
@@ -2,59 +2,363 @@
 
 import pandas as pd
 from .data_dictionary import DataDictionary
-import rdflib
+from .decoding import value_terms
+from .tab import read_tab, iter_tab, DEFAULT_CHUNKSIZE
+from . import columnar
+from . import serializer
+from .serializer import DEFAULT_BLOCKSIZE
+from .terms import TermFactory
+from .lazy import LazyModule
 import os
-import fairly
+
+# imported by the first RDF exporter called, see ukds.lazy
+fairly=LazyModule('fairly')
 
 
 class DataTable(): 
     """A class for reading a UK Data Service .tab data table file
     """
     
-    def __init__(self,fp_tab=None,fp_dd=None):
+    def __init__(self,fp_tab=None,fp_dd=None,dtypes=None,columns=None,where=None):
         """
         
         Arguments:
             fp_tab (str): a filepath to a UK Data Service .tab data table file
             fp_dd (str): a filepath to a UK Data Service data dictionary .rtf file
+            dtypes (bool or dict): the dtypes used to read the .tab file, 
+                see read_tab
+            columns (list): the variable names or patterns of the columns 
+                to read, see read_tab
+            where (function): a row predicate applied while reading, 
+                see read_tab
         
         """
-        if fp_tab: self.read_tab(fp_tab)
         if fp_dd: self.read_datadictionary(fp_dd)
+        if fp_tab: self.read_tab(fp_tab,dtypes=dtypes,columns=columns,where=where)
         
         
-    def read_tab(self,fp_tab):
+    def read_tab(self,fp_tab,dtypes=None,columns=None,where=None):
         """Reads in a .tab file
         
-        This stored as a DataFrame with columns of strings
+        This stored as a DataFrame in the 'tab' attribute. By default pandas
+        infers the column dtypes. 
+        
+        If dtypes is True, the dtypes are derived from the data dictionary, 
+        which must be read first: NOMINAL variables with value labels are read
+        as categoricals, string variables as strings and numeric variables
+        as the smallest integer or float type which holds their values.
+        
+        A selection of columns and rows can be read. This is applied by the 
+        parser, and get_dataframe and the RDF exporters then work on the 
+        selection. The row index is the row number in the file, so 
+        observation uris are the same as for the full table.
         
         Arguments:
-            fp_tab (str): a filepath to a UK Data Service .tab data table file
+            fp_tab (str): a filepath to a UK Data Service .tab data table file.
+                This can be inside a zip archive, e.g. 
+                '.../8128tab.zip/UKDA-8128-tab/tab/uktus15_household.tab', 
+                and is then streamed from the archive, see ukds.archive.
+            dtypes (bool or dict): if True, the dtypes are derived from the 
+                data dictionary. A dict of column name to dtype is used as 
+                it is, see ukds.tab.read_tab.
+            columns (list): the columns to read, as variable names, wildcard 
+                patterns such as 'act1_*' or compiled regular expressions.
+                If None, all columns are read.
+            where (function): a row predicate which takes a DataFrame and 
+                returns a boolean Series, e.g. lambda df: df['IMonth']==1.
+                It is applied to each chunk of rows as the file is read.
         
         """
-        self.tab=pd.read_csv(fp_tab,
-                             sep='\t',
-                             skipinitialspace=True,
-                             #dtype=str,
-                             low_memory=False,
-                             na_filter=False,
-                            )
+        if dtypes is True:
+            dtypes=self.datadictionary.dtypes()
+        self.fp_tab=fp_tab
+        self._read_tab_kwargs=dict(dtypes=dtypes,columns=columns,where=where)
+        self.tab=read_tab(fp_tab,dtypes=dtypes,columns=columns,where=where)
+        self.decoded=False
     
     
-    def read_datadictionary(self,fp_dd):
+    def iter_batches(self,
+                     fp_tab=None,
+                     batchsize=DEFAULT_CHUNKSIZE,
+                     dtypes=None,
+                     columns=None,
+                     where=None):
+        """Yields a .tab file as a series of DataTable instances of 'batchsize' rows
+        
+        Only one batch is held in memory at a time. Each batch shares the 
+        data dictionary of this DataTable and its 'tab' attribute holds the 
+        rows of the batch, indexed by their row number in the file. All the 
+        DataTable methods, such as get_dataframe and the RDF exporters, can 
+        be called on a batch.
+        
+        Arguments:
+            fp_tab (str): a filepath to a UK Data Service .tab data table file.
+                If None, the file last read by read_tab is used.
+            batchsize (int): the number of rows read for each batch
+            dtypes (bool or dict): the dtypes, see read_tab. Numeric columns 
+                are not downcast, so that all batches have the same dtypes.
+            columns (list): the columns to read, see read_tab
+            where (function): a row predicate applied to each batch, see read_tab
+        
+        Returns:
+            (generator): a generator of DataTable instances
+        
+        """
+        fp_tab=fp_tab or self.fp_tab
+        if dtypes is True:
+            dtypes=self.datadictionary.dtypes()
+        for df in iter_tab(fp_tab,
+                           batchsize=batchsize,
+                           dtypes=dtypes,
+                           columns=columns,
+                           where=where):
+            batch=DataTable()
+            if hasattr(self,'datadictionary'): batch.datadictionary=self.datadictionary
+            batch.fp_tab=fp_tab
+            batch.tab=df
+            yield batch
+            
+            
+    def iter_dataframes(self,batchsize=DEFAULT_CHUNKSIZE,**kwargs):
+        """Yields the get_dataframe result for each batch of a .tab file
+        
+        Arguments:
+            batchsize (int): the number of rows read for each batch
+            **kwargs: the fp_tab, dtypes, columns and where arguments of iter_batches
+        
+        Returns:
+            (generator): a generator of pandas.DataFrame instances with the 
+                value labels decoded
+        
+        """
+        for batch in self.iter_batches(batchsize=batchsize,**kwargs):
+            yield batch.get_dataframe()
+
+
+    def diary_reshaper(self,stems=None,min_slots=2):
+        """Returns a reshaper of the diary slot columns, see ukds.diary
+
+        The slot families, such as 'act1_001' to 'act1_144', are found in
+        the data dictionary, or in the columns of the table if there is none.
+
+        Arguments:
+            stems (list): the families to reshape, e.g. ['act1','wher'].
+                If None, the families which share the most common slots.
+            min_slots (int): the fewest columns of a family
+
+        Returns:
+            (ukds.diary.DiaryReshaper)
+
+        """
+        from .diary import DiaryReshaper, find_slot_families
+        if hasattr(self,'datadictionary'):
+            return DiaryReshaper(self.datadictionary,stems=stems,min_slots=min_slots)
+        return DiaryReshaper(stems=stems,
+                             families=find_slot_families(self.tab.columns,min_slots))
+
+
+    def to_long(self,stems=None,id_columns=None,decode=False):
+        """Returns the diary slot columns in long form, with a row for each row and slot
+
+        Arguments:
+            stems (list): the families to reshape, see diary_reshaper
+            id_columns (list): columns repeated on each slot row, e.g. ['serial','pnum']
+            decode (bool): if True, the categories are the value labels
+
+        Returns:
+            (pandas.DataFrame): see ukds.diary.DiaryReshaper.reshape
+
+        """
+        return self.diary_reshaper(stems).reshape(self.tab,id_columns=id_columns,decode=decode)
+
+
+    def iter_long(self,
+                  batchsize=DEFAULT_CHUNKSIZE,
+                  stems=None,
+                  id_columns=None,
+                  decode=False,
+                  **kwargs):
+        """Yields the diary slot columns in long form for each batch of a .tab file
+
+        Only the slot columns of the families and the id columns are read,
+        and all batches have the same categories.
+
+        Arguments:
+            batchsize (int): the number of rows read for each batch
+            stems (list): the families to reshape, see diary_reshaper
+            id_columns (list): columns repeated on each slot row
+            decode (bool): if True, the categories are the value labels
+            **kwargs: the fp_tab, dtypes and where arguments of iter_batches
+
+        Returns:
+            (generator): a generator of pandas.DataFrame instances
+
+        """
+        reshaper=self.diary_reshaper(stems)
+        columns=list(id_columns or [])+reshaper.columns
+        batches=self.iter_batches(batchsize=batchsize,columns=columns,**kwargs)
+        return reshaper.iter_reshape(batches,id_columns=id_columns,decode=decode)
+
+
+    def iter_rdf(self,
+                 method,
+                 batchsize=DEFAULT_CHUNKSIZE,
+                 fp_tab=None,
+                 dtypes=None,
+                 columns=None,
+                 where=None,
+                 **kwargs):
+        """Yields the result of an RDF exporter for each batch of a .tab file
+        
+        For example, dt.iter_rdf('to_bso_variable',base_prefix='eg',
+        base_uri='http://example.com/',variable='hh_wt') yields a 
+        fairly.CreateRDF instance for each batch. Observation uris use the 
+        row number in the file, so the batches together give the same rdf 
+        as the full table.
+        
+        Arguments:
+            method (str): the name of a DataTable exporter method, e.g. 'to_bso_variable'
+            batchsize (int): the number of rows read for each batch
+            fp_tab, dtypes, columns, where: see iter_batches
+            **kwargs: the arguments of the exporter method
+        
+        Returns:
+            (generator): a generator of the exporter results
+        
+        """
+        for batch in self.iter_batches(fp_tab=fp_tab,
+                                       batchsize=batchsize,
+                                       dtypes=dtypes,
+                                       columns=columns,
+                                       where=where):
+            yield getattr(batch,method)(**kwargs)
+            
+            
+    def to_rdf_parallel(self,
+                        method,
+                        directory,
+                        columns=None,
+                        shard='columns',
+                        processes=None,
+                        filename=None,
+                        **kwargs):
+        """Runs an RDF exporter on a pool of processes, writing part files
+        
+        For example, dt.to_rdf_parallel('to_rdf_data_cube','out',
+        base_prefix='eg',base_uri='http://example.com/',
+        dimension_columns=['serial'],filename='out.ttl') exports shards 
+        of the columns in worker processes and merges the results into 
+        'out.ttl'.
+        See ukds.parallel.export.
+        
+        Arguments:
+            method (str): the name of a DataTable exporter method
+            directory (str): the directory for the part files
+            columns (list): the columns to export, if sharding by columns
+            shard (str): 'columns' or 'rows'
+            processes (int): the number of processes, by default the number of CPUs
+            filename (str): if given, the parts are merged into this file
+            **kwargs: the arguments of the exporter method
+        
+        Returns:
+            (str or list): the filename, or the header and part filepaths
+        
+        """
+        from . import parallel
+        return parallel.export(self,
+                               method,
+                               directory,
+                               columns=columns,
+                               shard=shard,
+                               processes=processes,
+                               filename=filename,
+                               **kwargs)
+    
+    
+    def to_graph(self,
+                 method,
+                 base_prefix,
+                 base_uri,
+                 graph=None,
+                 store='default',
+                 **kwargs):
+        """Runs an RDF exporter straight into an rdflib Graph
+        
+        The bso exporters add their triples as rdflib terms, without 
+        writing and parsing Turtle. to_rdf_data_cube writes its observations
+        as blocks of Turtle, which are parsed into the graph, e.g.
+        dt.to_graph('to_rdf_data_cube','eg','http://example.com/',
+        dimension_columns=['serial']). The bdo exporters are built by fairly
+        and parsed into the graph in batches. See ukds.graph.build_graph.
+        
+        Arguments:
+            method (str): the name of an exporter method
+            base_prefix (str): the base prefix
+            base_uri (str): the base uri
+            graph (rdflib.Graph): a graph to add to, if None a new graph
+            store (str): the rdflib store of a new graph, e.g. 'SimpleMemory'
+            **kwargs: the other arguments of the exporter method
+        
+        Returns:
+            (rdflib.Graph): the graph
+        
+        """
+        from .graph import build_graph
+        return build_graph(self,
+                           method,
+                           base_prefix,
+                           base_uri,
+                           graph=graph,
+                           store=store,
+                           **kwargs)
+    
+    
+    def read_datadictionary(self,fp_dd,memory_map=False,cache=None):
         """Reads in a .rtf file
         
         Arguments:
             fp_dd (str): a filepath to a UK Data Service data dictionary .rtf file
+            memory_map (bool): if True, the .rtf file is memory-mapped and 
+                its raw text is not kept, see DataDictionary.read_rtf
+            cache (bool, str or ukds.cache.DataDictionaryCache): a cache of 
+                parsed data dictionaries, e.g. True for the default cache 
+                directory, see DataDictionary.read_rtf
+        
+        """
+        self.datadictionary=DataDictionary(fp_dd,memory_map=memory_map,cache=cache)
+    
+    
+    def term_factory(self,base_prefix):
+        """Returns the TermFactory for a base prefix, created once and reused
+        
+        The factory of the data dictionary is used, if there is one, so the 
+        table and the data dictionary exporters share the same uris.
+        
+        Arguments:
+            base_prefix (str): the base prefix of the uris, e.g. 'eg'
+        
+        Returns:
+            - (ukds.terms.TermFactory)
         
         """
-        self.datadictionary=DataDictionary(fp_dd)
+        if hasattr(self,'datadictionary'):
+            return self.datadictionary.term_factory(base_prefix)
+        if getattr(self,'_term_factories',None) is None:
+            self._term_factories={}
+        if base_prefix not in self._term_factories:
+            self._term_factories[base_prefix]=TermFactory(base_prefix)
+        return self._term_factories[base_prefix]
             
         
         
     def get_dataframe(self):
         """Returns a pandas DataFrame based on the ukds .tab and .rtf files
         
+        The columns are labelled with a MultiIndex of the variable information.
+        Columns of variables with value labels are decoded to pandas.Categorical
+        columns, where codes are replaced by their labels and any other values
+        are kept as further categories.
+        
         Returns:
             (pandas.DataFrame)
         
@@ -85,46 +389,114 @@ class DataTable():
             
             return column_index
             
-            
-        df=self.tab.copy()
+        
+        # replace values
+        if getattr(self,'decoded',False):
+            df=self.tab.copy()
+        else:
+            df=self.datadictionary.decoder.decode_frame(self.tab)
             
         # rename columns
         column_index=get_column_multiindex(df.columns,self.datadictionary)
         df.columns=column_index
-        
-        # replace values
-        for col in df.columns:
-            #print(col)
-            
-            value_labels=self.datadictionary.get_variable_dict(col[0])['value_labels']
-            #print(value_labels)
-            
-            new_values=pd.to_numeric(df[col],errors='coerce').dropna().replace(value_labels)
-            df.loc[new_values.index,col]=new_values
     
         return df
         
     
+    def to_columnar(self,fp,format=None,compression=None,batchsize=None):
+        """Writes the decoded table to a Parquet or Arrow IPC (Feather) file
+        
+        The columns are the get_dataframe columns, named by variable, with the 
+        value labels decoded to categoricals. The variable information 
+        (variable_label, SPSS_measurement_level, value_labels, pos, ...) is 
+        stored in the metadata of each field and the whole data dictionary 
+        in the schema metadata, so read_columnar rebuilds both the table and 
+        the data dictionary.
+        
+        Arguments:
+            fp (str): the filepath, e.g. 'uktus15_household.parquet' or 
+                'uktus15_household.arrow'
+            format (str): 'parquet' or 'arrow'. If None, this is taken from 
+                the file extension.
+            compression (str): the compression. Defaults to 'snappy' for 
+                Parquet and to no compression for Arrow, so that Arrow files
+                can be memory-mapped without copying.
+            batchsize (int): if given, the .tab file last read by read_tab is
+                streamed in batches of this many rows (see iter_batches), 
+                with the same dtypes, columns and where arguments, so tables
+                larger than memory can be converted. The batches must have 
+                the same column types, so dtypes=True is advised.
+        
+        """
+        format=columnar.get_format(fp,format)
+        catalogue=self.datadictionary.catalogue
+        
+        def flat(df):
+            df.columns=df.columns.get_level_values('variable')
+            return df
+        
+        if batchsize:
+            categories={}
+            tables=(columnar.to_arrow_table(flat(df),catalogue,
+                                            preserve_index=True,
+                                            categories=categories)
+                    for df in self.iter_dataframes(batchsize=batchsize,
+                                                   **getattr(self,'_read_tab_kwargs',{})))
+        else:
+            tables=[columnar.to_arrow_table(flat(self.get_dataframe()),catalogue)]
+        
+        columnar.write(fp,tables,format,compression=compression)
+        
+        
+    def read_columnar(self,fp,format=None,columns=None,memory_map=True):
+        """Reads a Parquet or Arrow IPC file written by to_columnar
+        
+        This sets the 'tab' attribute to the decoded table and the 
+        'datadictionary' attribute to a DataDictionary rebuilt from the file 
+        metadata. The table is already decoded, so get_dataframe only adds 
+        the column MultiIndex.
+        
+        Arguments:
+            fp (str): the filepath
+            format (str): 'parquet' or 'arrow'. If None, this is taken from 
+                the file extension.
+            columns (list): the variable names of the columns to read. 
+                If None, all columns are read.
+            memory_map (bool): if True, the file is memory-mapped
+        
+        """
+        table,variable_dicts=columnar.read(fp,
+                                           format=format,
+                                           columns=columns,
+                                           memory_map=memory_map)
+        if variable_dicts is None:
+            raise ValueError('"%s" has no ukds data dictionary metadata' % fp)
+        self.datadictionary=DataDictionary.from_variable_dicts(variable_dicts)
+        self.tab=table.to_pandas(split_blocks=True)
+        self.decoded=True
+        
+    
     def to_bso_survey(self,
                       base_prefix,
-                      base_uri):
+                      base_uri,
+                      createRDF=None):
         """
         """
-        c=fairly.CreateRDF()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_prefix(base_prefix,base_uri)
         
+        t=self.term_factory(base_prefix)
         
-        survey_uri='%s:survey' % base_prefix
-        sample_uri='%s:sample' % base_prefix
+        survey_uri=t.uri('survey')
+        sample_uri=t.uri('sample')
         c.add_subject_triples(survey_uri,[('a','bso:Survey'),
                                           ('bso:sample',sample_uri)])
         c.add_triple(sample_uri,'a','bso:Sample')
         
-        l=[]
-        for i in range(len(self.tab)):
-            observation_uri='%s:observation_%s' % (base_prefix,str(i))
-            l.append(observation_uri)
-        c.add_subject_predicate_triples(survey_uri,'bso:observation',l)
+        c.add_subject_predicate_triples(survey_uri,'bso:observation',
+                                        t.observations(self.tab.index))
     
         return c
     
@@ -132,14 +504,18 @@ class DataTable():
     def to_bso_variable(self,
                        base_prefix,
                        base_uri,
-                       variable):
+                       variable,
+                       createRDF=None):
         """
         """
-        c=fairly.CreateRDF()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_prefix(base_prefix,base_uri)
         
-        variable_uri='%s:variable_%s' % (base_prefix,variable)
-        value_uri='%s:value_%s' % (base_prefix,variable)
+        t=self.term_factory(base_prefix)
+        variable_uri=t.variable(variable)
+        value_uri=t.uri('value',variable)
         
         c.add_subject_triples(value_uri,[('rdfs:subPropertyOf','bso:value'),
                                         ('rdfs:seeAlso',variable_uri)
@@ -149,84 +525,140 @@ class DataTable():
         value_labels=variable_dict['value_labels']
         #print(value_labels)
         
-        for i,v in enumerate(self.tab[variable].values):
-            
-            observation_uri='%s:observation_%s' % (base_prefix,str(i))
-            
-            try:                
-                if float(v) in value_labels:
-                    code_uri='%s:code_%s_%s' % (base_prefix,variable,float(v))
-                    c.add_triple(observation_uri,value_uri,code_uri)
-                else:
-                    c.add_triple(observation_uri,value_uri,v)
-            except ValueError:
-                c.add_triple(observation_uri,value_uri,'"%s"' % v)
+        # coded values become code uris, other numbers are kept and text is quoted
+        terms=value_terms(self.tab[variable].values,
+                          value_labels,
+                          t.code_prefix(variable))
+        
+        for observation_uri,term in zip(t.observations(self.tab.index),terms):
+            c.add_triple(observation_uri,value_uri,term)
         
         
         return c
     
     
+    def iter_data_cube_observation_blocks(self,
+                                          base_prefix,
+                                          dimension_columns,
+                                          columns=None,
+                                          blocksize=DEFAULT_BLOCKSIZE
+                                          ):
+        """Yields the qb:Observation resources as Turtle, in blocks of rows
+        
+        The dimension triples of each row are formatted once, as a single 
+        string which is shared by the observations of every measure column. 
+        The measure values of a column are formatted together, and the 
+        observations of a block are joined into one Turtle string. A missing
+        value has no observation, and a missing dimension value no triple.
+        
+        :param base_prefix str: the base prefix for the data cube
+        :param dimension_columns list: the names of the dimension columns
+        :param columns list: the measure columns. If None, all columns.
+        :param blocksize int: the number of rows in a block
+        
+        :return result: a generator of (column, observation_uris, rdf) 
+            tuples, one for each block of rows of each column, where rdf is 
+            the Turtle of the observations, without prefixes
+        :rtype generator:
+        
+        """
+        t=self.term_factory(base_prefix)
+        catalogue=self.datadictionary.catalogue
+        dataset_uri=t.uri('dataset').replace('%','%%')
+        
+        dimension_blocks=['']*len(self.tab)
+        for k in dimension_columns:
+            numeric=catalogue.by_name(k)['variable_type']=='numeric'
+            template=' ;\n    %s %%s' % t.uri('dp',k).replace('%','%%')
+            dimension_blocks=[d if v is None else d+template % v 
+                              for d,v in zip(dimension_blocks,
+                                             serializer.turtle_values(self.tab[k],numeric))]
+        index=t.index_strings(self.tab.index)
+        
+        columns=self.tab.columns if columns is None else columns
+        
+        for col in columns:
+            
+            numeric=catalogue.by_name(col)['variable_type']=='numeric'
+            template='%%s a qb:Observation ;\n    qb:dataSet %s%%s ;\n    %s %%s .\n' \
+                % (dataset_uri,t.uri('mp',col).replace('%','%%'))
+            observation_prefix=t.uri('obs_prefix',col)
+            values=serializer.turtle_values(self.tab[col],numeric)
+            
+            for start in range(0,len(index),blocksize):
+                rows=[i for i in range(start,min(start+blocksize,len(index))) 
+                      if values[i] is not None]
+                observation_uris=[observation_prefix+index[i] for i in rows]
+                rdf=''.join([template % (uri,dimension_blocks[i],values[i]) 
+                             for uri,i in zip(observation_uris,rows)])
+                yield col,observation_uris,rdf
+    
+    
     def to_rdf_data_cube(self,
                          base_prefix,
                          base_uri,
                          dimension_columns,
-                         column=None
+                         column=None,
+                         columns=None,
+                         sink=None,
+                         blocksize=DEFAULT_BLOCKSIZE,
+                         createRDF=None
                          ):
         """Converts the data dictionary to RDF Data Cube format
         
+        The observations are written a block of rows at a time as Turtle, 
+        see iter_data_cube_observation_blocks, and added to the rdf of the 
+        CreateRDF instance, or to a GraphBuilder with add_turtle.
+        
         :param base_prefix str: the base prefix for the data cube
         :param base_uri str: the base uri for the data cube
+        :param dimension_columns list: the names of the dimension columns
+        :param column str: if given, only this measure column is converted
+        :param columns list: if given, only these measure columns are 
+            converted. The dimension triples are formatted once for all 
+            of them, so a list is faster than a call for each column.
+        :param sink ukds.sinks.Sink: if given, the rdf of each block of rows
+            is passed to the sink, see ukds.sinks
+        :param blocksize int: the number of rows in a block, see 
+            iter_data_cube_observation_blocks
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
         
         :return data_cube:
         :rtype fairly.CreateRDF
         
         """
 
-        c=fairly.CreateRDF()
-        c.add_data_cube_prefixes()
-        c.add_skos_prefixes()
-        c.add_prefix(base_prefix,base_uri)
-        
-        dataset_uri='%s:dataset' % base_prefix
-        
-        x=[]
-        d=self.tab[[*dimension_columns]].to_dict()
-        for k,v in d.items():
-            dimension_property_uri='%s:dp-%s' % (base_prefix,k)
-            x.append([(dimension_property_uri,value) for value in v.values()])
-        dimension_lists=list(zip(*x))
-        
-        
-#        for index,row in self.tab[[*dimension_columns]].iterrows():
-#            l=[]
-#            for col in row.index:
-#                l.append(('%s:dp-%s' % (base_prefix,col),row[col]))
-#            dimension_lists.append(l)
-        
-        columns=[column] if column else self.tab.columns
-        
-        for col in columns:
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_data_cube_prefixes()
+            c.add_skos_prefixes()
+            c.add_prefix(base_prefix,base_uri)
+        add_turtle=getattr(c,'add_turtle',None)
+        
+        t=self.term_factory(base_prefix)
+        
+        if column:
+            columns=[column]
+        elif columns is None:
+            columns=self.tab.columns
+        
+        for col,observation_uris,rdf in \
+                self.iter_data_cube_observation_blocks(base_prefix,
+                                                       dimension_columns,
+                                                       columns,
+                                                       blocksize):
             
-            df=self.tab[col]
-            variable_type=self.datadictionary.get_variable_dict(col)['variable_type']
+            if add_turtle is None:
+                c.rdf+=rdf
+            else:
+                add_turtle(rdf)
             
-            measure_property_uri='%s:mp-%s' % (base_prefix,col)
-            slice_uri='%s:slice-%s' % (base_prefix,col)
+            slice_uri=t.uri('slice',col)
+            c.add_subject_predicate_triples(slice_uri,'qb:observation',observation_uris)
             
-            for index,value in df.iteritems():
-                
-                # add qb:Observation
-                observation_uri='%s:obs-%s-%s' % (base_prefix,col,str(index))
-                dimension_list=dimension_lists[index]
-                measure_list=[(measure_property_uri,value if variable_type=='numeric' else '"%s"' % value)]
-                c.add_data_cube_observation(
-                        observation_uri,
-                        dataset_uri=dataset_uri,
-                        dimension_list=dimension_list,
-                        measureType_uri=None,
-                        measure_list=measure_list,
-                        attribute_list=None)
-                c.add_triple(slice_uri,'qb:observation',observation_uri)
+            if sink is not None: sink.add(c)
     
         return c
     
@@ -236,7 +668,8 @@ class DataTable():
                                      base_prefix,
                                      base_uri,
                                      column_name,
-                                     row_index
+                                     row_index,
+                                     createRDF=None
                                      ):
         """Creates the rdf for a bdo:ObservationDatum
         
@@ -246,19 +679,24 @@ class DataTable():
             - e.g. 'https://www.example.org/'
         :param column_name str: the table column name
         :param row_index int: the table row index        
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
         
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
         
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
         
-        uri='%s:observation_datum_%s_%s' % (base_prefix,row_index,column_name)
-        variable_uri='%s:variable_%s' % (base_prefix,column_name)
-        observation_uri='%s:observation_%s' % (base_prefix,row_index)
+        t=self.term_factory(base_prefix)
+        uri=t.uri('observation_datum_prefix')+'%s_%s' % (row_index,column_name)
+        variable_uri=t.variable(column_name)
+        observation_uri=t.observation(row_index)
         value=self.tab.loc[row_index,column_name]
         
         c.add_bdo_observation_datum(
@@ -275,36 +713,96 @@ class DataTable():
     
     
     
+    def iter_bdo_observation_datum_blocks(self,
+                                          base_prefix,
+                                          column_names,
+                                          blocksize=DEFAULT_BLOCKSIZE
+                                          ):
+        """Yields the arguments of the bdo:ObservationDatum resources in blocks of rows
+        
+        The row index is converted to strings once, the uris are built a 
+        block at a time by concatenation, and the values are taken from the 
+        column array rather than by a lookup for each cell.
+        
+        :param base_prefix str: the prefix for the resource uri
+            - e.g. 'eg'
+        :param column_names list: a list of column names
+        :param blocksize int: the number of rows in a block
+        
+        :return result: a generator of (variable_uri, uris, observation_uris, 
+            values) tuples, one for each block of rows of each column. 
+            uris, observation_uris and values are lists of the same length.
+        :rtype generator:
+        
+        """
+        t=self.term_factory(base_prefix)
+        index=t.index_strings(self.tab.index)
+        observation_uris=t.observations(self.tab.index)
+        datum_prefix=t.uri('observation_datum_prefix')
+        
+        for column_name in column_names:
+            variable_uri=t.variable(column_name)
+            suffix='_%s' % column_name
+            values=self.tab[column_name].to_numpy()
+            for start in range(0,len(index),blocksize):
+                end=start+blocksize
+                yield (variable_uri,
+                       [datum_prefix+i+suffix for i in index[start:end]],
+                       observation_uris[start:end],
+                       list(values[start:end]))
+    
+    
     def to_rdf_bdo_observation_datums(self,
                                       base_prefix,
                                       base_uri,
                                       column_names,
+                                      sink=None,
+                                      blocksize=DEFAULT_BLOCKSIZE,
+                                      createRDF=None
                                       ):
         """Creates the rdf for a series of bdo:ObservationDatum resources
         
+        The resources are the same as those of to_rdf_bdo_observation_datum 
+        for each cell, but are created a block of rows at a time, see 
+        iter_bdo_observation_datum_blocks.
+        
         :param base_prefix str: the prefix for the resource uri
             - e.g. 'eg'
         :param base_uri str: the base uri for the resource uri
             - e.g. 'https://www.example.org/'
         :param column_names list: a list of column names to be created
+        :param sink ukds.sinks.Sink: if given, the rdf of each block of rows
+            is passed to the sink, see ukds.sinks
+        :param blocksize int: the number of rows in a block
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
           
-        :return c: the rdf
+        :return c: the rdf, without the triples passed to the sink
         :rtype fairly.CreateRDF:
         
         """
         
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
-        
-        for column_name in column_names:
-            for row_index in self.tab.index:
-                result=self.to_rdf_bdo_observation_datum(base_prefix,
-                                                     base_uri,
-                                                     column_name,
-                                                     row_index
-                                                     )
-                c.rdf+=result.rdf
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
+        
+        for variable_uri,uris,observation_uris,values in \
+                self.iter_bdo_observation_datum_blocks(base_prefix,
+                                                       column_names,
+                                                       blocksize):
+            for uri,observation_uri,value in zip(uris,observation_uris,values):
+                c.add_bdo_observation_datum(
+                                          uri,
+                                          label=None,
+                                          comment=None,
+                                          variable_uri=variable_uri,
+                                          observation_uri=observation_uri,
+                                          value=value,
+                                          predicate_object_list=None
+                                          )
+            if sink is not None: sink.add(c)
 
         return c
     
@@ -313,7 +811,8 @@ class DataTable():
     def to_rdf_bdo_observation(self,
                                base_prefix,
                                base_uri,
-                               row_index
+                               row_index,
+                               createRDF=None
                                ):
         """Creates the rdf for a bdo:Observation
         
@@ -322,17 +821,21 @@ class DataTable():
         :param base_uri str: the base uri for the resource uri
             - e.g. 'https://www.example.org/'
         :param row_index int: the table row index         
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
         
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
                 
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
         
-        uri='%s:observation_%s' % (base_prefix,row_index)
+        uri=self.term_factory(base_prefix).observation(row_index)
                 
         c.add_bdo_observation(
                             uri,
@@ -347,7 +850,8 @@ class DataTable():
     def to_rdf_bdo_observation_set(self,
                                    base_prefix,
                                    base_uri,
-                                   add_members=False
+                                   add_members=False,
+                                   createRDF=None
                                    ):
         """Creates the rdf for a bdo:ObservationSet
         
@@ -356,20 +860,24 @@ class DataTable():
         :param base_uri str: the base uri for the resource uri
             - e.g. 'https://www.example.org/'
         :param add_member bool: if True, the member triples are added         
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
         
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
         
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
         
-        uri='%s:observation_set' % (base_prefix)
+        t=self.term_factory(base_prefix)
+        uri=t.uri('observation_set')
         if add_members:
-            member_uri_list=['%s:observation_%s' % (base_prefix,i) 
-                             for i in self.tab.index]
+            member_uri_list=list(t.observations(self.tab.index))
         else:
             member_uri_list=[]
                 
@@ -387,6 +895,7 @@ class DataTable():
                                         base_prefix,
                                         base_uri,
                                         member_columns=None,
+                                        createRDF=None
                                         ):
         """Creates the rdf for a bdo:ObservationDataSet
         
@@ -397,24 +906,31 @@ class DataTable():
         :param member_columns list: list of column names
             - member triples are added for each column in the list
             - if None, then no member triples are added
+        :param createRDF fairly.CreateRDF: if given, the triples are added 
+            to this instance, which already has the prefixes
         
         :return c: the rdf
         :rtype fairly.CreateRDF:
         
         """
         
-        c=fairly.CreateRDF()
-        c.add_bdo_prefixes()
-        c.add_prefix(base_prefix,base_uri)
+        c=createRDF
+        if c is None:
+            c=fairly.CreateRDF()
+            c.add_bdo_prefixes()
+            c.add_prefix(base_prefix,base_uri)
         
-        uri='%s:data_set' % (base_prefix)
+        t=self.term_factory(base_prefix)
+        uri=t.uri('data_set')
         if member_columns:
-            member_uri_list=['%s:observation_datum_%s_%s' % (base_prefix,i,column_name) 
-                             for i in self.tab.index for column_name in member_columns]
+            datum_prefix=t.uri('observation_datum_prefix')
+            suffixes=['_%s' % column_name for column_name in member_columns]
+            member_uri_list=[datum_prefix+i+suffix
+                             for i in t.index_strings(self.tab.index) for suffix in suffixes]
         else:
             member_uri_list=None
-        variable_set_uri='%s:variable_set' % base_prefix
-        observation_set_uri='%s:observation_set' % (base_prefix)
+        variable_set_uri=t.uri('variable_set')
+        observation_set_uri=t.uri('observation_set')
         
         c.add_bdo_observation_data_set(
                                       uri,
@@ -697,31 +1213,47 @@ class DataTable():
 #                file.write('[] %s . \n\n' % ' ;\n\t'.join(l))
         
 
-    def to_ttl(self,filename,prefix,uri):
-        """Places the DataTable data in an rdflib Graph.
-        
-        Creates multiple files is size > 30 MB
+    def to_ttl(self,
+               filename,
+               prefix,
+               uri,
+               format='turtle',
+               compress=None,
+               batchsize=None,
+               blocksize=DEFAULT_BLOCKSIZE):
+        """Writes the DataTable data to a Turtle or N-Triples file.
+        
+        Each row is written as a blank node with a property for each column.
+        The rows are formatted in blocks of 'blocksize' rows, so memory use 
+        stays flat however large the table. The Turtle output is the same as
+        that of the original row by row version of this method.
         
         Arguments:
-            - filename (str): the name of the output .ttl file 
+            - filename (str): the name of the output .ttl or .nt file. If it 
+                ends with '.gz' the file is gzip compressed.
             - prefix (str): a prefix for the Data Dictionary ontology (used to describe the variables)
             - uri (str): a uri for the Data Dictionary ontology (used to describe the variables)
+            - format (str): 'turtle' or 'nt' (N-Triples)
+            - compress (bool): if True the file is gzip compressed. If None, 
+                this is taken from the file extension.
+            - batchsize (int): if given, the .tab file last read by read_tab
+                is streamed in batches of this many rows (see iter_batches)
+                instead of using the 'tab' attribute. Numeric columns of the
+                batches are not downcast, so whole numbers of float columns 
+                are written as e.g. "1.0".
+            - blocksize (int): the number of rows formatted at a time
         
-        Returns:
-            - (rdflib.Graph): the input graph with the DataTable data inserted into it.
-            
         """
-        
-        with open(filename,'w',encoding="UTF-8") as file:
-            file.write('@prefix %s: <%s> .\n' % (prefix,uri))
-            file.write('\n')
-        
-            for index,row in self.tab.iterrows():
-                data_dict=row.to_dict()
-                l=[]
-                for k,v in data_dict.items():
-                    l.append('%s:%s "%s"' % (prefix,k,v))
-                file.write('[] %s . \n\n' % ' ;\n\t'.join(l))
+        with serializer.open_output(filename,compress) as file:
+            serializer.write_header(file,prefix,uri,format)
+            if batchsize:
+                tables=(batch.tab for batch in 
+                        self.iter_batches(batchsize=batchsize,
+                                          **getattr(self,'_read_tab_kwargs',{})))
+            else:
+                tables=[self.tab]
+            for df in tables:
+                serializer.write_rows(file,df,prefix,uri,format,blocksize)
         
         
 #        file_index=0
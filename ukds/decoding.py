@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""Vectorized decoding of UKDS value labels.
+
+For each variable with value labels the codes are held in a hash-indexed
+pandas.Index and the labels as categories, built once. A column is decoded
+with a single get_indexer lookup and a take, and returned as a
+pandas.Categorical, so no per-value Python work is done.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ValueLabelDecoder():
+    """Decodes table columns using the value labels of a data dictionary
+    """
+
+    def __init__(self,catalogue):
+        """
+
+        :param catalogue ukds.data_dictionary.VariableCatalogue: the variables
+            and their value labels
+
+        """
+        self.catalogue=catalogue
+        self._mappings={}
+
+
+    def mapping(self,variable):
+        """Returns the lookup arrays for a variable
+
+        :param variable str: the variable name
+
+        :return mapping: a tuple (keys, label_codes, categories) where keys is
+            a float Index of the coded values, label_codes gives the category
+            position of each key and categories is an Index of the unique labels.
+            None is returned if the variable has no value labels.
+        :rtype tuple:
+
+        """
+        try:
+            return self._mappings[variable]
+        except KeyError:
+            pass
+
+        value_labels=self.catalogue.by_name(variable)['value_labels']
+        if value_labels:
+            keys=pd.Index(np.fromiter(value_labels.keys(),dtype=np.float64,
+                                      count=len(value_labels)))
+            label_codes,categories=pd.factorize(pd.Index(list(value_labels.values()),
+                                                         dtype=object))
+            result=(keys,label_codes,categories)
+        else:
+            result=None
+
+        self._mappings[variable]=result
+        return result
+
+
+    def decode_values(self,variable,values):
+        """Decodes an array of values
+
+        Values which match a value label code are replaced by the label.
+        Other values are kept as they are, as extra categories after the labels.
+
+        :param variable str: the variable name
+        :param values numpy.ndarray: the raw values
+
+        :return result: the decoded values, or None if the variable has no value labels
+        :rtype pandas.Categorical:
+
+        """
+        mapping=self.mapping(variable)
+        if mapping is None: return None
+        keys,label_codes,categories=mapping
+
+        values=np.asarray(values)
+        numeric=pd.to_numeric(values,errors='coerce')
+        positions=keys.get_indexer(np.asarray(numeric,dtype=np.float64))
+        coded=positions>=0
+
+        codes=np.empty(len(values),dtype=np.int64)
+        codes[coded]=label_codes[positions[coded]]
+
+        if coded.all():
+            return pd.Categorical.from_codes(codes,categories=categories)
+
+        uncoded=~coded
+        other_codes,other_values=pd.factorize(values[uncoded])
+        all_categories=categories.append(pd.Index(other_values,dtype=object))
+        if not all_categories.is_unique:
+            # an uncoded value is the same as a label
+            result=values.astype(object)
+            result[coded]=categories.take(codes[coded])
+            return pd.Categorical(result)
+        codes[uncoded]=np.where(other_codes<0,-1,other_codes+len(categories))
+        return pd.Categorical.from_codes(codes,categories=all_categories)
+
+
+    def decode(self,variable,series):
+        """Decodes a column of a table
+
+        Categorical columns are decoded through their categories only.
+
+        :param variable str: the variable name
+        :param series pandas.Series: the raw column
+
+        :return result: a categorical column, or the input series if the
+            variable has no value labels
+        :rtype pandas.Series:
+
+        """
+        if self.mapping(variable) is None:
+            return series
+
+        if isinstance(series.dtype,pd.CategoricalDtype):
+            decoded=self.decode_values(variable,series.cat.categories.to_numpy())
+            codes=series.cat.codes.to_numpy()
+            new_codes=np.where(codes<0,-1,decoded.codes.take(codes))
+            result=pd.Categorical.from_codes(new_codes,categories=decoded.categories)
+        else:
+            result=self.decode_values(variable,series.to_numpy())
+
+        return pd.Series(result,index=series.index,name=series.name)
+
+
+    def decode_frame(self,df):
+        """Decodes all columns of a table
+
+        :param df pandas.DataFrame: a table with variable names as column names
+
+        :return result: a new table with the decoded columns
+        :rtype pandas.DataFrame:
+
+        """
+        data={i:self.decode(col,df.iloc[:,i]) for i,col in enumerate(df.columns)}
+        result=pd.DataFrame(data,index=df.index)
+        result.columns=df.columns
+        return result
+
+
+
+def _value_term(v,value_labels,code_prefix):
+    "Returns the rdf object term of a single value, see value_terms"
+    try:
+        f=float(v)
+    except ValueError:
+        return '"%s"' % v
+    return code_prefix+str(f) if f in value_labels else v
+
+
+def value_terms(values,value_labels,code_prefix):
+    """Returns the rdf object term of each value of a column
+
+    A value is classified as in DataTable.to_bso_variable: if float(value) 
+    has a value label the term is the code uri code_prefix+str(float(value)),
+    if value is otherwise a number it is kept as it is, and if it is not a
+    number the term is the string literal '"value"'.
+
+    Numeric arrays are classified with a single vectorized membership test. 
+    For categoricals each category is classified once, and for object 
+    arrays each distinct string is classified once.
+
+    :param values numpy.ndarray or pandas.Categorical: the column values
+    :param value_labels dict: the value labels of the variable
+    :param code_prefix str: the start of the code uris, e.g. 'eg:code_HhOut_'
+
+    :rtype list:
+
+    """
+    if isinstance(values,np.ndarray) and values.dtype.kind in 'biuf':
+        if not value_labels:
+            return list(values)
+        terms=np.empty(len(values),dtype=object)
+        terms[:]=list(values)
+        keys=values.astype(np.float64)
+        label_keys=list(value_labels)
+        codes=np.array([code_prefix+str(k) for k in label_keys]+[None],dtype=object)
+        positions=pd.Index(label_keys,dtype=np.float64).get_indexer(keys)
+        coded=(positions>=0)&~np.isnan(keys)
+        terms[coded]=codes[positions[coded]]
+        # -0.0 matches the label 0.0 but is written as it is
+        negative_zero=coded&(keys==0)&np.signbit(keys)
+        if negative_zero.any():
+            terms[negative_zero]=code_prefix+str(-0.0)
+        return terms.tolist()
+
+    if isinstance(values,pd.Categorical):
+        # the values are the categories, as python objects, and nan if missing
+        categories=values.categories.tolist()+[np.nan]
+        category_terms=np.empty(len(categories),dtype=object)
+        category_terms[:]=[_value_term(v,value_labels,code_prefix) for v in categories]
+        return category_terms[values.codes].tolist()
+
+    terms=[]
+    cache={}
+    for v in values:
+        if v.__class__ is str:
+            try:
+                t=cache[v]
+            except KeyError:
+                t=cache[v]=_value_term(v,value_labels,code_prefix)
+        else:
+            t=_value_term(v,value_labels,code_prefix)
+        terms.append(t)
+    return terms
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Reshaping the slot columns of time-use diaries from wide to long form.
+
+A UKTUS diary table has a column for each ten minute slot of the day and
+each activity dimension: 'act1_001' to 'act1_144', 'wher_001' to
+'wher_144' and so on. The columns of a dimension are a slot family, named
+'<stem>_<slot>'. A DiaryReshaper finds the families in the variable names
+of a data dictionary and gives a long table with a row for each diary row
+and slot:
+
+    row  slot  act1  wher
+      0     1   110    11
+      0     2   110    11
+    ...
+
+Each family becomes one categorical column. The value labels of all the
+columns of a family give a single set of categories, so the codes of every
+slot share them and are written into one (rows, slots) integer array,
+whose flattened view is the column of codes. The row and slot columns are
+made by broadcasting their one dimensional arrays to the (rows, slots)
+shape and flattening, which copies each once. No melt, MultiIndex or
+object column is made. The categories are kept by the reshaper, so the
+tables of successive batches, see iter_reshape, have the same categories;
+a value without a value label is added after the others.
+
+"""
+
+import collections
+import re
+
+import numpy as np
+import pandas as pd
+
+SLOT_PATTERN=re.compile(r'^(?P<stem>.+)_(?P<slot>\d+)$')
+
+
+def find_slot_families(names,min_slots=2):
+    """Returns the slot families of a list of variable names
+
+    :param names list: the variable names, e.g. ['serial','act1_001','act1_002']
+    :param min_slots int: the fewest columns of a family
+
+    :return result: a dictionary of stem to a list of the column names,
+        in slot order, e.g. {'act1':['act1_001','act1_002']}
+    :rtype dict:
+
+    """
+    families={}
+    for name in names:
+        m=SLOT_PATTERN.match(name)
+        if m is None: continue
+        families.setdefault(m.group('stem'),[]).append((int(m.group('slot')),name))
+    return {stem:[name for slot,name in sorted(x)]
+            for stem,x in families.items() if len(x)>=min_slots}
+
+
+def _to_float(values):
+    "Returns values as a float array, with values which are not numbers as NaN"
+    try:
+        return np.asarray(values,dtype=np.float64)
+    except (TypeError,ValueError):
+        return pd.to_numeric(pd.Series(np.asarray(values,dtype=object)),
+                             errors='coerce').to_numpy(dtype=np.float64,na_value=np.nan)
+
+
+def slot_numbers(columns):
+    "Returns the slot numbers of the columns of a family"
+    return np.array([int(SLOT_PATTERN.match(x).group('slot')) for x in columns],
+                    dtype=np.int16)
+
+
+def dominant_families(families):
+    """Returns the families which share the dominant slots
+
+    The dominant slots are those with the most columns over all the
+    families which have them, so a diary's 144 slot families are kept over
+    pairs of variables which happen to end in '_1' and '_2'.
+
+    :param families dict: see find_slot_families
+
+    :rtype dict:
+
+    """
+    slots={stem:tuple(slot_numbers(columns)) for stem,columns in families.items()}
+    counts=collections.Counter(slots.values())
+    dominant=max(counts,key=lambda x: (counts[x]*len(x),len(x)))
+    return {stem:columns for stem,columns in families.items() if slots[stem]==dominant}
+
+
+class DiaryReshaper():
+    """Reshapes the slot families of a diary table to long form
+    """
+
+    def __init__(self,datadictionary=None,stems=None,families=None,min_slots=2):
+        """
+
+        :param datadictionary ukds.DataDictionary: the data dictionary of the
+            diary table, which gives the families and their value labels
+        :param stems list: the families to reshape, e.g. ['act1','wher'].
+            If None, the families with the most common slots, so that
+            other variables named like 'wt_1' and 'wt_2' are left out.
+        :param families dict: stem to column names in slot order, used
+            instead of the families found in the data dictionary
+        :param min_slots int: the fewest columns of a family, see find_slot_families
+
+        :raises ValueError: if there are no families, or they have different slots
+
+        """
+        self.datadictionary=datadictionary
+        if families is None:
+            families=find_slot_families(datadictionary.variable_names(),min_slots)
+        if stems is not None:
+            families={stem:families[stem] for stem in stems}
+        if not families:
+            raise ValueError('No slot columns found')
+        if stems is None:
+            families=dominant_families(families)
+        self.families=families
+        self.slots=slot_numbers(next(iter(families.values())))
+        for stem,columns in families.items():
+            if not np.array_equal(slot_numbers(columns),self.slots):
+                raise ValueError('The slot columns of "%s" do not match those of the other families' % stem)
+        self._keys={}
+        self._labels={stem:self._value_labels(columns) for stem,columns in families.items()}
+
+
+    @property
+    def columns(self):
+        "The names of the slot columns of all the families"
+        return [x for columns in self.families.values() for x in columns]
+
+
+    def _value_labels(self,columns):
+        "Returns the value labels of the columns of a family, merged, or None if there are none"
+        if self.datadictionary is None: return None
+        result={}
+        for x in columns:
+            for k,v in self.datadictionary.variable_dict(x)['value_labels'].items():
+                result.setdefault(float(k),v)
+        return result or None
+
+
+    def categories(self,stem,decode=False):
+        """Returns the shared categories of a family
+
+        :param stem str: the family
+        :param decode bool: if True, the value labels, else the coded values
+
+        :rtype pandas.Index:
+
+        """
+        keys=self._family_keys(stem)
+        if not decode:
+            return keys
+        return self._decode_keys(stem,keys)[1]
+
+
+    def _family_keys(self,stem):
+        "Returns the codes of a family, which only grow so that earlier codes keep their position"
+        keys=self._keys.get(stem)
+        if keys is None:
+            keys=self._keys[stem]=pd.Index(np.fromiter(self._labels[stem],dtype=np.float64),
+                                           dtype=np.float64)
+        return keys
+
+
+    def _decode_keys(self,stem,keys):
+        "Returns the label position of each code, and the unique labels"
+        labels=self._labels[stem]
+        return pd.factorize(pd.Index([labels.get(k,k) for k in keys],dtype=object))
+
+
+    def _codes(self,stem,series):
+        "Returns the positions of the values of a column in the family codes, -1 for missing values"
+        keys=self._family_keys(stem)
+        if isinstance(series.dtype,pd.CategoricalDtype):
+            # look up the categories only, then take by the column codes
+            values=_to_float(series.cat.categories)
+            column_codes=series.array.codes
+        else:
+            values=_to_float(series.array)
+            column_codes=None
+
+        positions=keys.get_indexer(values)
+        new=(positions<0)&~np.isnan(values)
+        if new.any():
+            keys=self._keys[stem]=keys.append(pd.Index(pd.unique(values[new]),dtype=np.float64))
+            positions[new]=keys.get_indexer(values[new])
+
+        if column_codes is None:
+            return positions
+        if len(positions)==0:
+            return np.full(len(column_codes),-1,dtype=np.int64)
+        return np.where(column_codes<0,-1,positions.take(column_codes))
+
+
+    def reshape(self,df,id_columns=None,decode=False):
+        """Returns the slot families of a table in long form
+
+        :param df pandas.DataFrame: the diary table, or a batch of it, with
+            the slot columns
+        :param id_columns list: columns repeated on each slot row, e.g.
+            ['serial','pnum']
+        :param decode bool: if True, the categories are the value labels,
+            else the coded values
+
+        :return result: a table with a 'row' column of the row index of df,
+            the id columns, a 'slot' column and a column for each family.
+            A family with value labels is categorical, otherwise float.
+        :rtype pandas.DataFrame:
+
+        """
+        n=len(df)
+        k=len(self.slots)
+        rows=np.broadcast_to(np.arange(n)[:,None],(n,k)).reshape(-1)
+
+        data={'row':df.index.to_numpy().take(rows)}
+        for col in id_columns or []:
+            data[col]=df[col].array.take(rows)
+        data['slot']=np.broadcast_to(self.slots,(n,k)).reshape(-1)
+
+        for stem,columns in self.families.items():
+            if self._labels[stem] is None:
+                matrix=np.empty((n,k),dtype=np.float64)
+                for i,x in enumerate(columns):
+                    matrix[:,i]=_to_float(df[x].array)
+                data[stem]=matrix.reshape(-1)
+                continue
+            matrix=np.empty((n,k),dtype=np.int32)
+            for i,x in enumerate(columns):
+                matrix[:,i]=self._codes(stem,df[x])
+            codes=matrix.reshape(-1)
+            keys=self._family_keys(stem)
+            if decode:
+                label_codes,categories=self._decode_keys(stem,keys)
+                codes=np.where(codes<0,-1,label_codes.take(codes))
+            else:
+                categories=keys
+            data[stem]=pd.Categorical.from_codes(codes,categories=categories)
+
+        return pd.DataFrame(data,copy=False)
+
+
+    def iter_reshape(self,batches,id_columns=None,decode=False):
+        """Yields the long form of each batch of a diary table
+
+        The categories of a family are the same in every batch, or those of
+        an earlier batch followed by new unlabelled values.
+
+        :param batches iterable: DataFrames, or DataTables such as those of
+            DataTable.iter_batches
+        :param id_columns list: see reshape
+        :param decode bool: see reshape
+
+        :rtype generator:
+
+        """
+        for df in batches:
+            if not isinstance(df,pd.DataFrame): df=df.tab
+            yield self.reshape(df,id_columns=id_columns,decode=decode)
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""Building rdflib graphs directly from the RDF exporters.
+
+The exporters describe their triples as strings in the form used by
+fairly.CreateRDF: prefixed names such as 'eg:variable_HhOut', full uris in
+angle brackets, quoted literals such as '"Productive"' and numbers.
+GraphBuilder accepts the same calls as fairly.CreateRDF and turns these
+strings into rdflib terms, which are interned so that each distinct term
+is created once. The triples are added to the graph in batches with
+Graph.addN. A missing value, NaN or the string 'nan', has no rdf term and
+its triple is skipped.
+
+    graph=dt.to_graph('to_bso_variable','eg','http://example.com/',
+                      variable='HhOut')
+
+Only the builders in NATIVE_BUILDERS are implemented by GraphBuilder, so
+only the exporters which use no others skip Turtle entirely: the bso
+exporters of DataTable and DataDictionary. DataTable.to_rdf_data_cube
+writes its observations as blocks of Turtle, which add_turtle parses
+without going through fairly. The other builders, the add_bdo_* builders
+of the bdo exporters and the add_data_cube_*/add_skos_* builders of
+DataDictionary.to_rdf_data_cube, are run by fairly, whose CreateRDF
+defines their triples, and their Turtle is parsed into the graph a batch
+at a time.
+
+"""
+
+import re
+
+import rdflib
+from rdflib.namespace import RDF, XSD
+
+from .lazy import LazyModule
+
+# only needed for the standard prefixes and the delegated builders
+fairly=LazyModule('fairly')
+
+DEFAULT_BATCHSIZE=100000
+
+# the CreateRDF methods which add the standard prefixes
+PREFIX_METHODS=('add_bdo_prefixes',
+                'add_skos_prefixes',
+                'add_data_cube_prefixes')
+
+# the CreateRDF builders which GraphBuilder adds as rdflib terms itself
+NATIVE_BUILDERS=('add_triple',
+                 'add_subject_triples',
+                 'add_subject_predicate_triples')
+
+_PREFIX_PATTERN=re.compile(r'(?:@prefix|PREFIX)\s+([\w\-\.]*):\s*<([^>]*)>',re.IGNORECASE)
+
+
+def parse_prefixes(text):
+    """Returns the prefix declarations of Turtle or SPARQL text
+
+    :param text str: e.g. the result of CreateRDF.serialize_rdf
+
+    :return result: a dictionary of prefix to namespace uri
+    :rtype dict:
+
+    """
+    return {prefix:uri for prefix,uri in _PREFIX_PATTERN.findall(text)}
+
+
+def fairly_namespaces():
+    """Returns the standard prefixes used by fairly.CreateRDF
+
+    :return result: a dictionary of prefix to namespace uri
+    :rtype dict:
+
+    """
+    c=fairly.CreateRDF()
+    for name in PREFIX_METHODS:
+        getattr(c,name)()
+    return parse_prefixes(c.serialize_rdf())
+
+
+class GraphBuilder():
+    """Adds the triples of the RDF exporters to an rdflib.Graph
+
+    A GraphBuilder can be passed as the 'createRDF' argument of an
+    exporter in place of a fairly.CreateRDF instance.
+    """
+
+    def __init__(self,graph=None,store='default',namespaces=None,batchsize=DEFAULT_BATCHSIZE):
+        """
+
+        :param graph rdflib.Graph: the graph to add the triples to. If None, a
+            new graph is created using 'store'.
+        :param store str or rdflib.store.Store: the rdflib store of a new
+            graph. 'SimpleMemory' keeps fewer indexes than the default
+            store, and persistent or native stores such as 'BerkeleyDB' or
+            'Oxigraph' (with the oxrdflib plugin) keep large graphs out of
+            python objects.
+        :param namespaces dict: prefix to namespace uri. If None, the
+            standard fairly prefixes are used.
+        :param batchsize int: the number of triples added by each Graph.addN call
+
+        """
+        self.graph=rdflib.Graph(store=store) if graph is None else graph
+        self.batchsize=batchsize
+        self.namespaces={}
+        self._terms={}
+        self._quads=[]
+        self._turtle=[]
+        self._turtle_size=0
+        self._createRDF=None
+        for prefix,uri in (fairly_namespaces() if namespaces is None else namespaces).items():
+            self.add_prefix(prefix,uri)
+
+
+    def add_prefix(self,prefix,uri):
+        "Binds a prefix to a namespace uri, which may be in angle brackets"
+        uri=uri.strip().lstrip('<').rstrip('>')
+        self.namespaces[prefix]=uri
+        self.graph.bind(prefix,rdflib.Namespace(uri),override=True)
+        if self._createRDF is not None:
+            self._createRDF.add_prefix(prefix,uri)
+
+
+    def term(self,x):
+        """Returns the rdflib term of a CreateRDF style value, interned
+
+        :param x: a prefixed name, 'a', an uri in angle brackets, a blank node
+            '_:b0', a quoted literal, optionally with a '@lang' or '^^datatype'
+            suffix, or a number
+
+        :return result: the term, or None for a missing value such as NaN,
+            which has no rdf term
+        :rtype rdflib.term.Identifier:
+
+        """
+        # keyed by type as well, as 1, 1.0 and True are equal keys
+        key=(x.__class__,x)
+        try:
+            return self._terms[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # an unhashable value is not interned
+            return self._term(x)
+        t=self._terms[key]=self._term(x)
+        return t
+
+
+    def _term(self,x):
+        "Returns a new rdflib term for a CreateRDF style value"
+        if not isinstance(x,str):
+            if hasattr(x,'item'): x=x.item()
+            if x is None or x!=x:
+                return None
+            if isinstance(x,bool):
+                return rdflib.Literal(x)
+            x=str(x)
+        if x=='a':
+            return RDF.type
+        if x.startswith('<') and x.endswith('>'):
+            return rdflib.URIRef(x[1:-1])
+        if x.startswith('"'):
+            i=x.rindex('"')
+            value,suffix=x[1:i],x[i+1:]
+            if suffix.startswith('@'):
+                return rdflib.Literal(value,lang=suffix[1:])
+            if suffix.startswith('^^'):
+                return rdflib.Literal(value,datatype=self.term(suffix[2:]))
+            return rdflib.Literal(value)
+        if x.startswith('_:'):
+            return rdflib.BNode(x[2:])
+        if x in ('true','false'):
+            return rdflib.Literal(x,datatype=XSD.boolean)
+        try:
+            return rdflib.Literal(int(x))
+        except ValueError:
+            pass
+        try:
+            number=float(x)
+        except ValueError:
+            pass
+        else:
+            # 'nan' is how a missing value is formatted
+            if number!=number:
+                return None
+            # Turtle numbers: 1.5 is a decimal and 1.5e0 a double
+            return rdflib.Literal(x,datatype=XSD.double if 'e' in x.lower() else XSD.decimal)
+        prefix,sep,local=x.partition(':')
+        if sep and prefix in self.namespaces:
+            return rdflib.URIRef(self.namespaces[prefix]+local)
+        raise ValueError('"%s" is not a known prefixed name, uri or literal' % x)
+
+
+    def add_triple(self,subject,predicate,object_):
+        "Adds a triple, unless the object is a missing value"
+        o=self.term(object_)
+        if o is None: return
+        self._quads.append((self.term(subject),self.term(predicate),o,self.graph))
+        if len(self._quads)>=self.batchsize:
+            self.flush()
+
+
+    def add_subject_triples(self,subject,predicate_object_list):
+        "Adds a triple for each (predicate, object) tuple"
+        for predicate,object_ in predicate_object_list:
+            self.add_triple(subject,predicate,object_)
+
+
+    def add_subject_predicate_triples(self,subject,predicate,object_list):
+        "Adds a triple for each object"
+        for object_ in object_list:
+            self.add_triple(subject,predicate,object_)
+
+
+    def add_turtle(self,rdf):
+        """Adds Turtle triples which use the bound prefixes
+
+        The text is parsed into the graph in flush, e.g. the observation 
+        blocks of DataTable.to_rdf_data_cube.
+
+        :param rdf str: Turtle statements, without prefix declarations
+
+        """
+        self._turtle.append(rdf)
+        self._turtle_size+=len(rdf)
+        if self._turtle_size>=self.batchsize*100:
+            self.flush()
+
+
+    def __getattr__(self,name):
+        # the builders not in NATIVE_BUILDERS are run by fairly, and their
+        # Turtle is parsed in flush
+        if name.startswith('add_') and not name.startswith('_'):
+            f=getattr(self._fairly(),name)
+            def method(*args,**kwargs):
+                result=f(*args,**kwargs)
+                if len(self._createRDF.rdf)>=self.batchsize*100:
+                    self.flush()
+                return result
+            return method
+        raise AttributeError(name)
+
+
+    def _fairly(self):
+        "Returns the fairly.CreateRDF instance for the delegated builders"
+        if self._createRDF is None:
+            c=fairly.CreateRDF()
+            for prefix,uri in self.namespaces.items():
+                c.add_prefix(prefix,uri)
+            self._createRDF=c
+        return self._createRDF
+
+
+    def flush(self):
+        "Adds the pending triples to the graph"
+        if self._quads:
+            self.graph.addN(self._quads)
+            self._quads=[]
+        if self._turtle:
+            header=''.join('@prefix %s: <%s> .\n' % (prefix,uri) 
+                           for prefix,uri in self.namespaces.items())
+            self.graph.parse(data=header+''.join(self._turtle),format='turtle')
+            self._turtle=[]
+            self._turtle_size=0
+        c=self._createRDF
+        if c is not None and c.rdf:
+            self.graph.parse(data=c.serialize_rdf(),format='turtle')
+            c.reset_rdf()
+
+
+def build_graph(obj,method,base_prefix,base_uri,graph=None,store='default',**kwargs):
+    """Runs an exporter of a DataTable or DataDictionary into an rdflib.Graph
+
+    :param obj: a DataTable or DataDictionary
+    :param method str: the name of the exporter, e.g. 'to_bso_variable'
+    :param base_prefix str: the base prefix, passed to the exporter
+    :param base_uri str: the base uri, passed to the exporter
+    :param graph rdflib.Graph: the graph to add to. If None, a new graph.
+    :param store str: the store of a new graph, see GraphBuilder
+    :param kwargs: the other arguments of the exporter
+
+    :rtype rdflib.Graph:
+
+    """
+    builder=GraphBuilder(graph=graph,store=store)
+    builder.add_prefix(base_prefix,base_uri)
+    getattr(obj,method)(base_prefix=base_prefix,
+                        base_uri=base_uri,
+                        createRDF=builder,
+                        **kwargs)
+    builder.flush()
+    return builder.graph
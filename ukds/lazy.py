@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Deferred imports of the optional RDF dependencies.
+
+fairly and rdflib are only needed by the RDF exporters, and importing them
+takes much longer than reading a table. A LazyModule stands in for a module
+at the top of a file and imports it when one of its attributes is first
+used, so 'import ukds' and the table methods never load them.
+
+    fairly=LazyModule('fairly')
+    ...
+    c=fairly.CreateRDF()    # fairly is imported here
+
+"""
+
+import importlib
+
+
+class LazyModule():
+    """A module which is imported when one of its attributes is first used
+    """
+
+    def __init__(self,name):
+        """
+
+        :param name str: the module name, e.g. 'fairly'
+
+        """
+        self._name=name
+        self._module=None
+
+
+    def __getattr__(self,attr):
+        # only called for the attributes which are not set in __init__
+        if self._module is None:
+            self._module=importlib.import_module(self._name)
+        return getattr(self._module,attr)
+
+
+    def __repr__(self):
+        return '<lazy module %r%s>' % (self._name,'' if self._module is None else ' (imported)')
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""Linking the tables of a study by their key columns.
+
+The tables of a study such as UKTUS are linked by key columns: each row of
+the individual table has the 'serial' of its household, and each diary
+row the 'serial' and 'pnum' of its individual. A Link between a parent
+and a child table finds the parent row of every child row once, with a
+hash lookup of the keys, and keeps the result as an array of row
+positions. Parent variables can then be attached to the child rows with a
+take of the parent columns, and child variables summed or counted for
+each parent row with bincount, so no merge of the whole tables is made.
+
+    tables=LinkedTables({'household':dt_household,'diary':dt_diary})
+    link=tables.link('household','diary',['serial'])
+    df=link.broadcast(['HhOut','Region'])     # a row for each diary row
+    n=link.aggregate('act1_1',how='count')    # a value for each household
+
+A LinkedTables can also be made from a ukds.Study, and the tables are then
+read when they are first linked.
+
+"""
+
+import numpy as np
+import pandas as pd
+
+AGGREGATIONS=('count','sum','mean','min','max')
+
+
+def _key_arrays(df,keys):
+    "Returns the values of the key columns, with categorical columns as their values"
+    return [np.asarray(df[k].array) for k in keys]
+
+
+def key_index(df,keys):
+    """Returns a hash index of the key columns of a table
+
+    :param df pandas.DataFrame: the table
+    :param keys list: the key column names
+
+    :rtype pandas.Index or pandas.MultiIndex:
+
+    """
+    arrays=_key_arrays(df,keys)
+    if len(arrays)==1:
+        return pd.Index(arrays[0])
+    return pd.MultiIndex.from_arrays(arrays)
+
+
+class Link():
+    """A parent to child link between two tables on key columns
+    """
+
+    def __init__(self,parent,child,keys,parent_index=None):
+        """
+
+        :param parent ukds.DataTable: the parent table, e.g. the households.
+            Its key values must be unique.
+        :param child ukds.DataTable: the child table, e.g. the diaries
+        :param keys list: the key column names, in both tables
+        :param parent_index pandas.Index: the key_index of the parent, if
+            it has already been built
+
+        :raises ValueError: if the keys of the parent table are not unique
+
+        """
+        self.parent=parent
+        self.child=child
+        self.keys=list(keys)
+        if parent_index is None:
+            parent_index=key_index(parent.tab,self.keys)
+        if not parent_index.is_unique:
+            raise ValueError('The keys %s are not unique in the parent table' % self.keys)
+        self.parent_index=parent_index
+        #: the child table the positions were found for
+        self.child_tab=child.tab
+        #: the parent row position of each child row, -1 if it has no parent
+        self.positions=parent_index.get_indexer(key_index(child.tab,self.keys))
+        self._order=None
+
+
+    @property
+    def n_parents(self):
+        return len(self.parent_index)
+
+
+    @property
+    def missing(self):
+        "A boolean array of the child rows with no parent row"
+        return self.positions<0
+
+
+    def broadcast(self,columns):
+        """Returns parent columns aligned to the child rows
+
+        Each column is taken from the parent column array by the parent row
+        positions. Child rows without a parent get missing values.
+
+        :param columns list: the parent column names
+
+        :return result: a table with the index of the child table
+        :rtype pandas.DataFrame:
+
+        """
+        if isinstance(columns,str): columns=[columns]
+        data={}
+        for col in columns:
+            data[col]=pd.api.extensions.take(self.parent.tab[col].array,
+                                             self.positions,
+                                             allow_fill=True)
+        return pd.DataFrame(data,index=self.child.tab.index,columns=columns)
+
+
+    def _sorted(self):
+        "Returns the child row positions sorted by parent row, and the parent offsets"
+        if self._order is None:
+            positions=self.positions
+            order=np.argsort(positions,kind='stable')
+            order=order[positions[order]>=0]
+            counts=np.bincount(positions[order],minlength=self.n_parents)
+            offsets=np.zeros(self.n_parents+1,dtype=np.int64)
+            np.cumsum(counts,out=offsets[1:])
+            self._order=(order,offsets)
+        return self._order
+
+
+    def child_counts(self):
+        """Returns the number of child rows of each parent row
+
+        :rtype pandas.Series:
+
+        """
+        order,offsets=self._sorted()
+        return pd.Series(np.diff(offsets),index=self.parent.tab.index)
+
+
+    def children(self,parent_position):
+        """Returns the child rows of a parent row
+
+        :param parent_position int: the position of the parent row
+
+        :rtype pandas.DataFrame:
+
+        """
+        order,offsets=self._sorted()
+        return self.child.tab.iloc[order[offsets[parent_position]:offsets[parent_position+1]]]
+
+
+    def aggregate(self,column,how='sum'):
+        """Returns a child column aggregated for each parent row
+
+        Missing child values are skipped. A parent row with no values has a
+        count of 0 and a missing sum, mean, min or max.
+
+        :param column str: the child column name, a numeric column
+        :param how str: 'count', 'sum', 'mean', 'min' or 'max'
+
+        :rtype pandas.Series:
+
+        """
+        if how not in AGGREGATIONS:
+            raise ValueError('how must be one of %s' % ', '.join(AGGREGATIONS))
+        values=pd.to_numeric(pd.Series(self.child.tab[column].array),errors='coerce').to_numpy(dtype=np.float64,na_value=np.nan)
+        n=self.n_parents
+
+        if how in ('min','max'):
+            # the child rows in parent order, so each parent is a contiguous run
+            order,offsets=self._sorted()
+            values=values[order]
+            positions=self.positions[order]
+            valid=~np.isnan(values)
+            values=values[valid]
+            positions=positions[valid]
+        else:
+            valid=(self.positions>=0)&~np.isnan(values)
+            positions=self.positions[valid]
+            values=values[valid]
+
+        counts=np.bincount(positions,minlength=n)
+        if how=='count':
+            result=counts
+        elif how in ('sum','mean'):
+            result=np.bincount(positions,weights=values,minlength=n)
+            if how=='mean':
+                with np.errstate(invalid='ignore',divide='ignore'):
+                    result=result/counts
+            result[counts==0]=np.nan
+        else:
+            offsets=np.zeros(n+1,dtype=np.int64)
+            np.cumsum(counts,out=offsets[1:])
+            result=np.full(n,np.nan)
+            has=counts>0
+            if has.any():
+                ufunc=np.minimum if how=='min' else np.maximum
+                result[has]=ufunc.reduceat(values,offsets[:-1][has])
+        return pd.Series(result,index=self.parent.tab.index,name=column)
+
+
+class LinkedTables():
+    """The tables of a study, with their links built once and kept
+    """
+
+    def __init__(self,tables=None):
+        """
+
+        :param tables dict or ukds.Study: table name to ukds.DataTable
+
+        """
+        self.tables=tables if tables is not None else {}
+        self._indexes={}
+        self._links={}
+
+
+    def add(self,name,datatable):
+        "Adds a table"
+        self.tables[name]=datatable
+
+
+    def key_index(self,name,keys):
+        """Returns the key_index of a table, built once for each table and keys
+
+        The index is rebuilt if the 'tab' attribute of the table is replaced.
+
+        """
+        dt=self.tables[name]
+        k=(name,tuple(keys))
+        cached=self._indexes.get(k)
+        if cached is None or cached[0] is not dt.tab:
+            cached=self._indexes[k]=(dt.tab,key_index(dt.tab,keys))
+        return cached[1]
+
+
+    def link(self,parent,child,keys):
+        """Returns the Link between two tables, built on first use
+
+        The link is rebuilt if the 'tab' attribute of either table is replaced.
+
+        :param parent str: the name of the parent table, e.g. 'household'
+        :param child str: the name of the child table, e.g. 'diary'
+        :param keys list: the key column names, e.g. ['serial']
+
+        :rtype Link:
+
+        """
+        if isinstance(keys,str): keys=[keys]
+        k=(parent,child,tuple(keys))
+        p=self.tables[parent]
+        c=self.tables[child]
+        link=self._links.get(k)
+        if link is None or link.parent is not p or link.child is not c \
+                or link.parent_index is not self.key_index(parent,keys) \
+                or link.child_tab is not c.tab:
+            link=self._links[k]=Link(p,c,keys,parent_index=self.key_index(parent,keys))
+        return link
+
+
+    def attach(self,child,parent,keys,columns):
+        """Returns the child table with parent columns added
+
+        :param child str: the name of the child table
+        :param parent str: the name of the parent table
+        :param keys list: the key column names
+        :param columns list: the parent column names
+
+        :rtype pandas.DataFrame:
+
+        """
+        df=self.link(parent,child,keys).broadcast(columns)
+        result=self.tables[child].tab.copy(deep=False)
+        for col in df.columns:
+            result[col]=df[col]
+        return result
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Parallel export of DataTable rdf using a pool of processes.
+
+The columns (or row ranges) of a table are split into shards and each shard
+is exported by a worker process into its own part file. The DataTable is
+sent to each worker once, when the worker starts. The part files hold the
+triples only; the prefixes are written once, to a header file, and
+merge joins the header and the parts into a single Turtle file.
+
+On Windows the processes are started by importing the main module, so the
+export must be run under an "if __name__=='__main__':" guard.
+
+"""
+
+import concurrent.futures
+import inspect
+import os
+import shutil
+
+from . import serializer
+from .sinks import FileSink
+
+COLUMNS='columns'
+ROWS='rows'
+
+# the argument of each exporter which selects the columns, and if it takes a list
+COLUMN_ARGUMENTS={'to_rdf_data_cube':('columns',True),
+                  'to_bso_variable':('variable',False),
+                  'to_rdf_bdo_observation_datums':('column_names',True)}
+
+HEADER_FILENAME='header.ttl'
+PART_FILENAME='part-%05d.ttl'
+
+_datatable=None
+
+
+def _init_worker(datatable):
+    "Keeps the DataTable in the worker process"
+    global _datatable
+    _datatable=datatable
+
+
+def _export_shard(method,shard_kind,shard,fp_part,kwargs):
+    """Exports a shard of the DataTable of the worker to a part file
+
+    :return header: the prefixes, as serialized by CreateRDF.serialize_rdf
+    :rtype str:
+
+    """
+    datatable=_datatable
+    if shard_kind==ROWS:
+        batch=type(datatable)()
+        if hasattr(datatable,'datadictionary'): batch.datadictionary=datatable.datadictionary
+        batch.tab=datatable.tab.iloc[shard[0]:shard[1]]
+        calls=[(batch,kwargs)]
+    else:
+        argument,takes_list=COLUMN_ARGUMENTS[method]
+        if takes_list:
+            calls=[(datatable,dict(kwargs,**{argument:list(shard)}))]
+        else:
+            calls=[(datatable,dict(kwargs,**{argument:column})) for column in shard]
+
+    header=None
+    with FileSink(fp_part,prefixes=False) as sink:
+        for dt,kw in calls:
+            f=getattr(dt,method)
+            if 'sink' in inspect.signature(f).parameters:
+                kw=dict(kw,sink=sink)
+            c=f(**kw)
+            sink.add(c)
+            if header is None:
+                header=c.serialize_rdf()
+    return header
+
+
+def shards(n,n_shards):
+    """Returns the (start, stop) ranges which split n items into n_shards contiguous shards
+
+    :rtype list:
+
+    """
+    n_shards=max(1,min(n_shards,n))
+    size,extra=divmod(n,n_shards)
+    result=[]
+    start=0
+    for i in range(n_shards):
+        stop=start+size+(1 if i<extra else 0)
+        result.append((start,stop))
+        start=stop
+    return result
+
+
+def merge(fp_header,fp_parts,filename,compress=None):
+    """Joins a header file and the part files into a single file
+
+    :param fp_header str: the filepath of the header
+    :param fp_parts list: the filepaths of the part files, in order
+    :param filename str: the output filepath. If it ends with '.gz' the file
+        is gzip compressed.
+    :param compress bool: see ukds.serializer.open_output
+
+    """
+    with serializer.open_output(filename,compress) as f:
+        for fp in [fp_header]+list(fp_parts):
+            with open(fp,encoding='UTF-8') as part:
+                shutil.copyfileobj(part,f,serializer.BUFFER_SIZE)
+
+
+def export(datatable,
+           method,
+           directory,
+           columns=None,
+           shard=COLUMNS,
+           processes=None,
+           n_shards=None,
+           filename=None,
+           **kwargs):
+    """Exports the rdf of a DataTable method in parallel, to part files
+
+    :param datatable ukds.DataTable: the table
+    :param method str: the exporter, one of 'to_rdf_data_cube',
+        'to_bso_variable' or 'to_rdf_bdo_observation_datums' when sharding
+        by columns, or any exporter when sharding by rows
+    :param directory str: the directory for the header and part files
+    :param columns list: the columns to export when sharding by columns.
+        If None, all the columns of the table.
+    :param shard str: 'columns' or 'rows'
+    :param processes int: the number of worker processes. If None, the
+        number of CPUs.
+    :param n_shards int: the number of shards. If None, four per process so
+        that the work is balanced.
+    :param filename str: if given, the header and the parts are merged into
+        this file and the part files are removed
+    :param kwargs: the other arguments of the exporter method,
+        e.g. base_prefix, base_uri
+
+    :return result: the filename if given, otherwise the list of the header
+        filepath and the part filepaths in order
+    :rtype str or list:
+
+    """
+    processes=processes or os.cpu_count() or 1
+    n_shards=n_shards or processes*4
+    if shard==COLUMNS:
+        if method not in COLUMN_ARGUMENTS:
+            raise ValueError('"%s" can not be sharded by columns, use shard="rows"' % method)
+        columns=list(datatable.tab.columns if columns is None else columns)
+        shard_list=[columns[a:b] for a,b in shards(len(columns),n_shards)]
+    elif shard==ROWS:
+        shard_list=shards(len(datatable.tab),n_shards)
+    else:
+        raise ValueError('shard must be "columns" or "rows"')
+
+    os.makedirs(directory,exist_ok=True)
+    fp_parts=[os.path.join(directory,PART_FILENAME % i) for i in range(len(shard_list))]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes,
+                                                initializer=_init_worker,
+                                                initargs=(datatable,)) as executor:
+        futures=[executor.submit(_export_shard,method,shard,x,fp,kwargs)
+                 for x,fp in zip(shard_list,fp_parts)]
+        headers=[future.result() for future in futures]
+
+    fp_header=os.path.join(directory,HEADER_FILENAME)
+    with open(fp_header,'w',encoding='UTF-8') as f:
+        f.write(next((h for h in headers if h),''))
+
+    if filename is None:
+        return [fp_header]+fp_parts
+    merge(fp_header,fp_parts,filename)
+    for fp in [fp_header]+fp_parts:
+        os.remove(fp)
+    return filename
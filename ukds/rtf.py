@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""A forward-scanning tokenizer for UK Data Service .rtf data dictionary files.
+
+The text is never split or copied as a whole. Each variable block is located
+with find between successive 'Pos. = ' markers and only the short field
+values are sliced out, so parsing runs in linear time in the size of the file.
+
+The text can be a str, or a bytes-like object such as an mmap.mmap of the
+file, in which case only the field values are decoded.
+
+"""
+
+from collections import namedtuple
+
+Markers=namedtuple('Markers',['POS','VARIABLE','VARIABLE_LABEL','VARIABLE_TYPE',
+                              'SPSS_MEASUREMENT_LEVEL','SPSS_USER_MISSING_VALUES',
+                              'VALUE','LABEL','TAB','SPACE','PAR','BRACE'])
+
+STR_MARKERS=Markers(POS='Pos. = ',
+                    VARIABLE='Variable = ',
+                    VARIABLE_LABEL='Variable label = ',
+                    VARIABLE_TYPE='This variable is  ',
+                    SPSS_MEASUREMENT_LEVEL='the SPSS measurement level is ',
+                    SPSS_USER_MISSING_VALUES='SPSS user missing values = ',
+                    VALUE='Value = ',
+                    LABEL='Label = ',
+                    TAB='\t',
+                    SPACE=' ',
+                    PAR='\\par',
+                    BRACE='}')
+
+BYTES_MARKERS=Markers(*[x.encode('ascii') for x in STR_MARKERS])
+
+
+def _piece(text,marker,start,end):
+    """Returns the span of text following the first marker in text[start:end]
+
+    The span runs up to the next occurrence of the marker or to end, as
+    for text[start:end].split(marker)[1].
+
+    :return span: (i,j) or None if the marker is not found
+    :rtype tuple:
+
+    """
+    i=text.find(marker,start,end)
+    if i<0: return None
+    i+=len(marker)
+    j=text.find(marker,i,end)
+    return (i,end if j<0 else j)
+
+
+def _field(text,m,start,end,stop):
+    """Returns the span between the first space and the first 'stop' in text[start:end]
+    """
+    i1=text.find(m.SPACE,start,end)+1 or start
+    i2=text.find(stop,start,end)
+    if i2<0: i2=end-1
+    return (i1,max(i1,i2))
+
+
+def _field_after_space(text,m,start,end,stop):
+    """Returns the span between the first space and the next 'stop' after it in text[start:end]
+    """
+    i1=text.find(m.SPACE,start,end)+1 or start
+    i2=text.find(stop,i1,end)
+    return (i1,i1 if i2<0 else i2)
+
+
+def _value_labels(text,m,decode,start,end):
+    "Returns the value labels dictionary for a variable block"
+    z={}
+    i=text.find(m.VALUE,start,end)
+    while i>=0:
+        i+=len(m.VALUE)
+        j=text.find(m.VALUE,i,end)
+        e_end=end if j<0 else j
+        value=float(decode(text,*_field(text,m,i,e_end,m.TAB)))
+        span=_piece(text,m.LABEL,i,e_end)
+        if span is None:
+            raise ValueError('No "Label = " found for value at position %s' % i)
+        z[value]=decode(text,*_field(text,m,span[0],span[1],m.PAR))
+        i=j
+    return z
+
+
+def _variable_dict(text,m,decode,start,end):
+    "Returns the variable dictionary for the variable block text[start:end]"
+
+    span=_piece(text,m.VARIABLE,start,end)
+    variable=decode(text,*_field(text,m,span[0],span[1],m.TAB)) if span else None
+
+    span=_piece(text,m.VARIABLE_LABEL,start,end)
+    variable_label=decode(text,*_field(text,m,span[0],span[1],m.PAR)) if span else None
+
+    span=_piece(text,m.VARIABLE_TYPE,start,end)
+    variable_type=decode(text,*_field_after_space(text,m,span[0],span[1],m.BRACE)) if span else ''
+
+    span=_piece(text,m.SPSS_MEASUREMENT_LEVEL,start,end)
+    SPSS_measurement_level=decode(text,*_field_after_space(text,m,span[0],span[1],m.PAR)) if span else ''
+
+    span=_piece(text,m.SPSS_USER_MISSING_VALUES,start,end)
+    if span:
+        g=decode(text,*_field_after_space(text,m,span[0],span[1],m.PAR)).split(' ')
+        SPSS_user_missing_values=' '.join(g[0:5:2])
+    else:
+        SPSS_user_missing_values=dict()
+
+    return {'pos':decode(text,*_field(text,m,start,end,m.TAB)),
+            'variable':variable,
+            'variable_label':variable_label,
+            'variable_type':variable_type,
+            'SPSS_measurement_level':SPSS_measurement_level,
+            'SPSS_user_missing_values':SPSS_user_missing_values,
+            'value_labels':_value_labels(text,m,decode,start,end)
+            }
+
+
+def iter_variable_dicts(text,encoding='cp1252'):
+    """Yields a dictionary for each variable in the contents of a .rtf data dictionary file
+
+    :param text str or bytes-like: the contents of a UK Data Service .rtf 
+        data dictionary file, e.g. a str, bytes or an mmap.mmap of the file
+    :param encoding str: the encoding used to decode the field values when 
+        text is bytes-like
+
+    :return: a generator of dictionaries, each with the following items:
+                 {'pos': ... ,
+                  'variable': ... ,
+                  'variable_label': ... ,
+                  'variable_type': ... ,
+                  'SPSS_measurement_level': ... ,
+                  'SPSS_user_missing_values': ... ,
+                  'value_labels': ... }
+
+    """
+    if isinstance(text,str):
+        m=STR_MARKERS
+        decode=lambda text,i,j: text[i:j]
+    else:
+        m=BYTES_MARKERS
+        decode=lambda text,i,j: text[i:j].decode(encoding)
+        
+    n=len(text)
+    i=text.find(m.POS)
+    while i>=0:
+        start=i+len(m.POS)
+        i=text.find(m.POS,start)
+        yield _variable_dict(text,m,decode,start,n if i<0 else i)
+
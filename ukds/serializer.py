@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Streaming Turtle and N-Triples serialization of UKDS data tables.
+
+The rows of a table are written in blocks. Each block is taken as a 2-d
+NumPy array and all its triples are formatted with a single '%' operation on
+a template repeated for every row, so no pandas object is created per row.
+Memory use depends on the block size, not on the size of the table.
+
+"""
+
+import gzip
+import io
+
+import numpy as np
+
+TURTLE='turtle'
+NTRIPLES='nt'
+
+FORMATS={'turtle':TURTLE,
+         'ttl':TURTLE,
+         'nt':NTRIPLES,
+         'ntriples':NTRIPLES,
+         'n-triples':NTRIPLES}
+
+DEFAULT_BLOCKSIZE=10000
+
+BUFFER_SIZE=1024*1024
+
+# fast compression, the repeated property names compress well at any level
+COMPRESSLEVEL=1
+
+_NTRIPLES_ESCAPES=str.maketrans({'\\':'\\\\',
+                                 '"':'\\"',
+                                 '\n':'\\n',
+                                 '\r':'\\r'})
+
+
+def get_format(format):
+    """Returns the serialization format
+
+    :param format str: 'turtle' ('ttl') or 'nt' ('ntriples')
+
+    :rtype str:
+
+    """
+    try:
+        return FORMATS[format.lower()]
+    except KeyError:
+        raise ValueError('Unknown rdf format "%s", use "turtle" or "nt"' % format)
+
+
+def open_output(filename,compress=None):
+    """Opens a buffered text file for writing rdf
+
+    :param filename str: the filepath
+    :param compress bool: if True the file is gzip compressed. If None, the
+        file is compressed if filename ends with '.gz'.
+
+    :rtype file object:
+
+    """
+    if compress is None: compress=filename.lower().endswith('.gz')
+    if compress:
+        return io.TextIOWrapper(io.BufferedWriter(gzip.open(filename,'wb',compresslevel=COMPRESSLEVEL),
+                                                  buffer_size=BUFFER_SIZE),
+                                encoding='UTF-8')
+    return open(filename,'w',encoding='UTF-8',buffering=BUFFER_SIZE)
+
+
+def _cells(block):
+    """Returns the cells of a 2-d array, row by row, as python objects
+
+    NumPy scalars are converted to python objects, as in
+    pandas.Series.to_dict, so values are written as DataFrame.iterrows
+    would give them.
+
+    """
+    cells=block.ravel().tolist()
+    if block.dtype==object:
+        cells=[v.item() if isinstance(v,np.generic) else v for v in cells]
+    return cells
+
+
+def turtle_values(values,numeric):
+    """Returns the Turtle terms of the values of a column
+
+    Numeric values are written as Turtle numbers and other values as quoted
+    strings. Turtle has no term for a missing value, so these are None.
+
+    :param values pandas.Series: the column
+    :param numeric bool: if True, the values are written as numbers
+
+    :rtype list:
+
+    """
+    missing=values.isna().to_numpy()
+    values=values.tolist()
+    if numeric:
+        terms=[str(v) for v in values]
+    else:
+        terms=['"%s"' % str(v).translate(_NTRIPLES_ESCAPES) for v in values]
+    for i in missing.nonzero()[0].tolist():
+        terms[i]=None
+    return terms
+
+
+def write_header(f,prefix,uri,format=TURTLE):
+    """Writes the prefix declaration of a Turtle file
+
+    Nothing is written for N-Triples, which has no prefixes.
+
+    """
+    if get_format(format)==TURTLE:
+        f.write('@prefix %s: <%s> .\n' % (prefix,uri))
+        f.write('\n')
+
+
+def write_rows(f,df,prefix,uri,format=TURTLE,blocksize=DEFAULT_BLOCKSIZE):
+    """Writes the rows of a DataFrame as rdf, one resource per row
+
+    In Turtle each row is a blank node '[]' with a property 'prefix:column'
+    for each column, as in the original DataTable.to_ttl. In N-Triples each
+    row is the blank node '_:r<index>', where index is the row label, and
+    the properties are the full uris '<uri column>'.
+
+    :param f file object: a text file, see open_output
+    :param df pandas.DataFrame: the table
+    :param prefix str: the prefix of the property names
+    :param uri str: the uri of the property names
+    :param format str: 'turtle' or 'nt'
+    :param blocksize int: the number of rows formatted at a time
+
+    """
+    format=get_format(format)
+    columns=[str(k).replace('%','%%') for k in df.columns]
+    if format==TURTLE:
+        p=prefix.replace('%','%%')
+        row_template='[] %s . \n\n' % ' ;\n\t'.join('%s:%s "%%s"' % (p,k) for k in columns)
+    else:
+        u=uri.replace('%','%%')
+        row_template=''.join('_:r%%s <%s%s> "%%s" .\n' % (u,k) for k in columns)
+
+    m=len(columns)
+    for start in range(0,len(df),blocksize):
+        block=df.iloc[start:start+blocksize]
+        n=len(block)
+        values=block.to_numpy()
+        cells=_cells(values)
+        if format==NTRIPLES:
+            if values.dtype==object:
+                cells=[str(v).translate(_NTRIPLES_ESCAPES) for v in cells]
+            # each cell is preceded by the blank node of its row
+            args=np.empty((n,m*2),dtype=object)
+            args[:,0::2]=np.asarray(block.index.tolist(),dtype=object)[:,None]
+            args[:,1::2]=np.asarray(cells,dtype=object).reshape(n,m)
+            cells=args.ravel().tolist()
+        f.write((row_template*n) % tuple(cells))
+
+
+def write_table(f,df,prefix,uri,format=TURTLE,blocksize=DEFAULT_BLOCKSIZE):
+    "Writes the header and the rows of a DataFrame as rdf, see write_rows"
+    write_header(f,prefix,uri,format)
+    write_rows(f,df,prefix,uri,format,blocksize)
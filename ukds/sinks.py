@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Triple sinks for the RDF exporters.
+
+An exporter which is given a sink builds all its triples in a single
+fairly.CreateRDF instance and hands it to the sink after each variable or
+column. The sink takes the rdf text and resets the CreateRDF instance, so
+the rdf string held in memory stays small and the cost of an export grows
+linearly with the number of triples.
+
+    sink=ukds.sinks.FileSink('uktus15_household.ttl')
+    with sink:
+        dt.to_rdf_bdo_observation_datums('eg','http://example.com/',
+                                         column_names,sink=sink)
+
+"""
+
+from . import serializer
+
+
+class Sink():
+    """The base class of the triple sinks
+    """
+
+    def add(self,createRDF):
+        """Takes the rdf of a CreateRDF instance, then resets its rdf
+
+        The prefixes of the CreateRDF instance are kept, so it can be used
+        for the next triples.
+
+        :param createRDF fairly.CreateRDF: the triples
+
+        """
+        if createRDF.rdf:
+            self.write(createRDF)
+        createRDF.reset_rdf()
+
+
+    def write(self,createRDF):
+        "Writes the rdf of a CreateRDF instance"
+        raise NotImplementedError
+
+
+    def close(self):
+        "Closes the sink"
+        pass
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self,*args):
+        self.close()
+
+
+class ListSink(Sink):
+    """A sink which keeps the rdf as a list of text chunks
+    """
+
+    def __init__(self):
+        self.chunks=[]
+
+
+    def write(self,createRDF):
+        self.chunks.append(createRDF.rdf)
+
+
+    @property
+    def rdf(self):
+        "The rdf text of all the chunks"
+        return ''.join(self.chunks)
+
+
+class FileSink(Sink):
+    """A sink which writes the rdf to a Turtle file
+
+    The first chunk is written with its prefixes, using
+    CreateRDF.serialize_rdf, and the following chunks as rdf only.
+    """
+
+    def __init__(self,filename,compress=None,prefixes=True):
+        """
+
+        :param filename str: the filepath. If it ends with '.gz' the file is
+            gzip compressed.
+        :param compress bool: if True the file is gzip compressed. If None,
+            this is taken from the file extension.
+        :param prefixes bool: if False, the prefixes are not written, e.g.
+            for a part file which is joined to a header later
+
+        """
+        self.filename=filename
+        self.file=serializer.open_output(filename,compress)
+        self.started=not prefixes
+
+
+    def write(self,createRDF):
+        if self.started:
+            self.file.write(createRDF.rdf)
+        else:
+            self.file.write(createRDF.serialize_rdf())
+            self.started=True
+
+
+    def close(self):
+        self.file.close()
+
+
+class CallbackSink(Sink):
+    """A sink which calls a function with each CreateRDF instance
+
+    The function is called before the rdf is reset, so it can serialize or
+    upload the chunk, e.g. lambda c: fuseki.update_request(...).
+    """
+
+    def __init__(self,function):
+        """
+
+        :param function function: a function which takes a
+            fairly.CreateRDF instance
+
+        """
+        self.function=function
+
+
+    def write(self,createRDF):
+        self.function(createRDF)
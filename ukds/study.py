@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""Loading all the tables of a UK Data Archive download.
+
+A download such as 'UKDA-8128-tab' has the data tables in a 'tab'
+directory and their data dictionaries in 'mrdoc/allissue', named
+'<table>.tab' and '<table>_ukda_data_dictionary.rtf'. A Study finds these
+files and pairs them by table name, and gives each table as a DataTable:
+
+    study=ukds.Study(r'.../UKDA-8128-tab')
+    study.names                          # ['uktus15_dv_time_vars', ...]
+    dt=study['uktus15_household']        # reads this table only
+    study.load()                         # reads all the tables at once
+
+The download can also be given as its zip archive, which is read without
+being extracted, e.g. ukds.Study(r'.../8128tab.zip').
+
+A table is read when it is first asked for. load reads all the tables
+concurrently: the .rtf files are parsed in a pool of processes, as the
+parser is pure python, and the .tab files are read in a pool of threads,
+as the pandas parser releases the GIL. The time taken is then close to
+that of the largest table.
+
+On Windows the processes are started by importing the main module, so
+load must be run under an "if __name__=='__main__':" guard.
+
+"""
+
+import concurrent.futures
+import os
+import re
+import threading
+
+from . import archive
+from .data_dictionary import DataDictionary
+from .data_table import DataTable
+
+TAB_EXTENSION='.tab'
+RTF_SUFFIX='_ukda_data_dictionary.rtf'
+
+
+def find_files(directory):
+    """Returns the .tab and .rtf files of a UKDA download, paired by table name
+
+    The whole directory tree is searched, so the download directory, or a
+    directory with the files side by side, can be given. This can also be
+    a zip archive of the download, or a directory within one, and the
+    filepaths then run through the archive, see ukds.archive.
+
+    :param directory str: the directory or zip archive
+
+    :return result: a dictionary of table name to a (fp_tab, fp_rtf) tuple,
+        sorted by name. fp_rtf is None if the table has no data dictionary.
+    :rtype dict:
+
+    """
+    if os.path.isdir(directory):
+        fps=[]
+        for root,dirs,files in os.walk(directory):
+            dirs.sort()
+            fps.extend(os.path.join(root,x) for x in sorted(files))
+    else:
+        fps=sorted(archive.list_files(directory))
+    tabs={}
+    rtfs={}
+    for fp in fps:
+        x=re.split(r'[\\/]',fp)[-1]
+        lower=x.lower()
+        if lower.endswith(RTF_SUFFIX):
+            rtfs.setdefault(lower[:-len(RTF_SUFFIX)],fp)
+        elif lower.endswith(TAB_EXTENSION):
+            tabs.setdefault(x[:-len(TAB_EXTENSION)],fp)
+    return {name:(fp,rtfs.get(name.lower())) for name,fp in sorted(tabs.items())}
+
+
+def _parse_rtf(fp_rtf,cache=None):
+    "Returns the variable dictionaries of a .rtf file, run in a worker process"
+    return DataDictionary(fp_rtf,memory_map=True,cache=cache).variable_dicts()
+
+
+class Study():
+    """The tables of a UK Data Archive download, read on first use
+    """
+
+    def __init__(self,directory,dtypes=True,threads=None,processes=None,cache=None):
+        """
+
+        :param directory str: the directory of the download, e.g. 'UKDA-8128-tab',
+            or a zip archive of it
+        :param dtypes bool or dict: passed to DataTable.read_tab for the
+            tables which have a data dictionary
+        :param threads int: the number of threads which read the .tab files.
+            If None, the number of CPUs plus four.
+        :param processes int: the number of processes which parse the .rtf
+            files. If None, the number of CPUs. If 0, the files are parsed
+            in the threads.
+        :param cache bool, str or ukds.cache.DataDictionaryCache: a cache of
+            parsed data dictionaries, see DataDictionary.read_rtf
+
+        :raises ValueError: if there are no .tab files in the directory
+
+        """
+        self.directory=directory
+        self.files=find_files(directory)
+        if not self.files:
+            raise ValueError('No .tab files found in "%s"' % directory)
+        self.dtypes=dtypes
+        self.threads=threads or (os.cpu_count() or 1)+4
+        self.processes=(os.cpu_count() or 1) if processes is None else processes
+        self.cache=cache
+        self._tables={}
+        self._lock=threading.Lock()
+        self._thread_pool=None
+        self._process_pool=None
+
+
+    @property
+    def names(self):
+        "The table names, sorted"
+        return list(self.files)
+
+
+    def __len__(self):
+        return len(self.files)
+
+
+    def __iter__(self):
+        return iter(self.files)
+
+
+    def __contains__(self,name):
+        return name in self.files
+
+
+    def __getitem__(self,name):
+        """Returns the DataTable of a table, reading it if needed
+
+        If the table is being read by load, this waits for it.
+
+        """
+        if name not in self.files:
+            raise KeyError('Table "%s" is not in the study' % name)
+        with self._lock:
+            future=self._tables.get(name)
+            if future is None:
+                future=self._tables[name]=concurrent.futures.Future()
+                run=True
+            else:
+                run=False
+        if run:
+            # read in the calling thread, without starting the pools
+            try:
+                future.set_result(self._read_table(name,parse=_parse_rtf))
+            except BaseException as err:
+                future.set_exception(err)
+        return future.result()
+
+
+    def is_loaded(self,name):
+        "Returns True if a table has been read"
+        future=self._tables.get(name)
+        return future is not None and future.done() and future.exception() is None
+
+
+    def load(self,names=None):
+        """Reads tables concurrently
+
+        :param names list: the table names. If None, all the tables.
+
+        :return self:
+        :rtype Study:
+
+        """
+        names=self.names if names is None else names
+        for name in names:
+            if name not in self.files:
+                raise KeyError('Table "%s" is not in the study' % name)
+        futures=[]
+        with self._lock:
+            for name in names:
+                future=self._tables.get(name)
+                if future is None:
+                    future=self._tables[name]=self._pool().submit(self._read_table,name,self._parse_in_pool)
+                futures.append(future)
+        for future in futures:
+            future.result()
+        return self
+
+
+    def _pool(self):
+        "Returns the thread pool, starting the pools on first use"
+        if self._thread_pool is None:
+            self._thread_pool=concurrent.futures.ThreadPoolExecutor(max_workers=self.threads)
+            if self.processes:
+                self._process_pool=concurrent.futures.ProcessPoolExecutor(max_workers=self.processes)
+        return self._thread_pool
+
+
+    def _parse_in_pool(self,fp_rtf,cache):
+        "Parses a .rtf file in the process pool, if there is one"
+        if self._process_pool is None:
+            return _parse_rtf(fp_rtf,cache)
+        return self._process_pool.submit(_parse_rtf,fp_rtf,cache).result()
+
+
+    def _read_table(self,name,parse):
+        "Reads a table and its data dictionary"
+        fp_tab,fp_rtf=self.files[name]
+        dt=DataTable()
+        if fp_rtf is None:
+            dt.read_tab(fp_tab)
+        else:
+            dt.datadictionary=DataDictionary.from_variable_dicts(parse(fp_rtf,self.cache))
+            dt.read_tab(fp_tab,dtypes=self.dtypes)
+        return dt
+
+
+    def close(self):
+        "Shuts down the thread and process pools"
+        for pool in (self._thread_pool,self._process_pool):
+            if pool is not None: pool.shutdown(wait=True)
+        self._thread_pool=None
+        self._process_pool=None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self,*args):
+        self.close()
+
+
+    def __repr__(self):
+        return '<Study %r: %s tables, %s read>' % (self.directory,len(self.files),
+                                                  sum(self.is_loaded(x) for x in self.files))
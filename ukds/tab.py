@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+"""Reading UK Data Service .tab data table files into pandas.
+
+"""
+
+import fnmatch
+import io
+import itertools
+import re
+import numpy as np
+import pandas as pd
+from .archive import source, open_file
+
+DEFAULT_CHUNKSIZE=100000
+
+
+def read_csv_kwargs(dtypes=None):
+    """Returns the pandas.read_csv keyword arguments for a .tab file
+
+    :param dtypes dict: a dictionary of column name to dtype. If None,
+        pandas infers the dtypes.
+
+    :rtype dict:
+
+    """
+    kwargs=dict(sep='\t',
+                skipinitialspace=True,
+                )
+    if dtypes:
+        # only blank numeric cells are missing values, other text is kept
+        kwargs.update(dtype=dtypes,
+                      na_values={k:[''] for k,v in dtypes.items() if v=='float64'},
+                      keep_default_na=False,
+                      )
+    else:
+        kwargs.update(#dtype=str,
+                      low_memory=False,
+                      na_filter=False,
+                      )
+    return kwargs
+
+
+def downcast(series):
+    """Returns a numeric column in the smallest dtype which holds its values exactly
+
+    Columns of whole numbers without missing values become the smallest
+    integer type. Other columns become float32 if this is lossless,
+    otherwise they are left as float64.
+
+    :param series pandas.Series: a float64 column
+
+    :rtype pandas.Series:
+
+    """
+    values=series.to_numpy()
+    finite=np.isfinite(values)
+    if finite.all() and (values==np.floor(values)).all():
+        return pd.to_numeric(series,downcast='integer')
+    values32=values.astype(np.float32)
+    if ((values32==values)|~finite).all():
+        return series.astype(np.float32)
+    return series
+
+
+def downcast_frame(df,dtypes):
+    """Downcasts the numeric columns of df, in place
+
+    The 'int64' columns of dtypes, which the parser has checked are whole
+    numbers, become the smallest integer type which holds their range.
+    The 'float64' columns are downcast, see downcast.
+
+    """
+    for col in df.columns:
+        v=dtypes.get(col)
+        if v=='int64' and df[col].dtype==np.int64:
+            df[col]=pd.to_numeric(df[col],downcast='integer')
+        elif v=='float64' and df[col].dtype==np.float64:
+            df[col]=downcast(df[col])
+    return df
+
+
+def float_dtypes(dtypes):
+    "Returns dtypes with the 'int64' columns as 'float64', which allows blanks and fractions"
+    return {k:('float64' if v=='int64' else v) for k,v in dtypes.items()}
+
+
+def convert_numeric(df,dtypes):
+    """Converts the columns of df read as text which are numeric in dtypes, in place
+
+    A column is converted to float64 if all its values are numbers or blank,
+    otherwise it is left as text.
+
+    """
+    for k,v in dtypes.items():
+        if v=='float64' and k in df.columns:
+            s=df[k].replace('',np.nan)
+            try:
+                df[k]=pd.to_numeric(s).astype(np.float64)
+            except (ValueError,TypeError):
+                pass
+    return df
+
+
+def read_header(fp_tab):
+    """Returns the column names of a .tab file
+
+    :param fp_tab str: a filepath to a UK Data Service .tab data table file,
+        which may be inside a zip archive, see ukds.archive
+
+    :rtype list:
+
+    """
+    with source(fp_tab) as f:
+        return list(pd.read_csv(f,sep='\t',nrows=0).columns)
+
+
+def select_columns(names,columns):
+    """Returns the names which match a column selection, in file order
+
+    :param names list: the column names of the file
+    :param columns list: a list of variable names, shell-style wildcard
+        patterns such as 'act1_*', or compiled regular expressions which
+        must match the whole name
+
+    :raises KeyError: if a name or pattern does not match any column
+
+    :rtype list:
+
+    """
+    if isinstance(columns,(str,re.Pattern)): columns=[columns]
+    selected=set()
+    for x in columns:
+        if isinstance(x,re.Pattern):
+            matches=[name for name in names if x.fullmatch(name)]
+        elif x in names:
+            matches=[x]
+        else:
+            matches=fnmatch.filter(names,x)
+        if not matches:
+            raise KeyError('No column matches "%s"' % getattr(x,'pattern',x))
+        selected.update(matches)
+    return [name for name in names if name in selected]
+
+
+def _read(fp_tab,dtypes,usecols,where,chunksize,numeric=None):
+    """Reads a .tab file with pandas.read_csv, filtering the rows of each chunk
+
+    If 'numeric' is given, the text columns which are numeric in it are
+    converted for the predicate only, and the rows are kept as text.
+
+    """
+    kwargs=read_csv_kwargs(dtypes)
+    if usecols is not None: kwargs['usecols']=usecols
+    if where is None:
+        with source(fp_tab) as f:
+            return pd.read_csv(f,**kwargs)
+    
+    chunks=[]
+    with source(fp_tab) as f, pd.read_csv(f,chunksize=chunksize,**kwargs) as reader:
+        for chunk in reader:
+            if numeric is None:
+                chunks.append(chunk[where(chunk)])
+            else:
+                chunks.append(chunk[where(convert_numeric(chunk.copy(),numeric))])
+    if not chunks:
+        with source(fp_tab) as f:
+            return pd.read_csv(f,nrows=0,**kwargs)
+    if len(chunks)==1: return chunks[0]
+    df=pd.concat(chunks)
+    # chunks with different categories are concatenated as object columns
+    for k,v in (dtypes or {}).items():
+        if v=='category' and k in df.columns and not isinstance(df[k].dtype,pd.CategoricalDtype):
+            df[k]=df[k].astype('category')
+    return df
+
+
+def read_tab(fp_tab,dtypes=None,columns=None,where=None,chunksize=DEFAULT_CHUNKSIZE):
+    """Reads a .tab file into a DataFrame
+
+    :param fp_tab str: a filepath to a UK Data Service .tab data table file,
+        which may be inside a zip archive, see ukds.archive
+    :param dtypes dict: a dictionary of column name to dtype,
+        e.g. from DataDictionary.dtypes. Integer coded ('int64') columns 
+        are parsed as integers and narrowed to the smallest integer type 
+        which holds their range. If one holds blanks or fractions, the 
+        integer coded columns are read as 'float64' instead. Numeric 
+        ('float64') columns are downcast after reading. If a numeric column
+        holds text, that column is read as text instead. If None, pandas 
+        infers the dtypes.
+    :param columns list: the columns to read, see select_columns. 
+        Only these fields are converted by the parser. If None, all columns 
+        are read.
+    :param where function: a row predicate which takes a DataFrame and 
+        returns a boolean Series, e.g. lambda df: df['IMonth']==1. The file 
+        is read in chunks of 'chunksize' rows and the predicate is applied to
+        each chunk, so only the matching rows are kept in memory. The row 
+        index of the file is kept.
+    :param chunksize int: the number of rows in a chunk when 'where' is given
+
+    :rtype pandas.DataFrame:
+
+    """
+    usecols=None
+    if columns is not None:
+        usecols=select_columns(read_header(fp_tab),columns)
+        if dtypes: dtypes={k:v for k,v in dtypes.items() if k in usecols}
+    
+    if not dtypes:
+        return _read(fp_tab,None,usecols,where,chunksize)
+
+    try:
+        df=_read(fp_tab,dtypes,usecols,where,chunksize)
+    except ValueError:
+        df=None
+    
+    if df is None and 'int64' in dtypes.values():
+        # an integer coded column holds blanks or fractions, so read these
+        # columns as 'float64'
+        dtypes=float_dtypes(dtypes)
+        try:
+            df=_read(fp_tab,dtypes,usecols,where,chunksize)
+        except ValueError:
+            pass
+    
+    if df is None:
+        # a numeric column holds text, so read these columns as text and
+        # convert the ones which are numeric. The rows are selected as they
+        # are read, using the converted values.
+        text_dtypes={k:(str if v=='float64' else v) for k,v in dtypes.items()}
+        df=_read(fp_tab,text_dtypes,usecols,where,chunksize,numeric=dtypes)
+        convert_numeric(df,dtypes)
+
+    return downcast_frame(df,dtypes)
+
+
+def iter_tab(fp_tab,batchsize=DEFAULT_CHUNKSIZE,dtypes=None,columns=None,where=None):
+    """Yields a .tab file as DataFrames of 'batchsize' rows
+
+    The file is read once, a batch of lines at a time, and only one batch 
+    is held in memory. The index of each batch is the row number in the 
+    file. Numeric columns are not downcast, so that
+    all batches have the same dtypes.
+
+    :param fp_tab str: a filepath to a UK Data Service .tab data table file,
+        which may be inside a zip archive, see ukds.archive
+    :param batchsize int: the number of rows read for each batch
+    :param dtypes dict: a dictionary of column name to dtype, see read_tab.
+        Integer coded ('int64') columns are read as 'float64', as a later
+        batch may hold blanks. If a numeric column holds text, the batch where the text is found
+        is read as text and its numeric columns converted back, so only
+        that column of that batch is text.
+    :param columns list: the columns to read, see select_columns
+    :param where function: a row predicate applied to each batch, see read_tab.
+        Batches can then have fewer than 'batchsize' rows.
+
+    :rtype generator:
+
+    """
+    usecols=None
+    if columns is not None:
+        usecols=select_columns(read_header(fp_tab),columns)
+        if dtypes: dtypes={k:v for k,v in dtypes.items() if k in usecols}
+    if dtypes: dtypes=float_dtypes(dtypes)
+
+    kwargs=read_csv_kwargs(dtypes)
+    if usecols is not None: kwargs['usecols']=usecols
+    text_kwargs=None
+    
+    n=0
+    with open_file(fp_tab,'rb') as f:
+        header=f.readline()
+        while True:
+            # the lines of a batch are parsed from memory, so that a batch
+            # which fails can be parsed again without rereading the file
+            lines=list(itertools.islice(f,batchsize))
+            if not lines: return
+            data=header+b''.join(lines)
+            try:
+                chunk=pd.read_csv(io.BytesIO(data),**kwargs)
+            except ValueError:
+                if not dtypes or 'float64' not in dtypes.values(): raise
+                # a numeric column holds text, so read the batch with the
+                # numeric columns as text and convert those which are numeric
+                if text_kwargs is None:
+                    text_dtypes={k:(str if v=='float64' else v) for k,v in dtypes.items()}
+                    text_kwargs=read_csv_kwargs(text_dtypes)
+                    if usecols is not None: text_kwargs['usecols']=usecols
+                chunk=pd.read_csv(io.BytesIO(data),**text_kwargs)
+                convert_numeric(chunk,dtypes)
+            chunk.index=pd.RangeIndex(n,n+len(chunk))
+            n+=len(chunk)
+            yield chunk[where(chunk)] if where is not None else chunk
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Interned uris for the RDF exporters.
+
+The exporters name their resources with the same few patterns, such as
+'eg:variable_HhOut', 'eg:code_HhOut_110.0' and 'eg:observation_0'. A
+TermFactory is bound to a base prefix and formats each uri of a variable
+or a value once: later requests for the same uri return the same string
+object. The uris of rows are not interned, as a table may have millions
+of them; the observation uris of a table index are built once as a list
+and kept only until another index is used. The
+DataTable and DataDictionary of a dataset share one TermFactory for each
+base prefix, see DataDictionary.term_factory.
+
+    t=dt.term_factory('eg')
+    t.variable('HhOut')        # 'eg:variable_HhOut'
+    t.code('HhOut',110.0)      # 'eg:code_HhOut_110.0'
+    t.observations(dt.tab.index)
+
+"""
+
+# the local part of each kind of uri
+TEMPLATES={'survey':'survey',
+           'sample':'sample',
+           'variable':'variable_%s',
+           'value':'value_%s',
+           'scale':'scale_%s',
+           'category':'category_%s_%s',
+           'code':'code_%s_%s',
+           'code_prefix':'code_%s_',
+           'concept':'concept_%s_%s',
+           'observation':'observation_%s',
+           'observation_datum_prefix':'observation_datum_',
+           'observation_set':'observation_set',
+           'data_set':'data_set',
+           'variable_set':'variable_set',
+           'characteristic':'characteristic_%s',
+           'category_set':'category_set_%s',
+           # RDF Data Cube
+           'dataset':'dataset',
+           'dsd':'dsd',
+           'sk':'sk',
+           'dp':'dp-%s',
+           'dcs':'dcs-%s',
+           'acs':'acs-%s',
+           'mp':'mp-%s',
+           'mcs':'mcs-%s',
+           'obs_prefix':'obs-%s-',
+           'slice':'slice-%s',
+           'concept_scheme':'concept_scheme-%s',
+           'cube_concept':'concept-%s-%s'}
+
+# the kinds of uri with one for each row, which are formatted but not interned
+ROW_KINDS=('observation',)
+
+
+class TermFactory():
+    """Formats and interns the uris of the exporters for one base prefix
+    """
+
+    def __init__(self,base_prefix):
+        """
+
+        :param base_prefix str: the base prefix of the uris, e.g. 'eg'
+
+        """
+        self.base_prefix=base_prefix
+        self._uris={}
+        self._index=None
+
+
+    def __reduce__(self):
+        # the cached uris are rebuilt as needed, not pickled
+        return (TermFactory,(self.base_prefix,))
+
+
+    def uri(self,kind,*args):
+        """Returns a uri, formatting it on first use
+
+        The uris of the kinds in ROW_KINDS are formatted on every use.
+
+        :param kind str: a key of TEMPLATES, e.g. 'variable'
+        :param args: the values of the template, e.g. the variable name
+
+        :rtype str:
+
+        """
+        if kind in ROW_KINDS:
+            return '%s:%s' % (self.base_prefix,TEMPLATES[kind] % args)
+        # keyed by type as well, as 1 and 1.0 are equal keys but different uris
+        key=(kind,args,tuple(x.__class__ for x in args))
+        try:
+            return self._uris[key]
+        except KeyError:
+            pass
+        result=self._uris[key]='%s:%s' % (self.base_prefix,TEMPLATES[kind] % args)
+        return result
+
+
+    def variable(self,variable):
+        "Returns the uri of a variable, e.g. 'eg:variable_HhOut'"
+        return self.uri('variable',variable)
+
+
+    def code(self,variable,value):
+        "Returns the uri of a coded value, e.g. 'eg:code_HhOut_110.0'"
+        return self.uri('code',variable,value)
+
+
+    def code_prefix(self,variable):
+        "Returns the start of the code uris of a variable, e.g. 'eg:code_HhOut_'"
+        return self.uri('code_prefix',variable)
+
+
+    def concept(self,variable,value):
+        "Returns the uri of the concept of a coded value, e.g. 'eg:concept_HhOut_110.0'"
+        return self.uri('concept',variable,value)
+
+
+    def observation(self,row_index):
+        """Returns the uri of the observation of a row, e.g. 'eg:observation_0'
+
+        The uri is not interned, use observations for the rows of a table.
+
+        """
+        return self.uri('observation',row_index)
+
+
+    def index_strings(self,index):
+        """Returns the labels of a table index as strings, built once per index
+
+        :param index pandas.Index: the index, e.g. DataTable.tab.index
+
+        :rtype list:
+
+        """
+        return self._index_terms(index)[1]
+
+
+    def observations(self,index):
+        """Returns the observation uris of the rows of a table, built once per index
+
+        :param index pandas.Index: the index, e.g. DataTable.tab.index
+
+        :rtype list:
+
+        """
+        terms=self._index_terms(index)
+        if terms[2] is None:
+            prefix=self.uri('observation','')
+            terms[2]=[prefix+i for i in terms[1]]
+        return terms[2]
+
+
+    def _index_terms(self,index):
+        """Returns the [index, strings, observation uris] of the last index used
+
+        A pandas.Index is immutable, so its strings are kept until another
+        index is used. The list is replaced as a whole, so that threads see
+        either the old or the new index.
+
+        """
+        terms=self._index
+        if terms is None or terms[0] is not index:
+            terms=self._index=[index,[str(i) for i in index],None]
+        return terms
@@ -0,0 +1,444 @@
+# -*- coding: utf-8 -*-
+"""Uploading exporter rdf to a SPARQL Update endpoint, e.g. Apache Jena Fuseki.
+
+SparqlUploader is a triple sink (see ukds.sinks). It lets the rdf of an
+exporter build up in the exporter's CreateRDF instance until it reaches
+the batch size, then splits it into INSERT DATA requests with
+CreateRDF.sparql_update_request_chunks and resets it. The requests are
+POSTed on a pooled requests.Session by a number of worker threads, with
+retries and exponential backoff, so a whole survey is loaded without
+ever being held as one string.
+
+    with SparqlUploader('http://localhost:3030/ukds/update') as uploader:
+        dt.to_rdf_data_cube('eg','http://example.com/',['serial'],
+                            sink=uploader)
+    print(uploader.summary())
+
+GraphStoreLoader sends whole Turtle or N-Triples files, such as those of
+DataTable.to_ttl or DataTable.to_rdf_parallel, to a SPARQL Graph Store
+Protocol endpoint. The store then uses its own rdf parser rather than
+parsing SPARQL, which is much faster for bulk loads. Each file is streamed
+with chunked transfer encoding and the files of each named graph are
+loaded in parallel with those of the other graphs.
+
+    loader=GraphStoreLoader('http://localhost:3030/ukds/data')
+    loader.load({'http://example.com/household':['household.ttl.gz'],
+                 'http://example.com/individual':['individual.nt']})
+
+"""
+
+import concurrent.futures
+import gzip
+import os
+import threading
+import time
+
+import requests
+
+from .sinks import Sink
+
+DEFAULT_BATCH_SIZE=10000000
+
+RETRY_STATUS_CODES=(429,500,502,503,504)
+
+CHUNK_SIZE=1024*1024
+
+CONTENT_TYPES={'.ttl':'text/turtle',
+               '.nt':'application/n-triples'}
+
+
+class UploadError(Exception):
+    "Raised when a request fails after all its retries"
+
+
+def request_with_retries(session,
+                         method,
+                         url,
+                         retries=5,
+                         backoff=0.5,
+                         on_retry=None,
+                         data=None,
+                         **kwargs):
+    """Sends an HTTP request, retrying with exponential backoff
+
+    Connection errors, timeouts and 429 or 5xx responses are retried. Other
+    error responses raise requests.HTTPError at once.
+
+    :param session requests.Session: the session
+    :param method str: e.g. 'POST'
+    :param url str: the url
+    :param retries int: the number of retries
+    :param backoff float: the wait in seconds before the first retry,
+        doubled for each further retry
+    :param on_retry function: if given, called before each retry
+    :param data: the request body. A function which returns the body is
+        called for each attempt, e.g. to restart a generator.
+    :param kwargs: the other arguments of requests.Session.request
+
+    :raises UploadError: if the request fails after all the retries
+
+    :rtype requests.Response:
+
+    """
+    for attempt in range(retries+1):
+        try:
+            response=session.request(method,
+                                     url,
+                                     data=data() if callable(data) else data,
+                                     **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES:
+                response.raise_for_status()
+                return response
+            error=UploadError('%s %s' % (response.status_code,response.reason))
+        except (requests.ConnectionError,requests.Timeout) as err:
+            error=err
+        if attempt<retries:
+            if on_retry is not None: on_retry()
+            time.sleep(backoff*2**attempt)
+    raise UploadError('Request to "%s" failed after %s attempts: %s'
+                      % (url,retries+1,error))
+
+
+def _session(concurrency,auth):
+    "Returns a requests.Session with a connection pool for 'concurrency' threads"
+    session=requests.Session()
+    adapter=requests.adapters.HTTPAdapter(pool_connections=1,
+                                          pool_maxsize=concurrency)
+    session.mount('http://',adapter)
+    session.mount('https://',adapter)
+    session.auth=auth
+    return session
+
+
+class SparqlUploader(Sink):
+    """A triple sink which sends the rdf to a SPARQL Update endpoint
+    """
+
+    def __init__(self,
+                 url,
+                 batch_size=DEFAULT_BATCH_SIZE,
+                 concurrency=4,
+                 retries=5,
+                 backoff=0.5,
+                 timeout=300,
+                 auth=None,
+                 progress=None):
+        """
+
+        :param url str: the SPARQL Update endpoint,
+            e.g. 'http://localhost:3030/ukds/update'
+        :param batch_size int: the size in characters of the rdf in each
+            request, passed to CreateRDF.sparql_update_request_chunks
+        :param concurrency int: the number of requests in flight at a time
+        :param retries int: the number of times a failed request is retried,
+            for connection errors, timeouts and 429 or 5xx responses
+        :param backoff float: the wait in seconds before the first retry,
+            doubled for each further retry
+        :param timeout float: the request timeout in seconds
+        :param auth tuple: a (user, password) tuple, if needed
+        :param progress function: if given, called with this uploader after
+            each request, e.g. lambda u: print(u.summary())
+
+        """
+        self.url=url
+        self.batch_size=batch_size
+        self.concurrency=concurrency
+        self.retries=retries
+        self.backoff=backoff
+        self.timeout=timeout
+        self.progress=progress
+
+        self.session=_session(concurrency,auth)
+        self.session.headers['Content-Type']='application/sparql-update; charset=UTF-8'
+
+        self._executor=concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+        # bounds the requests held in memory, waiting or in flight
+        self._slots=threading.BoundedSemaphore(concurrency*2)
+        self._lock=threading.Lock()
+        self._errors=[]
+        self._pending=None
+        self._closed=False
+
+        self.requests=0
+        self.bytes=0
+        self.retried=0
+        self.start_time=time.perf_counter()
+
+
+    def add(self,createRDF):
+        """Takes the rdf of a CreateRDF instance once it reaches the batch size
+
+        Smaller amounts of rdf are left in the CreateRDF instance, so that
+        the next blocks of an exporter add to them. The rdf which is left
+        is sent by flush or close, or when a different CreateRDF instance
+        is added.
+
+        :param createRDF fairly.CreateRDF: the triples
+
+        """
+        if self._pending is not createRDF:
+            self.flush()
+        self._pending=createRDF
+        if len(createRDF.rdf)>=self.batch_size:
+            self.flush()
+
+
+    def write(self,createRDF):
+        "Sends the rdf of a CreateRDF instance as INSERT DATA requests"
+        for request in createRDF.sparql_update_request_chunks(self.batch_size):
+            self.submit(request)
+
+
+    def flush(self):
+        "Sends the rdf left in the last CreateRDF instance"
+        c=self._pending
+        if c is not None and c.rdf:
+            self.write(c)
+            c.reset_rdf()
+
+
+    def submit(self,request):
+        """Queues a SPARQL Update request
+
+        This blocks while the maximum number of requests are waiting.
+
+        :param request str: the SPARQL Update request
+
+        """
+        self._raise_errors()
+        data=request.encode('UTF-8')
+        self._slots.acquire()
+        try:
+            future=self._executor.submit(self._post,data)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+
+
+    def _post(self,data):
+        "POSTs a request, retrying with exponential backoff"
+        request_with_retries(self.session,
+                             'POST',
+                             self.url,
+                             retries=self.retries,
+                             backoff=self.backoff,
+                             on_retry=self._retry,
+                             data=data,
+                             timeout=self.timeout)
+        return len(data)
+
+
+    def _retry(self):
+        with self._lock: self.retried+=1
+
+
+    def _done(self,future):
+        "Records the result of a request"
+        self._slots.release()
+        try:
+            n=future.result()
+        except Exception as err:
+            with self._lock: self._errors.append(err)
+            return
+        with self._lock:
+            self.requests+=1
+            self.bytes+=n
+        if self.progress is not None: self.progress(self)
+
+
+    def _raise_errors(self):
+        if self._errors:
+            raise self._errors[0]
+
+
+    @property
+    def elapsed(self):
+        "The time in seconds since the uploader was created"
+        return time.perf_counter()-self.start_time
+
+
+    @property
+    def throughput(self):
+        "The bytes uploaded per second"
+        elapsed=self.elapsed
+        return self.bytes/elapsed if elapsed else 0.0
+
+
+    def summary(self):
+        "Returns a one line report of the upload"
+        return '%s requests, %.1f MB in %.1f s (%.2f MB/s), %s retries' % \
+            (self.requests,self.bytes/1e6,self.elapsed,self.throughput/1e6,self.retried)
+
+
+    def close(self):
+        """Sends the remaining rdf and waits for all requests to finish
+
+        :raises UploadError: if a request failed
+
+        """
+        if self._closed: return
+        self._closed=True
+        try:
+            self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+            self.session.close()
+        self._raise_errors()
+
+
+def content_type(fp):
+    """Returns the media type of a Turtle or N-Triples file, from its extension
+
+    A '.gz' extension is ignored, e.g. 'household.nt.gz' is N-Triples.
+
+    :rtype str:
+
+    """
+    root,ext=os.path.splitext(fp.lower())
+    if ext=='.gz': ext=os.path.splitext(root)[1]
+    try:
+        return CONTENT_TYPES[ext]
+    except KeyError:
+        raise ValueError('Unknown rdf file type for "%s", use .ttl or .nt' % fp)
+
+
+def iter_file_chunks(fps,chunk_size=CHUNK_SIZE):
+    """Yields the bytes of one or more files in chunks, uncompressing .gz files
+
+    Several files are joined into one body, e.g. the header and a part file
+    of DataTable.to_rdf_parallel.
+
+    :param fps list: the filepaths
+    :param chunk_size int: the size of the chunks
+
+    :rtype generator:
+
+    """
+    for fp in fps:
+        opener=gzip.open if fp.lower().endswith('.gz') else open
+        with opener(fp,'rb') as f:
+            while True:
+                chunk=f.read(chunk_size)
+                if not chunk: break
+                yield chunk
+
+
+class GraphStoreLoader():
+    """Loads rdf files into a SPARQL Graph Store Protocol endpoint
+    """
+
+    def __init__(self,
+                 url,
+                 concurrency=4,
+                 retries=5,
+                 backoff=0.5,
+                 timeout=3600,
+                 auth=None,
+                 progress=None):
+        """
+
+        :param url str: the Graph Store Protocol endpoint,
+            e.g. 'http://localhost:3030/ukds/data'
+        :param concurrency int: the number of graphs loaded at a time
+        :param retries int: the number of times a failed request is retried
+        :param backoff float: the wait in seconds before the first retry,
+            doubled for each further retry
+        :param timeout float: the request timeout in seconds
+        :param auth tuple: a (user, password) tuple, if needed
+        :param progress function: if given, called with the graph uri and
+            the filepaths after each file is loaded
+
+        """
+        self.url=url
+        self.concurrency=concurrency
+        self.retries=retries
+        self.backoff=backoff
+        self.timeout=timeout
+        self.progress=progress
+        self.session=_session(concurrency,auth)
+        self.requests=0
+        self.bytes=0
+        self._lock=threading.Lock()
+
+
+    def load_file(self,fp,graph=None,replace=False,header=None):
+        """Streams a Turtle or N-Triples file into a graph
+
+        :param fp str: the filepath, which may be gzip compressed
+        :param graph str: the named graph uri. If None, the default graph.
+        :param replace bool: if True the graph is replaced (PUT), otherwise
+            the triples are added to it (POST)
+        :param header str: the filepath of a Turtle file of prefixes which
+            is sent before the file, e.g. the header of
+            DataTable.to_rdf_parallel. The body is then sent as Turtle,
+            which N-Triples is a subset of.
+
+        """
+        media_type=content_type(fp)
+        if header: media_type='text/turtle'
+        fps=[header,fp] if header else [fp]
+        params={'graph':graph} if graph else {'default':''}
+        sent=[0]
+        def data():
+            # counts the uncompressed bytes of the last attempt
+            sent[0]=0
+            for chunk in iter_file_chunks(fps):
+                sent[0]+=len(chunk)
+                yield chunk
+        request_with_retries(self.session,
+                             'PUT' if replace else 'POST',
+                             self.url,
+                             retries=self.retries,
+                             backoff=self.backoff,
+                             data=data,
+                             params=params,
+                             headers={'Content-Type':media_type},
+                             timeout=self.timeout)
+        with self._lock:
+            self.requests+=1
+            self.bytes+=sent[0]
+        if self.progress is not None: self.progress(graph,fps)
+
+
+    def load_graph(self,graph,fps,replace=False,header=None):
+        """Loads a list of files into one graph, in order
+
+        :param graph str: the named graph uri. If None, the default graph.
+        :param fps list: the filepaths
+        :param replace bool: if True the graph is replaced by the files
+        :param header str: the filepath of a Turtle file of prefixes sent
+            before each file
+
+        """
+        for i,fp in enumerate(fps):
+            self.load_file(fp,graph,replace=replace and i==0,header=header)
+
+
+    def load(self,partitions,replace=False,header=None):
+        """Loads files into named graphs, with the graphs loaded in parallel
+
+        :param partitions dict: a dictionary of graph uri (or None for the
+            default graph) to a list of filepaths
+        :param replace bool: if True each graph is replaced by its files
+        :param header str: the filepath of a Turtle file of prefixes sent
+            before each file
+
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures=[executor.submit(self.load_graph,graph,fps,replace,header)
+                     for graph,fps in partitions.items()]
+            for future in futures:
+                future.result()
+
+
+    def close(self):
+        self.session.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self,*args):
+        self.close()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, shutil, tempfile, zipfile
+from ukds.archive import split_path, read_bytes, list_files
+from ukds.cache import DataDictionaryCache
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+TAB_MEMBER='UKDA-0000-tab/tab/sample_household.tab'
+RTF_MEMBER='UKDA-0000-tab/mrdoc/allissue/sample_household_ukda_data_dictionary.rtf'
+
+
+class Test_archive(unittest.TestCase):
+
+    def setUp(self):
+        self.directory=tempfile.mkdtemp()
+        self.zip_fp=os.path.join(self.directory,'0000tab.zip')
+        with zipfile.ZipFile(self.zip_fp,'w',compression=zipfile.ZIP_DEFLATED) as z:
+            z.write(dt_fp,TAB_MEMBER)
+            z.write(dd_fp,RTF_MEMBER)
+        self.fp_tab=os.path.join(self.zip_fp,*TAB_MEMBER.split('/'))
+        self.fp_rtf=os.path.join(self.zip_fp,*RTF_MEMBER.split('/'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_split_path(self):
+
+        self.assertEqual(split_path(self.fp_tab),(self.zip_fp,TAB_MEMBER))
+        self.assertIsNone(split_path(dt_fp))
+        self.assertIsNone(split_path(self.zip_fp))
+        with open(dt_fp,'rb') as f:
+            self.assertEqual(read_bytes(self.fp_tab),f.read())
+        self.assertRaises(FileNotFoundError,read_bytes,self.zip_fp+'/missing.tab')
+        self.assertEqual(list_files(self.zip_fp),
+                         [self.zip_fp+'/'+TAB_MEMBER,self.zip_fp+'/'+RTF_MEMBER])
+        self.assertEqual(list_files(self.zip_fp+'/UKDA-0000-tab/tab'),
+                         [self.zip_fp+'/'+TAB_MEMBER])
+
+    def test_datatable(self):
+
+        dt=ukds.DataTable()
+        dt.read_datadictionary(self.fp_rtf,memory_map=True)
+        dt.read_tab(self.fp_tab,dtypes=True)
+        
+        answer=ukds.DataTable()
+        answer.read_datadictionary(dd_fp,memory_map=True)
+        answer.read_tab(dt_fp,dtypes=True)
+        
+        self.assertTrue(dt.tab.equals(answer.tab))
+        self.assertEqual(dt.datadictionary.variable_dicts(),answer.datadictionary.variable_dicts())
+        
+        dt.read_tab(self.fp_tab,columns=['serial','HhOut'],where=lambda df: df['HhOut']==110)
+        self.assertEqual(list(dt.tab.columns),['serial','HhOut'])
+        self.assertEqual(sum(len(b.tab) for b in dt.iter_batches(batchsize=4)),6)
+
+    def test_datadictionary(self):
+
+        dd=ukds.DataDictionary()
+        dd.read_rtf(self.fp_rtf,encoding='cp1252')
+        self.assertEqual(dd.variable_names(),['serial','strata','HhOut','IMonth','Region'])
+        
+        cache=DataDictionaryCache(os.path.join(self.directory,'cache'))
+        self.assertEqual(cache.key(self.fp_rtf),cache.key(dd_fp))
+
+    def test_study(self):
+
+        study=ukds.Study(self.zip_fp,processes=0)
+        self.assertEqual(study.names,['sample_household'])
+        self.assertEqual(study.files['sample_household'],
+                         (self.zip_fp+'/'+TAB_MEMBER,self.zip_fp+'/'+RTF_MEMBER))
+        self.assertEqual(len(study.load()['sample_household'].tab),6)
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_archive())
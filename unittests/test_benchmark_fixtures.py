@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, sys, json, tempfile
+from unittest import mock
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'benchmarks'))
+import fixtures
+import run
+
+
+class Test_benchmark_fixtures(unittest.TestCase):
+
+    def test_make_dataset(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            fp_tab,fp_rtf=fixtures.make_dataset(directory,rows=40,variables=30,
+                                                value_label_density=0.5,string_ratio=0.2)
+            dt=ukds.DataTable()
+            dt.read_datadictionary(fp_rtf,memory_map=True)
+            dt.read_tab(fp_tab,dtypes=True)
+
+        variable_dicts=fixtures.make_variables(30,0.5,0.2)
+        self.assertEqual(dt.datadictionary.variable_dicts(),variable_dicts)
+        self.assertEqual(list(dt.tab.columns),[d['variable'] for d in variable_dicts])
+        self.assertEqual(len(dt.tab),40)
+        self.assertIn('string',[d['variable_type'] for d in variable_dicts])
+        self.assertTrue(any(d['value_labels'] for d in variable_dicts))
+
+    def test_seed(self):
+
+        a=fixtures.make_table(fixtures.make_variables(10,seed=1),20,seed=1)
+        b=fixtures.make_table(fixtures.make_variables(10,seed=1),20,seed=1)
+        self.assertTrue(a.equals(b))
+
+    def test_compare_config(self):
+
+        config={'rows':100,'variables':10,'seed':0}
+        self.assertEqual(run.config_differences(config,dict(config)),[])
+        self.assertEqual(run.config_differences(config,dict(config,rows=1000)),
+                         [('rows',100,1000)])
+
+        with tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ):
+            fp=os.path.join(directory,'baseline.json')
+            with open(fp,'w') as f:
+                json.dump({'config':{'rows':1000},'results':{}},f)
+            status=run.main(['--rows','20','--variables','5','--directory',directory,
+                             '-k','no such benchmark','--compare',fp])
+        self.assertEqual(status,1)
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_benchmark_fixtures())
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, shutil, tempfile, time, zlib
+from unittest import mock
+from ukds.cache import DataDictionaryCache, STAT_EXTENSION
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+
+class Test_cache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory=tempfile.mkdtemp()
+        self.cache=DataDictionaryCache(self.directory)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory)
+
+    def test_miss_then_hit(self):
+
+        dd1=ukds.DataDictionary(dd_fp,memory_map=True,cache=self.cache)
+        # the entry and the stat file of the .rtf file
+        self.assertEqual(len(self.cache.entries()),2)
+
+        dd2=ukds.DataDictionary(dd_fp,memory_map=True,cache=self.cache)
+        self.assertIsNone(dd2.rtf)
+        self.assertEqual(dd2.variable_dicts(),dd1.variable_dicts())
+
+    def test_key(self):
+
+        key1=self.cache.key(dd_fp,'cp1252')
+        key2=self.cache.key(dd_fp,'utf-8')
+        self.assertNotEqual(key1,key2)
+        self.assertEqual(key1,self.cache.key(dd_fp,'cp1252'))
+
+    def test_key_does_not_read_unchanged_file(self):
+
+        key=self.cache.key(dd_fp,'cp1252')
+        with mock.patch('ukds.cache.open_file',side_effect=AssertionError('file read')):
+            self.assertEqual(self.cache.key(dd_fp,'cp1252'),key)
+
+    def test_key_of_changed_file(self):
+
+        fp=os.path.join(self.directory,'copy.rtf')
+        shutil.copy(dd_fp,fp)
+        key1=self.cache.key(fp,'cp1252')
+        with open(fp,'ab') as f:
+            f.write(b' ')
+        key2=self.cache.key(fp,'cp1252')
+        self.assertNotEqual(key1,key2)
+        self.assertEqual(key1,self.cache.key(dd_fp,'cp1252'))
+
+        self.cache.clear()
+        self.assertEqual([x for x in os.listdir(self.directory) if x!='copy.rtf'],[])
+
+    def test_damaged_entry(self):
+
+        key=self.cache.key(dd_fp,'cp1252')
+        with open(self.cache.path(key),'wb') as f:
+            f.write(b'not a cache entry')
+        self.assertIsNone(self.cache.get(key))
+
+        # a pickle of a class which no longer exists
+        with open(self.cache.path(key),'wb') as f:
+            f.write(zlib.compress(b'cno_such_module\nVariable\n.'))
+        self.assertIsNone(self.cache.get(key))
+
+    def test_evict(self):
+
+        self.cache.put('a',[{'variable':'x'*1000}])
+        t=time.time()
+        os.utime(self.cache.path('a'),(t-10,t-10))
+        size=self.cache.entries()[0][1]
+        self.cache.max_bytes=size
+        self.cache.put('b',[{'variable':'y'*1000}])
+        self.assertIsNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('b'))
+
+        # the stat files are counted and evicted too
+        key=self.cache.key(dd_fp,'cp1252')
+        fp_stat=[x[0] for x in self.cache.entries() if x[0].endswith(STAT_EXTENSION)][0]
+        os.utime(fp_stat,(t-20,t-20))
+        self.cache.max_bytes=self.cache.entries()[-1][1]
+        self.cache.evict()
+        self.assertFalse(os.path.exists(fp_stat))
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_cache())
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, tempfile
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow=None
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+dt=ukds.DataTable()
+dt.read_datadictionary(dd_fp,memory_map=True)
+dt.read_tab(dt_fp,dtypes=True)
+
+
+@unittest.skipIf(pyarrow is None,'pyarrow is not installed')
+class Test_columnar(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory=tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def round_trip(self,filename,**kwargs):
+
+        fp=os.path.join(self.directory.name,filename)
+        dt.to_columnar(fp,**kwargs)
+        result=ukds.DataTable()
+        result.read_columnar(fp)
+        return result
+
+    def test_parquet(self):
+
+        result=self.round_trip('test.parquet')
+        self.assertEqual(result.datadictionary.variable_dicts(),
+                         dt.datadictionary.variable_dicts())
+        self.assertEqual(list(result.get_dataframe().iloc[:,2]),
+                         list(dt.get_dataframe().iloc[:,2]))
+
+    def test_arrow_batches(self):
+
+        result=self.round_trip('test.arrow',batchsize=2)
+        s=result.tab['HhOut']
+        self.assertIsInstance(s.dtype,pd.CategoricalDtype)
+        self.assertEqual(list(s),list(dt.get_dataframe().iloc[:,2]))
+
+    def test_field_metadata(self):
+
+        fp=os.path.join(self.directory.name,'test.arrow')
+        dt.to_columnar(fp)
+        table,variable_dicts=ukds.columnar.read(fp,columns=['IMonth'])
+        self.assertEqual(table.column_names,['IMonth'])
+        metadata=table.schema.field('IMonth').metadata
+        self.assertEqual(metadata[b'SPSS_measurement_level'],b'"ORDINAL"')
+        self.assertEqual(len(variable_dicts),5)
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_columnar())
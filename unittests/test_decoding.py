@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os
+import numpy as np
+import pandas as pd
+from ukds.decoding import value_terms
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+dt=ukds.DataTable(dt_fp)
+dt.read_datadictionary(dd_fp,memory_map=True)
+
+
+class Test_decoding(unittest.TestCase):
+
+    def test_get_dataframe(self):
+
+        df=dt.get_dataframe()
+        self.assertEqual(list(df.columns.get_level_values('variable')),
+                         ['serial','strata','HhOut','IMonth','Region'])
+        s=df.xs('HhOut',axis=1,level='variable').iloc[:,0]
+        self.assertIsInstance(s.dtype,pd.CategoricalDtype)
+        self.assertEqual(list(s),['Productive','Office refusal','Productive',
+                                  'Other ineligible','Productive','Office refusal'])
+
+    def test_uncoded_values_kept(self):
+
+        s=dt.datadictionary.decoder.decode('strata',dt.tab['strata'])
+        self.assertEqual(list(s),['Schedule not applicable','Schedule not applicable',3,
+                                  'Schedule not applicable',5,'Schedule not applicable'])
+
+    def test_no_value_labels(self):
+
+        s=dt.datadictionary.decoder.decode('serial',dt.tab['serial'])
+        self.assertTrue(s.equals(dt.tab['serial']))
+
+    def test_categorical_input(self):
+
+        decoder=dt.datadictionary.decoder
+        s1=decoder.decode('IMonth',dt.tab['IMonth'])
+        s2=decoder.decode('IMonth',dt.tab['IMonth'].astype('category'))
+        self.assertEqual(list(s1),list(s2))
+
+    def test_label_same_as_uncoded_value(self):
+
+        decoder=dt.datadictionary.decoder
+        result=decoder.decode_values('HhOut',pd.Series(['110','Productive']).to_numpy())
+        self.assertEqual(list(result),['Productive','Productive'])
+
+    def test_value_terms(self):
+
+        def to_bso_variable_terms(values,value_labels,code_prefix):
+            "The original classification of DataTable.to_bso_variable"
+            l=[]
+            for v in values:
+                try:
+                    if float(v) in value_labels:
+                        l.append('%s%s' % (code_prefix,float(v)))
+                    else:
+                        l.append(v)
+                except ValueError:
+                    l.append('"%s"' % v)
+            return l
+
+        value_labels={-2.0:'Schedule not applicable',0.0:'Zero'}
+        for values in [dt.tab['strata'].values,
+                       dt.tab['strata'].to_numpy(dtype=float),
+                       np.array([-0.0,0.0,np.nan,-2.0]),
+                       np.array(['-2','x','',3,'-2'],dtype=object),
+                       pd.Categorical(['-2','x','3','x'])]:
+            result=value_terms(values,value_labels,'eg:code_strata_')
+            answer=to_bso_variable_terms(values,value_labels,'eg:code_strata_')
+            self.assertEqual([(type(x),str(x)) for x in result],
+                             [(type(x),str(x)) for x in answer])
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_decoding())
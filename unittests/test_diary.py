@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, sys, tempfile
+import numpy as np
+import pandas as pd
+from ukds.diary import DiaryReshaper, find_slot_families
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'benchmarks'))
+import fixtures
+
+
+class Test_diary(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory=tempfile.TemporaryDirectory()
+        cls.fp_tab,cls.fp_rtf=fixtures.make_diary(cls.directory.name,rows=25,slots=6)
+        cls.dt=ukds.DataTable()
+        cls.dt.read_datadictionary(cls.fp_rtf,memory_map=True)
+        cls.dt.read_tab(cls.fp_tab,dtypes=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_find_slot_families(self):
+
+        families=find_slot_families(['serial','act1_2','act1_10','act1_1','wher_1','pnum'])
+        self.assertEqual(families,{'act1':['act1_1','act1_2','act1_10']})
+
+        families=find_slot_families(self.dt.datadictionary.variable_names())
+        self.assertEqual(list(families),['act1','wher'])
+        self.assertEqual(len(families['act1']),6)
+
+    def test_to_long(self):
+
+        df=self.dt.to_long(id_columns=['serial','pnum'])
+        self.assertEqual(list(df.columns),['row','serial','pnum','slot','act1','wher'])
+        self.assertEqual(len(df),25*6)
+        self.assertEqual(df['act1'].dtype,'category')
+
+        # the same values as pandas.wide_to_long
+        expected=pd.wide_to_long(self.dt.tab.reset_index(),['act1','wher'],
+                                 i='index',j='slot',sep='_').reset_index()
+        expected=expected.sort_values(['index','slot'])
+        for stem in ['act1','wher']:
+            self.assertEqual(list(df[stem].astype(float)),list(expected[stem].astype(float)))
+        self.assertEqual(list(df['slot'][:6]),[1,2,3,4,5,6])
+        self.assertEqual(list(df['row'][:7]),[0]*6+[1])
+        self.assertEqual(list(df['serial'][5:7]),[self.dt.tab['serial'][0]]*2)
+
+    def test_decode(self):
+
+        df=self.dt.to_long(stems=['act1'],decode=True)
+        self.assertEqual(list(df.columns),['row','slot','act1'])
+        decoded=self.dt.get_dataframe()
+        self.assertEqual(df['act1'][0],decoded.iloc[0,2])
+        self.assertIn('Activity 0',df['act1'].cat.categories)
+
+    def test_shared_categories(self):
+
+        reshaper=self.dt.diary_reshaper()
+        df1=reshaper.reshape(pd.DataFrame({'act1_%03d' % i:[100.0,110.0] for i in range(1,7)} |
+                                          {'wher_%03d' % i:[10,11] for i in range(1,7)}))
+        df2=reshaper.reshape(pd.DataFrame({'act1_%03d' % i:[120.0,5.0] for i in range(1,7)} |
+                                          {'wher_%03d' % i:[10,np.nan] for i in range(1,7)}))
+        categories=df1['act1'].cat.categories
+        self.assertTrue(df2['act1'].cat.categories[:len(categories)].equals(categories))
+        self.assertEqual(df2['act1'].cat.categories[-1],5.0)  # no value label
+        self.assertTrue(np.isnan(df2['wher'].astype(float).iloc[-1]))
+
+    def test_iter_long(self):
+
+        expected=self.dt.to_long(id_columns=['serial'])
+        batches=list(self.dt.iter_long(batchsize=10,id_columns=['serial'],dtypes=True))
+        self.assertEqual(len(batches),3)
+        df=pd.concat(batches,ignore_index=True)
+        self.assertEqual(list(df['row']),list(expected['row']))
+        self.assertEqual(list(df['act1'].astype(float)),list(expected['act1'].astype(float)))
+
+    def test_other_numbered_variables(self):
+
+        families={'act1':['act1_1','act1_2','act1_3'],
+                  'wher':['wher_1','wher_2','wher_3'],
+                  'wt':['wt_1','wt_2'],
+                  'hh':['hh_1','hh_2']}
+        reshaper=DiaryReshaper(families=families)
+        self.assertEqual(list(reshaper.families),['act1','wher'])
+        self.assertRaises(ValueError,DiaryReshaper,families=families,stems=['act1','wt'])
+
+    def test_slots_do_not_match(self):
+
+        self.assertRaises(ValueError,DiaryReshaper,
+                          families={'act1':['act1_1','act1_2'],'wher':['wher_1','wher_3']},
+                          stems=['act1','wher'])
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_diary())
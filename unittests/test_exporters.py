@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os
+import rdflib
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, XSD
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+dt=ukds.DataTable()
+dt.read_datadictionary(dd_fp,memory_map=True)
+dt.read_tab(dt_fp,dtypes=True)
+
+EG=rdflib.Namespace('http://example.com/')
+QB=rdflib.Namespace('http://purl.org/linked-data/cube#')
+
+
+class Test_exporters(unittest.TestCase):
+
+    def test_iter_bdo_observation_datum_blocks(self):
+
+        columns=['serial','HhOut']
+        blocks=list(dt.iter_bdo_observation_datum_blocks('eg',columns,blocksize=4))
+        self.assertEqual([len(b[1]) for b in blocks],[4,2,4,2])
+        
+        result=[(variable_uri,uri,observation_uri,value) 
+                for variable_uri,uris,observation_uris,values in blocks
+                for uri,observation_uri,value in zip(uris,observation_uris,values)]
+        answer=[('eg:variable_%s' % column_name,
+                 'eg:observation_datum_%s_%s' % (row_index,column_name),
+                 'eg:observation_%s' % row_index,
+                 dt.tab.loc[row_index,column_name])
+                for column_name in columns for row_index in dt.tab.index]
+        self.assertEqual(result,answer)
+
+    def test_iter_data_cube_observation_blocks(self):
+
+        blocks=list(dt.iter_data_cube_observation_blocks('eg',['serial','IMonth'],
+                                                         ['strata','Region'],
+                                                         blocksize=4))
+        self.assertEqual([(b[0],len(b[1])) for b in blocks],
+                         [('strata',4),('strata',2),('Region',4),('Region',2)])
+        
+        graph=rdflib.Graph()
+        graph.parse(data='@prefix eg: <http://example.com/> .\n'
+                         '@prefix qb: <http://purl.org/linked-data/cube#> .\n'
+                         +''.join(b[2] for b in blocks),
+                    format='turtle')
+        answer=rdflib.Graph()
+        observation_uris=[]
+        for col in ['strata','Region']:
+            numeric=dt.datadictionary.get_variable_dict(col)['variable_type']=='numeric'
+            for index,value in dt.tab[col].items():
+                uri=EG['obs-%s-%s' % (col,index)]
+                observation_uris.append('eg:obs-%s-%s' % (col,index))
+                answer.add((uri,RDF.type,QB.Observation))
+                answer.add((uri,QB.dataSet,EG.dataset))
+                answer.add((uri,EG['dp-serial'],rdflib.Literal(int(dt.tab['serial'][index]))))
+                # the missing IMonth of row 4 has no triple
+                if index!=4:
+                    answer.add((uri,EG['dp-IMonth'],rdflib.Literal(str(dt.tab['IMonth'][index]),datatype=XSD.decimal)))
+                answer.add((uri,EG['mp-%s' % col],
+                            rdflib.Literal(int(value)) if numeric else rdflib.Literal(value)))
+        self.assertTrue(isomorphic(graph,answer))
+        self.assertEqual([x for b in blocks for x in b[1]],observation_uris)
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_exporters())
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os
+import rdflib
+from rdflib.namespace import RDF, XSD
+from ukds.graph import GraphBuilder, parse_prefixes
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+namespaces={'eg':'http://example.com/',
+            'qb':'http://purl.org/linked-data/cube#'}
+
+EG=rdflib.Namespace('http://example.com/')
+QB=rdflib.Namespace('http://purl.org/linked-data/cube#')
+
+
+class Test_graph(unittest.TestCase):
+
+    def test_parse_prefixes(self):
+
+        text='@prefix eg: <http://example.com/> .\nPREFIX qb: <http://purl.org/linked-data/cube#>\n'
+        self.assertEqual(parse_prefixes(text),namespaces)
+
+    def test_term(self):
+
+        b=GraphBuilder(namespaces=namespaces)
+        self.assertEqual(b.term('eg:variable_HhOut'),EG.variable_HhOut)
+        self.assertEqual(b.term('a'),RDF.type)
+        self.assertEqual(b.term('<http://example.org/x>'),rdflib.URIRef('http://example.org/x'))
+        self.assertEqual(b.term('"Productive"'),rdflib.Literal('Productive'))
+        self.assertEqual(b.term('"Productive"@en'),rdflib.Literal('Productive',lang='en'))
+        self.assertEqual(b.term('"1"^^<http://www.w3.org/2001/XMLSchema#integer>'),
+                         rdflib.Literal('1',datatype=XSD.integer))
+        self.assertEqual(b.term(5),rdflib.Literal(5))
+        self.assertEqual(b.term('1.5'),rdflib.Literal('1.5',datatype=XSD.decimal))
+        self.assertRaises(ValueError,b.term,'unknown:x')
+
+        # a missing value has no term
+        self.assertIsNone(b.term(float('nan')))
+        self.assertIsNone(b.term('nan'))
+
+        # each term is created once
+        self.assertIs(b.term('eg:variable_HhOut'),b.term('eg:variable_HhOut'))
+        self.assertIsNot(b.term(1),b.term(1.0))
+
+    def test_add_triple(self):
+
+        b=GraphBuilder(store='SimpleMemory',namespaces=namespaces,batchsize=2)
+        b.add_subject_triples('eg:a',[('a','eg:Thing'),('eg:label','"A"')])
+        b.add_subject_predicate_triples('eg:a','eg:member',['eg:b','eg:c'])
+        b.add_triple('eg:b','eg:value',3)
+        b.add_triple('eg:c','eg:value',float('nan'))
+        b.flush()
+        self.assertEqual(len(b.graph),5)
+        self.assertIn((EG.a,EG.member,EG.c),b.graph)
+        self.assertIn((EG.b,EG.value,rdflib.Literal(3)),b.graph)
+
+    def test_to_rdf_data_cube(self):
+
+        dt=ukds.DataTable()
+        dt.read_datadictionary(dd_fp,memory_map=True)
+        dt.read_tab(dt_fp,dtypes=True)
+
+        b=GraphBuilder(namespaces=dict(namespaces,skos='http://www.w3.org/2004/02/skos/core#'))
+        dt.to_rdf_data_cube('eg','http://example.com/',['serial'],
+                            column='HhOut',createRDF=b)
+        b.flush()
+
+        observations=set(b.graph.subjects(RDF.type,QB.Observation))
+        self.assertEqual(len(observations),len(dt.tab))
+        for index,value in dt.tab['HhOut'].to_dict().items():
+            uri=EG['obs-HhOut-%s' % index]
+            self.assertIn(uri,observations)
+            self.assertIn((uri,QB.dataSet,EG.dataset),b.graph)
+            # a numeric value is written unquoted, so it is a Turtle number
+            self.assertIn((uri,EG['mp-HhOut'],rdflib.Literal(int(value))),b.graph)
+        # the observation blocks are parsed by add_turtle, not by fairly
+        self.assertIsNone(b._createRDF)
+
+    def test_to_rdf_data_cube_columns(self):
+
+        dt=ukds.DataTable()
+        dt.read_datadictionary(dd_fp,memory_map=True)
+        dt.read_tab(dt_fp,dtypes=True)
+
+        b1=GraphBuilder(namespaces=namespaces)
+        dt.to_rdf_data_cube('eg','http://example.com/',['serial'],
+                            columns=['strata','Region'],createRDF=b1)
+        b1.flush()
+        b2=GraphBuilder(namespaces=namespaces)
+        for col in ['strata','Region']:
+            dt.to_rdf_data_cube('eg','http://example.com/',['serial'],
+                                column=col,createRDF=b2)
+        b2.flush()
+        self.assertEqual(set(b1.graph),set(b2.graph))
+        self.assertEqual(len(set(b1.graph.subjects(QB.observation))),2)
+
+    def test_bso_variable_is_native(self):
+
+        dt=ukds.DataTable()
+        dt.read_datadictionary(dd_fp,memory_map=True)
+        dt.read_tab(dt_fp,dtypes=True)
+
+        b=GraphBuilder(namespaces=dict(namespaces,
+                                       bso='http://example.com/bso#',
+                                       rdfs='http://www.w3.org/2000/01/rdf-schema#'))
+        dt.to_bso_variable('eg','http://example.com/','HhOut',createRDF=b)
+        dt.datadictionary.to_bso_variable('eg','http://example.com/','HhOut',createRDF=b)
+        b.flush()
+        self.assertGreater(len(b.graph),len(dt.tab))
+        self.assertIsNone(b._createRDF)
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_graph())
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import os, subprocess, sys
+from ukds.lazy import LazyModule
+
+package_dir=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sample_dir=os.path.join(package_dir,'unittests','sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+# the time allowed for 'import ukds', in seconds
+IMPORT_BUDGET=0.02
+
+# the modules which 'import ukds' imported before they were deferred
+EAGER_MODULES=('numpy','pandas')
+
+RDF_MODULES=('fairly','rdflib','requests')
+
+
+def run_python(code):
+    "Runs code in a new interpreter and returns what it prints"
+    result=subprocess.run([sys.executable,'-c',code],
+                          cwd=package_dir,
+                          capture_output=True,
+                          text=True,
+                          check=True)
+    return result.stdout.strip()
+
+
+class Test_import_time(unittest.TestCase):
+
+    def test_import_time(self):
+
+        code='import time; t=time.perf_counter(); import %s; print(time.perf_counter()-t)'
+        # the best of three, as the first run may read the files from disk
+        t=min(float(run_python(code % 'ukds')) for i in range(3))
+        self.assertLess(t,IMPORT_BUDGET)
+        
+        # and a small part of the time of the eager imports
+        t_eager=min(float(run_python(code % ', '.join(EAGER_MODULES))) for i in range(3))
+        self.assertLess(t,t_eager/10)
+
+    def test_no_rdf_imports(self):
+
+        code=('import sys, ukds\n'
+              'dt=ukds.DataTable()\n'
+              'dt.read_datadictionary(%r,memory_map=True)\n'
+              'dt.read_tab(%r,dtypes=True)\n'
+              'dt.get_dataframe()\n'
+              'print(",".join(m for m in %r if m in sys.modules))' % (dd_fp,dt_fp,RDF_MODULES))
+        self.assertEqual(run_python(code),'')
+
+    def test_lazy_module(self):
+
+        m=LazyModule('json')
+        self.assertIsNone(m._module)
+        self.assertEqual(m.dumps([1]),'[1]')
+        self.assertIsNotNone(m._module)
+        
+        m=LazyModule('ukds_no_such_module')
+        self.assertRaises(ImportError,getattr,m,'CreateRDF')
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_import_time())
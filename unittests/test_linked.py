@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds
+import numpy as np
+import pandas as pd
+from ukds.linked import LinkedTables, Link
+
+
+def datatable(df):
+    dt=ukds.DataTable()
+    dt.tab=df
+    return dt
+
+
+class Test_linked(unittest.TestCase):
+
+    def setUp(self):
+        self.household=datatable(pd.DataFrame({'serial':[10,20,30],
+                                               'Region':pd.Categorical(['North','South','North']),
+                                               'HhOut':[1,2,3]}))
+        self.individual=datatable(pd.DataFrame({'serial':[10,10,20,30],
+                                                'pnum':[1,2,1,1],
+                                                'age':[40,38,25,70]}))
+        self.diary=datatable(pd.DataFrame({'serial':[20,10,10,10,99],
+                                           'pnum':[1,2,1,1,1],
+                                           'minutes':[30.0,np.nan,10.0,50.0,5.0]}))
+        self.tables=LinkedTables({'household':self.household,
+                                  'individual':self.individual,
+                                  'diary':self.diary})
+
+    def test_positions(self):
+
+        link=self.tables.link('household','diary','serial')
+        self.assertEqual(list(link.positions),[1,0,0,0,-1])
+        self.assertEqual(list(link.missing),[False,False,False,False,True])
+
+        link=self.tables.link('individual','diary',['serial','pnum'])
+        self.assertEqual(list(link.positions),[2,1,0,0,-1])
+
+    def test_link_is_kept(self):
+
+        link=self.tables.link('household','diary',['serial'])
+        self.assertIs(self.tables.link('household','diary','serial'),link)
+        self.assertIs(self.tables.link('household','individual','serial').parent_index,
+                      link.parent_index)
+
+        # replacing the table rebuilds the link
+        self.diary.tab=self.diary.tab.iloc[:2]
+        link2=self.tables.link('household','diary','serial')
+        self.assertIsNot(link2,link)
+        self.assertEqual(list(link2.positions),[1,0])
+
+        # and so does replacing it with a table of the same length
+        self.diary.tab=pd.DataFrame({'serial':[30,30],'pnum':[1,1],'minutes':[1.0,2.0]})
+        link3=self.tables.link('household','diary','serial')
+        self.assertIsNot(link3,link2)
+        self.assertEqual(list(link3.broadcast('HhOut')['HhOut']),[3,3])
+
+    def test_broadcast(self):
+
+        link=self.tables.link('household','diary','serial')
+        df=link.broadcast(['Region','HhOut'])
+        expected=self.diary.tab.merge(self.household.tab,on='serial',how='left')
+        self.assertEqual(list(df.index),list(self.diary.tab.index))
+        self.assertEqual(df['Region'].dtype,'category')
+        self.assertEqual(list(df['Region'].astype(object).fillna('')),
+                         list(expected['Region'].astype(object).fillna('')))
+        self.assertTrue(np.isnan(df['HhOut'].iloc[4]))
+        self.assertEqual(list(df['HhOut'].iloc[:4]),[2,1,1,1])
+
+    def test_attach(self):
+
+        df=self.tables.attach('diary','individual',['serial','pnum'],'age')
+        self.assertEqual(list(df.columns),['serial','pnum','minutes','age'])
+        self.assertEqual(list(df['age'].iloc[:4]),[25,38,40,40])
+        self.assertNotIn('age',self.diary.tab.columns)
+
+    def test_aggregate(self):
+
+        link=self.tables.link('household','diary','serial')
+        self.assertEqual(list(link.child_counts()),[3,1,0])
+        self.assertEqual(list(link.aggregate('minutes','count')),[2,1,0])
+        result=link.aggregate('minutes','sum')
+        self.assertEqual(list(result.iloc[:2]),[60.0,30.0])
+        self.assertTrue(np.isnan(result.iloc[2]))
+        self.assertEqual(list(link.aggregate('minutes','mean').iloc[:2]),[30.0,30.0])
+        self.assertEqual(list(link.aggregate('minutes','min').iloc[:2]),[10.0,30.0])
+        self.assertEqual(list(link.aggregate('minutes','max').iloc[:2]),[50.0,30.0])
+        self.assertRaises(ValueError,link.aggregate,'minutes','median')
+
+    def test_children(self):
+
+        link=self.tables.link('household','diary','serial')
+        self.assertEqual(list(link.children(0).index),[1,2,3])
+        self.assertEqual(len(link.children(2)),0)
+
+    def test_parent_not_unique(self):
+
+        self.assertRaises(ValueError,Link,self.individual,self.diary,['serial'])
+
+    def test_lazy_import(self):
+
+        self.assertIs(ukds.LinkedTables,LinkedTables)
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_linked())
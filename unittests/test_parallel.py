@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, tempfile
+from ukds.parallel import shards
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+
+
+class Chunk():
+    "A stand-in for fairly.CreateRDF with the attributes used by the sinks"
+    
+    def __init__(self,rdf):
+        self.rdf=rdf
+        
+    def reset_rdf(self):
+        self.rdf=''
+        
+    def serialize_rdf(self):
+        return '@prefix eg: <http://example.com/> .\n'+self.rdf
+
+
+class ChunkDataTable(ukds.DataTable):
+    "A DataTable whose to_bso_variable writes one line for each cell"
+    
+    def to_bso_variable(self,base_prefix,base_uri,variable):
+        return Chunk(''.join('%s:observation_%s %s:value_%s %s .\n' % (base_prefix,i,base_prefix,variable,v)
+                             for i,v in zip(self.tab.index,self.tab[variable])))
+
+
+class Test_parallel(unittest.TestCase):
+
+    def test_shards(self):
+
+        self.assertEqual(shards(10,4),[(0,3),(3,6),(6,8),(8,10)])
+        self.assertEqual(shards(2,4),[(0,1),(1,2)])
+
+    def test_export_columns(self):
+
+        dt=ChunkDataTable(dt_fp)
+        with tempfile.TemporaryDirectory() as directory:
+            fp=os.path.join(directory,'out.ttl')
+            result=dt.to_rdf_parallel('to_bso_variable',
+                                      os.path.join(directory,'parts'),
+                                      processes=2,
+                                      filename=fp,
+                                      base_prefix='eg',
+                                      base_uri='http://example.com/')
+            with open(result,encoding='UTF-8') as f:
+                rdf=f.read()
+            self.assertEqual(os.listdir(os.path.join(directory,'parts')),[])
+        answer=dt.to_bso_variable('eg','http://example.com/','serial').serialize_rdf()
+        for col in dt.tab.columns[1:]:
+            answer+=dt.to_bso_variable('eg','http://example.com/',col).rdf
+        self.assertEqual(rdf,answer)
+
+    def test_export_rows(self):
+
+        dt=ChunkDataTable(dt_fp)
+        with tempfile.TemporaryDirectory() as directory:
+            fps=dt.to_rdf_parallel('to_bso_variable',
+                                   directory,
+                                   shard='rows',
+                                   processes=2,
+                                   base_prefix='eg',
+                                   base_uri='http://example.com/',
+                                   variable='HhOut')
+            self.assertEqual(len(fps),1+6)
+            rdf=''
+            for fp in fps:
+                with open(fp,encoding='UTF-8') as f:
+                    rdf+=f.read()
+        self.assertEqual(rdf,dt.to_bso_variable('eg','http://example.com/','HhOut').serialize_rdf())
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_parallel())
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import types, os, mmap
+from ukds.rtf import iter_variable_dicts
+import ukds
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+with open(dd_fp,'r',encoding='cp1252') as f:
+    text=f.read()
+
+
+class Test_rtf(unittest.TestCase):
+
+    def test_iter_variable_dicts(self):
+
+        result=iter_variable_dicts(text)
+        self.assertIsInstance(result,types.GeneratorType)
+        result=list(result)
+        self.assertEqual(len(result),5)
+
+    def test_variable_dict(self):
+
+        result=list(iter_variable_dicts(text))[3]
+        answer={'pos': '4',
+                'variable': 'IMonth',
+                'variable_label': 'Interview month',
+                'variable_type': 'numeric',
+                'SPSS_measurement_level': 'ORDINAL',
+                'SPSS_user_missing_values': '-9.0 -8.0 -1.0',
+                'value_labels': {-9.0:'Refused',
+                                 1.0:'January',
+                                 2.0:'February',
+                                 3.0:'March'}}
+        self.assertEqual(result,answer)
+
+    def test_no_labels(self):
+
+        result=list(iter_variable_dicts(text))[0]
+        self.assertEqual(result['SPSS_user_missing_values'],{})
+        self.assertEqual(result['value_labels'],{})
+
+    def test_bytes(self):
+
+        with open(dd_fp,'rb') as f:
+            with mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as m:
+                result=list(iter_variable_dicts(m))
+        self.assertEqual(result,list(iter_variable_dicts(text)))
+
+    def test_read_rtf_memory_map(self):
+
+        dd=ukds.DataDictionary(dd_fp,memory_map=True)
+        self.assertIsNone(dd.rtf)
+        self.assertEqual(dd.variable_names(),
+                         ['serial','strata','HhOut','IMonth','Region'])
+        self.assertEqual(dd.variable_dicts(),list(iter_variable_dicts(text)))
+
+    def test_empty(self):
+
+        self.assertEqual(list(iter_variable_dicts('{\\rtf1 }')),[])
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_rtf())
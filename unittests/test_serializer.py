@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, gzip, tempfile
+import rdflib
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+dt=ukds.DataTable()
+dt.read_datadictionary(dd_fp,memory_map=True)
+dt.read_tab(dt_fp,dtypes=True)
+
+
+def to_ttl_iterrows(df,prefix,uri):
+    "The original row by row DataTable.to_ttl"
+    l1=['@prefix %s: <%s> .\n' % (prefix,uri),'\n']
+    for index,row in df.iterrows():
+        data_dict=row.to_dict()
+        l=[]
+        for k,v in data_dict.items():
+            l.append('%s:%s "%s"' % (prefix,k,v))
+        l1.append('[] %s . \n\n' % ' ;\n\t'.join(l))
+    return ''.join(l1)
+
+
+class Test_serializer(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory=tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def test_to_ttl_same_as_iterrows(self):
+
+        fp=os.path.join(self.directory.name,'test.ttl')
+        dt.to_ttl(fp,'eg','http://example.com/',blocksize=4)
+        with open(fp,encoding='UTF-8') as f:
+            result=f.read()
+        self.assertEqual(result,to_ttl_iterrows(dt.tab,'eg','http://example.com/'))
+        g=rdflib.Graph()
+        g.parse(fp,format='turtle')
+        self.assertEqual(len(g),30)
+
+    def test_to_ttl_ntriples_gzip(self):
+
+        fp=os.path.join(self.directory.name,'test.nt.gz')
+        dt.to_ttl(fp,'eg','http://example.com/',format='nt',batchsize=4)
+        with gzip.open(fp,'rt',encoding='UTF-8') as f:
+            result=f.read()
+        g=rdflib.Graph()
+        g.parse(data=result,format='nt')
+        self.assertEqual(len(g),30)
+        self.assertIn('_:r5 <http://example.com/HhOut> "410" .\n',result)
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_serializer())
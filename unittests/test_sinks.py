@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import os, tempfile
+from ukds.sinks import ListSink, FileSink, CallbackSink
+
+
+class Chunk():
+    "A stand-in for fairly.CreateRDF with the attributes used by the sinks"
+    
+    def __init__(self,rdf):
+        self.rdf=rdf
+        
+    def reset_rdf(self):
+        self.rdf=''
+        
+    def serialize_rdf(self):
+        return '@prefix eg: <http://example.com/> .\n'+self.rdf
+
+
+class Test_sinks(unittest.TestCase):
+
+    def test_list_sink(self):
+
+        sink=ListSink()
+        c=Chunk('eg:a eg:b eg:c .\n')
+        sink.add(c)
+        self.assertEqual(c.rdf,'')
+        sink.add(c)
+        c.rdf='eg:a eg:b eg:d .\n'
+        sink.add(c)
+        self.assertEqual(sink.chunks,['eg:a eg:b eg:c .\n','eg:a eg:b eg:d .\n'])
+        self.assertEqual(sink.rdf,'eg:a eg:b eg:c .\neg:a eg:b eg:d .\n')
+
+    def test_file_sink(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            fp=os.path.join(directory,'test.ttl')
+            with FileSink(fp) as sink:
+                sink.add(Chunk('eg:a eg:b eg:c .\n'))
+                sink.add(Chunk('eg:a eg:b eg:d .\n'))
+            with open(fp,encoding='UTF-8') as f:
+                result=f.read()
+        self.assertEqual(result,'@prefix eg: <http://example.com/> .\n'
+                                'eg:a eg:b eg:c .\neg:a eg:b eg:d .\n')
+
+    def test_callback_sink(self):
+
+        l=[]
+        sink=CallbackSink(lambda c: l.append(len(c.rdf)))
+        sink.add(Chunk('eg:a eg:b eg:c .\n'))
+        self.assertEqual(l,[17])
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_sinks())
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, shutil, tempfile
+from ukds.study import find_files
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+
+def make_bundle(directory):
+    "Lays out the sample files as a UKDA download, with two tables and a table without a data dictionary"
+    os.makedirs(os.path.join(directory,'tab'))
+    os.makedirs(os.path.join(directory,'mrdoc','allissue'))
+    for name in ['household','household2']:
+        shutil.copy(dt_fp,os.path.join(directory,'tab','%s.tab' % name))
+        shutil.copy(dd_fp,os.path.join(directory,'mrdoc','allissue',
+                                       '%s_ukda_data_dictionary.rtf' % name))
+    shutil.copy(dt_fp,os.path.join(directory,'tab','other.tab'))
+
+
+class Test_study(unittest.TestCase):
+
+    def setUp(self):
+        self.directory=tempfile.mkdtemp()
+        make_bundle(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_find_files(self):
+
+        files=find_files(self.directory)
+        self.assertEqual(list(files),['household','household2','other'])
+        self.assertEqual(files['household'],
+                         (os.path.join(self.directory,'tab','household.tab'),
+                          os.path.join(self.directory,'mrdoc','allissue',
+                                       'household_ukda_data_dictionary.rtf')))
+        self.assertIsNone(files['other'][1])
+
+    def test_getitem(self):
+
+        study=ukds.Study(self.directory)
+        self.assertEqual(study.names,['household','household2','other'])
+        self.assertFalse(study.is_loaded('household'))
+        dt=study['household']
+        self.assertTrue(study.is_loaded('household'))
+        self.assertFalse(study.is_loaded('household2'))
+        self.assertIs(study['household'],dt)
+        self.assertEqual(dt.datadictionary.variable_names()[:2],['serial','strata'])
+        self.assertEqual(str(dt.tab['HhOut'].dtype),'category')
+        self.assertFalse(hasattr(study['other'],'datadictionary'))
+        self.assertRaises(KeyError,study.__getitem__,'missing')
+
+    def test_load(self):
+
+        with ukds.Study(self.directory,threads=2,processes=2) as study:
+            study.load()
+            self.assertTrue(all(study.is_loaded(x) for x in study))
+            dt=study['household2']
+
+        answer=ukds.DataTable()
+        answer.read_datadictionary(dd_fp,memory_map=True)
+        answer.read_tab(dt_fp,dtypes=True)
+        self.assertTrue(dt.tab.equals(answer.tab))
+        self.assertEqual(dt.datadictionary.variable_dicts(),
+                         answer.datadictionary.variable_dicts())
+
+    def test_no_tables(self):
+
+        self.assertRaises(ValueError,ukds.Study,os.path.join(self.directory,'mrdoc'))
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_study())
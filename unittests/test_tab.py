@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, re, tempfile
+from unittest import mock
+import numpy as np
+import pandas as pd
+import ukds.tab
+from ukds.tab import read_tab, select_columns
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+dd=ukds.DataDictionary(dd_fp,memory_map=True)
+
+
+class Test_tab(unittest.TestCase):
+
+    def test_dtypes(self):
+
+        result=dd.dtypes()
+        answer={'serial':'float64',
+                'strata':'int64',
+                'HhOut':'category',
+                'IMonth':'int64',
+                'Region':str}
+        self.assertEqual(result,answer)
+
+    def test_read_tab_dtypes(self):
+
+        dt=ukds.DataTable()
+        dt.datadictionary=dd
+        dt.read_tab(dt_fp,dtypes=True)
+        self.assertEqual(dt.tab['serial'].dtype,np.int32)
+        self.assertEqual(dt.tab['strata'].dtype,np.int8)
+        self.assertIsInstance(dt.tab['HhOut'].dtype,pd.CategoricalDtype)
+        self.assertEqual(dt.tab['IMonth'].dtype,np.float32)
+        self.assertTrue(np.isnan(dt.tab['IMonth'][4]))
+
+    def test_read_tab_text_in_numeric_column(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            fp=os.path.join(directory,'test.tab')
+            with open(fp,'w') as f:
+                f.write('a\tb\n1\t2.5\n2\tx\n')
+            df=read_tab(fp,dtypes={'a':'float64','b':'float64'})
+        self.assertEqual(df['a'].dtype,np.int8)
+        self.assertEqual(list(df['b']),['2.5','x'])
+
+    def test_read_tab_integer_codes(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            fp=os.path.join(directory,'test.tab')
+            with open(fp,'w') as f:
+                f.write('a\tb\n1\t300\n-9\t \n')
+            df=read_tab(fp,dtypes={'a':'int64','b':'int64'})
+            # an integer coded column with a blank is read as a float column
+            self.assertEqual(df['a'].dtype,np.int8)
+            self.assertEqual(df['b'].dtype,np.float32)
+            self.assertEqual(list(df['b'][:1]),[300.0])
+
+    def test_read_tab_text_where(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            fp=os.path.join(directory,'test.tab')
+            with open(fp,'w') as f:
+                f.write('a\tb\n1\t2.5\n2\tx\n3\t4\n')
+            df=read_tab(fp,dtypes={'a':'float64','b':'float64'},
+                        where=lambda df: df['a']>1,chunksize=1)
+        self.assertEqual(list(df.index),[1,2])
+        self.assertEqual(list(df['b']),['x','4'])
+
+    def test_select_columns(self):
+
+        names=['serial','act1_001','act1_002','wher_001']
+        self.assertEqual(select_columns(names,['act1_*','serial']),
+                         ['serial','act1_001','act1_002'])
+        self.assertEqual(select_columns(names,[re.compile('.*_001')]),
+                         ['act1_001','wher_001'])
+        with self.assertRaises(KeyError):
+            select_columns(names,['xxx'])
+
+    def test_read_tab_columns_where(self):
+
+        dt=ukds.DataTable()
+        dt.datadictionary=dd
+        dt.read_tab(dt_fp,
+                    dtypes=True,
+                    columns=['serial','Hh*'],
+                    where=lambda df: df['HhOut']=='110')
+        self.assertEqual(list(dt.tab.columns),['serial','HhOut'])
+        self.assertEqual(list(dt.tab.index),[0,2,4])
+        df=dt.get_dataframe()
+        self.assertEqual(list(df.iloc[:,1]),['Productive']*3)
+
+    def test_read_tab_where_chunks(self):
+
+        df=read_tab(dt_fp,where=lambda df: df['strata']==-2,chunksize=2)
+        self.assertEqual(list(df.index),[0,1,3,5])
+
+    def test_iter_batches(self):
+
+        dt=ukds.DataTable()
+        dt.datadictionary=dd
+        dt.read_tab(dt_fp)
+        batches=list(dt.iter_batches(batchsize=4))
+        self.assertEqual([list(b.tab.index) for b in batches],[[0,1,2,3],[4,5]])
+        self.assertIs(batches[0].datadictionary,dd)
+        df=pd.concat(dt.iter_dataframes(batchsize=4,dtypes=True))
+        self.assertEqual(list(df.iloc[:,2]),list(dt.get_dataframe().iloc[:,2]))
+
+    def test_iter_tab_text_in_numeric_column(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            fp=os.path.join(directory,'test.tab')
+            with open(fp,'w') as f:
+                f.write('a\tb\n1\t1\n2\t2\n3\tx\n')
+            with mock.patch('ukds.tab.open_file',wraps=ukds.tab.open_file) as open_file:
+                batches=list(ukds.tab.iter_tab(fp,batchsize=2,dtypes={'a':'float64','b':'float64'}))
+            # the failed batch is read again from memory, not from the file
+            self.assertEqual(open_file.call_count,1)
+        self.assertEqual(list(batches[0]['b']),[1.0,2.0])
+        self.assertEqual(list(batches[1]['b']),['x'])
+        self.assertEqual(list(batches[1].index),[2])
+
+    def test_iter_tab_text_then_numeric_where(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            fp=os.path.join(directory,'test.tab')
+            with open(fp,'w') as f:
+                f.write('a\tb\n100\t1\n250\t2\n300\tx\n50\t4\n260\t5\n270\t6\n')
+            batches=list(ukds.tab.iter_tab(fp,batchsize=2,dtypes={'a':'float64','b':'float64'},
+                                           where=lambda df: df['a']>240))
+        self.assertEqual([list(x.index) for x in batches],[[1],[2],[4,5]])
+        self.assertEqual(list(batches[1]['b']),['x'])
+        self.assertEqual(batches[1]['a'].dtype,np.float64)
+        self.assertEqual(batches[2]['b'].dtype,np.float64)
+        self.assertEqual(list(batches[2]['b']),[5.0,6.0])
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_tab())
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, pickle
+import pandas as pd
+from ukds.terms import TermFactory
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dt_fp=os.path.join(sample_dir,'sample_household.tab')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+
+class Test_terms(unittest.TestCase):
+
+    def test_uri(self):
+
+        t=TermFactory('eg')
+        self.assertEqual(t.variable('HhOut'),'eg:variable_HhOut')
+        self.assertEqual(t.code('HhOut',110.0),'eg:code_HhOut_110.0')
+        self.assertEqual(t.code_prefix('HhOut'),'eg:code_HhOut_')
+        self.assertEqual(t.concept('HhOut',110.0),'eg:concept_HhOut_110.0')
+        self.assertEqual(t.observation(3),'eg:observation_3')
+        self.assertEqual(t.uri('mp','HhOut'),'eg:mp-HhOut')
+        self.assertEqual(t.uri('survey'),'eg:survey')
+
+        # each uri is formatted once
+        self.assertIs(t.variable('HhOut'),t.variable('HhOut'))
+        self.assertEqual(t.code('HhOut',1),'eg:code_HhOut_1')
+        self.assertEqual(t.code('HhOut',1.0),'eg:code_HhOut_1.0')
+
+        # the uris of rows are not kept
+        n=len(t._uris)
+        for i in range(100): t.observation(i)
+        self.assertEqual(len(t._uris),n)
+
+    def test_observations(self):
+
+        t=TermFactory('eg')
+        index=pd.RangeIndex(3)
+        self.assertEqual(t.index_strings(index),['0','1','2'])
+        self.assertEqual(t.observations(index),
+                         ['eg:observation_0','eg:observation_1','eg:observation_2'])
+        self.assertIs(t.observations(index),t.observations(index))
+        self.assertEqual(t.observations(pd.Index([5])),['eg:observation_5'])
+
+    def test_shared(self):
+
+        dt=ukds.DataTable()
+        dt.read_datadictionary(dd_fp,memory_map=True)
+        dt.read_tab(dt_fp)
+        t=dt.term_factory('eg')
+        self.assertIs(t,dt.datadictionary.term_factory('eg'))
+        self.assertIsNot(t,dt.term_factory('ex'))
+
+        t.observations(dt.tab.index)
+        t2=pickle.loads(pickle.dumps(t))
+        self.assertEqual(t2.base_prefix,'eg')
+        self.assertIsNone(t2._index)
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_terms())
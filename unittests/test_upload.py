@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import threading
+import http.server
+import os, gzip, tempfile
+from ukds.upload import SparqlUploader, GraphStoreLoader, UploadError
+
+
+class Chunk():
+    "A stand-in for fairly.CreateRDF with the attributes used by the uploader"
+    
+    def __init__(self,rdf):
+        self.rdf=rdf
+        
+    def reset_rdf(self):
+        self.rdf=''
+        
+    def sparql_update_request_chunks(self,n):
+        chunks=['']
+        for line in self.rdf.splitlines(keepends=True):
+            if chunks[-1] and len(chunks[-1])+len(line)>n: chunks.append('')
+            chunks[-1]+=line
+        return ['INSERT DATA {\n%s}' % x for x in chunks]
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    "Records the request bodies, failing the first 'failures' requests with 503"
+    
+    def read_body(self):
+        if self.headers.get('Transfer-Encoding')=='chunked':
+            l=[]
+            while True:
+                n=int(self.rfile.readline().strip(),16)
+                l.append(self.rfile.read(n))
+                self.rfile.readline()
+                if n==0: break
+            return b''.join(l)
+        return self.rfile.read(int(self.headers['Content-Length']))
+    
+    def do_POST(self):
+        body=self.read_body().decode('UTF-8')
+        with self.server.lock:
+            fail=self.server.failures>0
+            if fail: 
+                self.server.failures-=1
+            else:
+                self.server.bodies.append(body)
+                self.server.requests.append((self.command,
+                                             self.path,
+                                             self.headers['Content-Type'],
+                                             self.headers.get('Transfer-Encoding')))
+        self.send_response(503 if fail else self.server.status)
+        self.send_header('Content-Length','0')
+        self.end_headers()
+        
+    do_PUT=do_POST
+        
+    def log_message(self,*args):
+        pass
+
+
+class Test_upload(unittest.TestCase):
+
+    def setUp(self):
+
+        self.server=http.server.ThreadingHTTPServer(('127.0.0.1',0),StubHandler)
+        self.server.lock=threading.Lock()
+        self.server.bodies=[]
+        self.server.requests=[]
+        self.server.failures=0
+        self.server.status=204
+        threading.Thread(target=self.server.serve_forever,daemon=True).start()
+        self.url='http://127.0.0.1:%s/ukds/update' % self.server.server_address[1]
+
+    def tearDown(self):
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_batches(self):
+
+        c=Chunk('')
+        with SparqlUploader(self.url,batch_size=100,concurrency=3) as uploader:
+            for i in range(50):
+                c.rdf+='eg:s eg:p %s .\n' % i
+                uploader.add(c)
+        self.assertEqual(c.rdf,'')
+        body=''.join(sorted(self.server.bodies))
+        for i in range(50):
+            self.assertIn('eg:s eg:p %s .\n' % i,body)
+        self.assertTrue(all(len(x)<=100+len('INSERT DATA {\n}') for x in self.server.bodies))
+        self.assertEqual(uploader.requests,len(self.server.bodies))
+        self.assertIn('requests',uploader.summary())
+
+    def test_several_instances(self):
+
+        chunks=[Chunk('eg:s eg:p %s .\n' % i) for i in range(3)]
+        with SparqlUploader(self.url,batch_size=1000) as uploader:
+            for c in chunks:
+                uploader.add(c)
+        body=''.join(self.server.bodies)
+        for i in range(3):
+            self.assertIn('eg:s eg:p %s .\n' % i,body)
+        self.assertTrue(all(c.rdf=='' for c in chunks))
+
+    def test_retry(self):
+
+        self.server.failures=2
+        with SparqlUploader(self.url,backoff=0.01) as uploader:
+            uploader.add(Chunk('eg:s eg:p eg:o .\n'))
+        self.assertEqual(self.server.bodies,['INSERT DATA {\neg:s eg:p eg:o .\n}'])
+        self.assertEqual(uploader.retried,2)
+
+    def test_failure(self):
+
+        self.server.failures=10
+        uploader=SparqlUploader(self.url,retries=1,backoff=0.01)
+        uploader.add(Chunk('eg:s eg:p eg:o .\n'))
+        with self.assertRaises(UploadError):
+            uploader.close()
+
+    def test_graph_store_loader(self):
+
+        url='http://127.0.0.1:%s/ukds/data' % self.server.server_address[1]
+        with tempfile.TemporaryDirectory() as directory:
+            fp_header=os.path.join(directory,'header.ttl')
+            with open(fp_header,'w') as f: f.write('@prefix eg: <http://example.com/> .\n')
+            fp_part=os.path.join(directory,'part-00000.ttl')
+            with open(fp_part,'w') as f: f.write('eg:s eg:p eg:o .\n')
+            fp_nt=os.path.join(directory,'test.nt.gz')
+            with gzip.open(fp_nt,'wt') as f: f.write('<http://s> <http://p> "o" .\n')
+            self.server.failures=1
+            with GraphStoreLoader(url,backoff=0.01) as loader:
+                loader.load({'http://example.com/g1':[fp_part]},header=fp_header)
+                loader.load({None:[fp_nt]},replace=True)
+                loader.load({'http://example.com/g2':[fp_nt]},header=fp_header)
+        self.assertEqual(self.server.requests,
+                         [('POST','/ukds/data?graph=http%3A%2F%2Fexample.com%2Fg1','text/turtle','chunked'),
+                          ('PUT','/ukds/data?default=','application/n-triples','chunked'),
+                          ('POST','/ukds/data?graph=http%3A%2F%2Fexample.com%2Fg2','text/turtle','chunked')])
+        self.assertEqual(self.server.bodies,
+                         ['@prefix eg: <http://example.com/> .\neg:s eg:p eg:o .\n',
+                          '<http://s> <http://p> "o" .\n',
+                          '@prefix eg: <http://example.com/> .\n<http://s> <http://p> "o" .\n'])
+        # the uncompressed bytes sent
+        self.assertEqual(loader.bytes,sum(len(x.encode('UTF-8')) for x in self.server.bodies))
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_upload())
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import ukds, os, pickle
+
+sample_dir=os.path.join(os.path.dirname(__file__),'sample')
+dd_fp=os.path.join(sample_dir,'sample_household_ukda_data_dictionary.rtf')
+
+def sample_datadictionary():
+    dd=ukds.DataDictionary()
+    with open(dd_fp,'r',encoding='cp1252') as f:
+        dd.rtf=f.read()
+    return dd
+
+
+class Test_variable_catalogue(unittest.TestCase):
+
+    def test_parsed_once(self):
+
+        dd=sample_datadictionary()
+        catalogue=dd.catalogue
+        dd.variable_dict('strata')
+        dd.variable_names()
+        self.assertIs(dd.catalogue,catalogue)
+
+    def test_rtf_reset(self):
+
+        dd=sample_datadictionary()
+        catalogue=dd.catalogue
+        dd.rtf=dd.rtf
+        self.assertIsNot(dd.catalogue,catalogue)
+
+    def test_variable_dict(self):
+
+        dd=sample_datadictionary()
+        result=dd.variable_dict('HhOut')
+        self.assertEqual(result['pos'],'3')
+        self.assertEqual(result['value_labels'],{110.0:'Productive',
+                                                 410.0:'Office refusal',
+                                                 790.0:'Other ineligible'})
+        self.assertEqual(dd.get_variable_dict('HhOut'),result)
+
+    def test_variable_names(self):
+
+        dd=sample_datadictionary()
+        self.assertEqual(dd.variable_names(),
+                         ['serial','strata','HhOut','IMonth','Region'])
+
+    def test_by_pos(self):
+
+        dd=sample_datadictionary()
+        self.assertEqual(dd.catalogue.by_pos(4)['variable'],'IMonth')
+        self.assertEqual(dd.catalogue.index('IMonth'),3)
+
+    def test_missing_variable(self):
+
+        dd=sample_datadictionary()
+        self.assertNotIn('xxx',dd.catalogue)
+        with self.assertRaises(KeyError):
+            dd.variable_dict('xxx')
+
+    def test_immutable(self):
+
+        dd=sample_datadictionary()
+        with self.assertRaises(AttributeError):
+            dd.catalogue._variables=()
+
+    def test_pickle(self):
+
+        catalogue=sample_datadictionary().catalogue
+        result=pickle.loads(pickle.dumps(catalogue))
+        self.assertEqual(list(result),list(catalogue))
+        self.assertEqual(result.by_pos(3)['variable'],'HhOut')
+
+
+if __name__=='__main__':
+
+    o=unittest.main(Test_variable_catalogue())